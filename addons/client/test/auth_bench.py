@@ -0,0 +1,56 @@
+#benchmark of per request authentication cost of server requests, compares md5 crypt of password on each request,
+#cache of verified passwords and session tokens
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.admin import admin_main,admin
+from core.admin.admin_loader import AdminLoader
+from core.lib import password_lib
+from core.server import auth_session
+from core.server.request import Request
+import time
+
+REQUESTS=2000
+
+class BenchAdmin(admin.Admin):
+    def __init__(self,username,password):
+        admin.Admin.__init__(self,username,password_lib.Password(password).getMd5Crypt(),"","",1,0,0,0)
+        self.locks=[]
+        self.perms={}
+
+def createRequest(auth_args):
+    params=auth_args.copy()
+    params["auth_type"]="ADMIN"
+    params["auth_name"]="bench"
+    return Request(None,"bench",[params],("127.0.0.1",0))
+
+def crypted(count):
+    stored_password=admin_main.getLoader().getAdminByName("bench").getPassword()
+    for i in xrange(count):
+        request=createRequest({"auth_pass":"bench_pass"})
+        assert request.auth_pass==stored_password
+
+def cached(count):
+    for i in xrange(count):
+        createRequest({"auth_pass":"bench_pass"}).authenticate()
+
+def session(count):
+    request=createRequest({"auth_pass":"bench_pass"})
+    request.authenticate()
+    token=request.createSession()[0]
+    for i in xrange(count):
+        createRequest({"auth_session":token}).authenticate()
+
+loader=AdminLoader()
+loader.admins_name["bench"]=BenchAdmin("bench","bench_pass")
+old_loader=getattr(admin_main,"admin_loader",None)
+admin_main.admin_loader=loader
+old_session_tokens=getattr(auth_session,"session_tokens",None)
+auth_session.init()
+try:
+    for name,method in (("md5 crypt",crypted),("verified cache",cached),("session token",session)):
+        start=time.time()
+        method(REQUESTS)
+        duration=time.time()-start
+        print "%-16s %8.1f usec/request"%(name+":",duration*1000000/REQUESTS)
+finally:
+    admin_main.admin_loader=old_loader
+    auth_session.session_tokens=old_session_tokens
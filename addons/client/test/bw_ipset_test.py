@@ -0,0 +1,43 @@
+#ipset mark runner harness, commands are recorded by a fake launcher instead of being run
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core import defs
+from core.script_launcher import launcher_main
+from core.bandwidth_limit.ipset import IPSet
+from core.bandwidth_limit.leaf import Leaf,LeafService
+
+class FakeLauncher:
+    def __init__(self):
+        self.commands=[]
+
+    def system(self,script,args,timeout=20):
+        self.commands.append("%s %s"%(script," ".join(args)))
+        return 0
+
+if not hasattr(defs,"BW_IPTABLES_COMMAND"): #defs are not loaded from db when running standalone
+    defs.BW_IPTABLES_COMMAND="iptables"
+
+old_launcher=getattr(launcher_main,"script_launcher",None)
+fake=launcher_main.script_launcher=FakeLauncher()
+try:
+    leaf=Leaf(1,"test",1,1,-1,-1,64,128,[LeafService(5,1,"tcp","dport 80",256,512)])
+    runner=IPSet()
+
+    runner.addMark(10000,"10.0.0.1","send",None,leaf)
+    runner.addMark(10001,"10.0.0.1","send",leaf.getServices()[0],leaf)
+    assert len(filter(lambda cmd:cmd.startswith("ipset -exist create"),fake.commands))==2
+
+    del(fake.commands[:])
+    runner.addMark(10002,"10.0.0.2","send",None,leaf)
+    assert fake.commands==["ipset -exist add IBSng_1_s_d 10.0.0.2 skbmark 0x2712"],fake.commands
+
+    del(fake.commands[:])
+    runner.delMark(10002,"10.0.0.2","send",None,leaf)
+    assert fake.commands==["ipset -exist del IBSng_1_s_d 10.0.0.2"],fake.commands
+
+    del(fake.commands[:])
+    runner.resetSets()
+    runner.addMark(10003,"10.0.0.3","receive",None,leaf)
+    assert "iptables -t mangle -A IBSng_POSTROUTING -m set --match-set IBSng_1_r_d dst -j SET --map-set IBSng_1_r_d dst --map-mark" in fake.commands,fake.commands
+    print "ipset mark runner OK"
+finally:
+    launcher_main.script_launcher=old_launcher
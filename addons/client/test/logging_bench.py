@@ -0,0 +1,82 @@
+#benchmark of radius packet handling with full logging, compares synchronous loggers with buffered loggers
+#that write and decode packets from a writer thread, and sampled packet logging. Each packet logs request,
+#response and database queries, like radius server with LOG_RADIUS_REQUESTS, LOG_RADIUS_RESPONSES and
+#LOG_DATABASE_QUERIES enabled
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core import ibs_exceptions,defs
+from core.ibs_logger import Logger
+from radius_server.pyrad import dictionary,packet
+from radius_server.packet_logger import PacketLogger
+import threading
+import tempfile
+import shutil
+import time
+import os
+
+THREADS=5
+PACKETS=4000 #per thread
+QUERIES=4 #per packet
+
+def createPackets(dic):
+    request_pkt=packet.AuthPacket(code=packet.AccessRequest,id=1,secret="bench",dict=dic)
+    request_pkt["User-Name"]="bench_user"
+    request_pkt["NAS-IP-Address"]="10.0.0.1"
+    request_pkt["NAS-Port"]=12
+    request_pkt["Calling-Station-Id"]="00:11:22:33:44:55"
+    request_pkt["Service-Type"]="Framed-User"
+    raw_packet=request_pkt.RequestPacket()
+    request_pkt=packet.AuthPacket(packet=raw_packet,dict=dic) #as received by radius server
+    request_pkt.raw_packet=raw_packet
+    request_pkt.source=("10.0.0.1",1812)
+    reply_pkt=request_pkt.CreateReply()
+    reply_pkt.dict=dic
+    reply_pkt.code=packet.AccessAccept
+    reply_pkt["Framed-IP-Address"]="192.168.1.10"
+    reply_pkt["Session-Timeout"]=3600
+    reply_pkt.source=request_pkt.source
+    return request_pkt,reply_pkt
+
+def handlePackets(packet_logger,request_pkt,reply_pkt,latencies):
+    max_latency=0
+    for i in xrange(PACKETS):
+        start=time.time()
+        packet_logger.checkRequest(request_pkt)
+        for j in xrange(QUERIES):
+            ibs_exceptions.toLog("Time:0.0003 Query:select * from users where user_id=%s"%i,ibs_exceptions.LOG_QUERY)
+        packet_logger.logResponse(request_pkt,reply_pkt)
+        max_latency=max(max_latency,time.time()-start)
+    latencies.append(max_latency)
+
+def run(buffer_size,sample_rate,log_dir):
+    defs.LOG_RADIUS_SAMPLE_RATE=sample_rate
+    ibs_exceptions.radius_log_handle=Logger(os.path.join(log_dir,"radius.%s.log"%buffer_size),buffer_size)
+    ibs_exceptions.query_log_handle=Logger(os.path.join(log_dir,"queries.%s.log"%buffer_size),buffer_size)
+    latencies=[]
+    threads=map(lambda i:threading.Thread(target=handlePackets,args=(PacketLogger(),request_pkt,reply_pkt,latencies)),
+                range(THREADS))
+    start=time.time()
+    map(lambda thread:thread.start(),threads)
+    map(lambda thread:thread.join(),threads)
+    duration=time.time()-start
+    dropped=ibs_exceptions.radius_log_handle.getDroppedCount()+ibs_exceptions.query_log_handle.getDroppedCount()
+    ibs_exceptions.radius_log_handle.stop()
+    ibs_exceptions.query_log_handle.stop()
+    print "%-34s %8.0f packets/sec, max packet logging time %6.2f ms, %s records dropped"%\
+            ("buffer size %s, sample rate %s:"%(buffer_size,sample_rate),THREADS*PACKETS/duration,max(latencies)*1000,dropped)
+
+dic=dictionary.Dictionary("%s/radius_server/dictionary"%defs.IBS_ROOT,
+                          "%s/radius_server/dictionary.usr"%defs.IBS_ROOT,
+                          "%s/radius_server/dictionary.ser"%defs.IBS_ROOT,
+                          "%s/radius_server/dictionary.sip"%defs.IBS_ROOT)
+request_pkt,reply_pkt=createPackets(dic)
+
+old_handles=(ibs_exceptions.radius_log_handle,ibs_exceptions.query_log_handle)
+old_sample_rate=defs.LOG_RADIUS_SAMPLE_RATE
+log_dir=tempfile.mkdtemp()
+try:
+    for buffer_size,sample_rate in ((0,1),(defs.LOG_BUFFER_SIZE,1),(1000,1),(defs.LOG_BUFFER_SIZE,10)):
+        run(buffer_size,sample_rate,log_dir)
+finally:
+    ibs_exceptions.radius_log_handle,ibs_exceptions.query_log_handle=old_handles
+    defs.LOG_RADIUS_SAMPLE_RATE=old_sample_rate
+    shutil.rmtree(log_dir)
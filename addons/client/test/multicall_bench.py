@@ -0,0 +1,51 @@
+#!/usr/bin/python
+#benchmark of provisioning through system.multicall, compares one call per operation with multicall batches
+#runs against a running server, operations change "comment" attribute of users
+#usage: multicall_bench.py <admin username> <admin password> <comma separated user ids> [operations] [batch size]
+import xmlrpclib
+import sys
+import time
+
+def authArgs(args):
+    args.update({"auth_name":sys.argv[1],
+                 "auth_pass":sys.argv[2],
+                 "auth_type":"ADMIN"})
+    return args
+
+def operationParams(i):
+    return {"user_id":user_ids[i%len(user_ids)],
+            "attrs":{"comment":"multicall bench %s"%i},
+            "to_del_attrs":[]}
+
+def singleCalls(server,operations):
+    for i in xrange(operations):
+        server.user.updateUserAttrs(authArgs(operationParams(i)))
+
+def multiCalls(server,operations,atomic=False):
+    for start in xrange(0,operations,batch_size):
+        calls=map(lambda i:{"methodName":"user.updateUserAttrs","params":operationParams(i)},
+                  xrange(start,min(start+batch_size,operations)))
+        for result in server.system.multicall(authArgs({"calls":calls,"atomic":atomic})):
+            if type(result)==dict and result.has_key("faultCode"):
+                raise Exception(result["faultString"])
+
+if len(sys.argv)<4:
+    print "usage: %s <admin username> <admin password> <comma separated user ids> [operations] [batch size]"%sys.argv[0]
+    sys.exit(1)
+
+user_ids=sys.argv[3].split(",")
+operations=10000
+batch_size=100
+if len(sys.argv)>4:
+    operations=int(sys.argv[4])
+if len(sys.argv)>5:
+    batch_size=int(sys.argv[5])
+
+for name,method,args in (("single calls",singleCalls,[]),
+                         ("multicall",multiCalls,[]),
+                         ("atomic multicall",multiCalls,[True])):
+    server=xmlrpclib.ServerProxy("http://localhost:1235")
+    start=time.time()
+    apply(method,[server,operations]+args)
+    duration=time.time()-start
+    print "%s operations, %-16s %8.2f seconds, %8.0f operations/sec"%(operations,name+":",duration,operations/duration)
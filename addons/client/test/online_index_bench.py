@@ -0,0 +1,162 @@
+#benchmark of paginated online users report, compares OnlineSessionIndex pages with old format all, filter and sort
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.user.online_index import OnlineSessionIndex
+from core.user.online_store import SERVICE_NORMAL,SERVICE_VOIP
+from core.ras import ras_main
+import random
+import time
+
+SESSIONS=30000
+PAGE_SIZE=30
+
+class FakeRas:
+    def __init__(self,ras_id):
+        self.ras_id=ras_id
+
+    def getRasIP(self):
+        return "10.0.0.%s"%self.ras_id
+
+    def getRasDesc(self):
+        return "ras%s"%self.ras_id
+
+class FakeRasLoader:
+    def __init__(self):
+        self.rases={}
+        for ras_id in xrange(1,21):
+            self.rases[ras_id]=FakeRas(ras_id)
+
+    def getRasByID(self,ras_id):
+        return self.rases[ras_id]
+
+class FakeAdmin:
+    def __init__(self,admin_id):
+        self.admin_id=admin_id
+
+    def getAdminID(self):
+        return self.admin_id
+
+    def getUsername(self):
+        return "admin%s"%self.admin_id
+
+class FakeGroup:
+    def __init__(self,group_id):
+        self.group_id=group_id
+
+    def getGroupName(self):
+        return "group%s"%self.group_id
+
+class FakeBasicUser:
+    def __init__(self,user_id):
+        self.owner_id=random.randint(0,9)
+        self.group_id=random.randint(1,20)
+
+    def getOwnerObj(self):
+        return FakeAdmin(self.owner_id)
+
+    def getGroupObj(self):
+        return FakeGroup(self.group_id)
+
+    def getGroupID(self):
+        return self.group_id
+
+class FakeLoadedUser:
+    def __init__(self,user_id):
+        self.basic_user=FakeBasicUser(user_id)
+
+    def getBasicUser(self):
+        return self.basic_user
+
+class FakeUserAttrs(dict):
+    def hasAttr(self,attr_name):
+        return self.has_key(attr_name)
+
+class FakeUser:
+    def __init__(self,user_id,_type):
+        self.user_id=user_id
+        self.type=_type
+        self.instances=0
+        self.instance_infos=[]
+        self.loaded_user=FakeLoadedUser(user_id)
+        self.user_attrs=FakeUserAttrs({"normal_username":"user%s"%user_id,"voip_username":"voip%s"%user_id})
+
+    def login(self,ras_id,unique_id_val):
+        self.instances+=1
+        self.instance_infos.append({"ras_id":ras_id,"unique_id_val":unique_id_val,"attrs":{},
+                                    "login_time":time.time()-random.randint(0,86400)})
+
+    def getUserID(self):
+        return self.user_id
+
+    def isNormalUser(self):
+        return self.type=="Normal"
+
+    def getInstanceInfo(self,instance):
+        return self.instance_infos[instance-1]
+
+    def getGlobalUniqueID(self,instance):
+        return (self.instance_infos[instance-1]["ras_id"],self.instance_infos[instance-1]["unique_id_val"])
+
+    def getLoadedUser(self):
+        return self.loaded_user
+
+    def getUserAttrs(self):
+        return self.user_attrs
+
+def oldPage(onlines,service,sort_by,desc,filters,_from,to):
+    """
+        format all sessions of service, filter and sort them, like getFormattedOnlineUsers and sortOnlineUsers
+    """
+    rows=[]
+    for user_obj in onlines.itervalues():
+        for instance in xrange(1,user_obj.instances+1):
+            row_service,values=index._OnlineSessionIndex__getValues(user_obj,instance)
+            if row_service!=service:
+                continue
+            if filters.has_key("ras_id") and values["ras_id"] not in filters["ras_id"]:
+                continue
+            if filters.has_key("owner_id") and values["owner_id"] not in filters["owner_id"]:
+                continue
+            if filters.has_key("username_prefix") and \
+               not filter(values["username"].startswith,filters["username_prefix"]):
+                continue
+            rows.append((values[sort_by],user_obj.getGlobalUniqueID(instance)))
+    rows.sort()
+    if desc:
+        rows.reverse()
+    return (len(rows),map(lambda x:x[1],rows[_from:to]))
+
+old_loader=getattr(ras_main,"ras_loader",None)
+ras_main.ras_loader=FakeRasLoader()
+try:
+    onlines={}
+    index=OnlineSessionIndex()
+    for i in xrange(SESSIONS):
+        user_id=random.randint(1,SESSIONS*2/3)
+        if not onlines.has_key(user_id):
+            onlines[user_id]=FakeUser(user_id,random.choice(["Normal","Normal","VoIP"]))
+        user_obj=onlines[user_id]
+        user_obj.login(random.randint(1,20),"port%s"%i)
+        index.addSession(user_obj,user_obj.instances)
+
+    for user_obj in random.sample(onlines.values(),SESSIONS/10):
+        index.removeSession(user_obj.getGlobalUniqueID(user_obj.instances))
+        user_obj.instances-=1
+        user_obj.instance_infos.pop()
+
+    cases=(("all by login time",SERVICE_NORMAL,"login_time_epoch",True,{}),
+           ("ras and owner",SERVICE_NORMAL,"username",False,{"ras_id":[1,2],"owner_id":[3]}),
+           ("username prefix",SERVICE_VOIP,"group_name",True,{"username_prefix":["voip12"]}))
+    for name,service,sort_by,desc,filters in cases:
+        for _from in (0,PAGE_SIZE*10,SESSIONS): #last page is after all rows
+            assert oldPage(onlines,service,sort_by,desc,filters,_from,_from+PAGE_SIZE)== \
+                   index.getPage(service,sort_by,desc,filters,_from,_from+PAGE_SIZE)
+
+        timings=[]
+        for page_method,arg in ((oldPage,onlines),(OnlineSessionIndex.getPage,index)):
+            start=time.time()
+            for i in xrange(10):
+                page_method(arg,service,sort_by,desc,filters,PAGE_SIZE*10,PAGE_SIZE*11)
+            timings.append((time.time()-start)/10)
+        print "%s sessions, %-18s old %.4f seconds, new %.6f seconds"%(SESSIONS*9/10,name+":",timings[0],timings[1])
+finally:
+    ras_main.ras_loader=old_loader
@@ -0,0 +1,159 @@
+#benchmark of onlines loop clients, compares column passes of OnlineSessionStore with old per instance walk
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.user.online_store import OnlineSessionStore,SERVICE_NORMAL,SERVICE_VOIP
+import random
+import time
+
+SESSIONS=30000
+
+class FakeRas:
+    def getInOutBytes(self,user_msg):
+        return user_msg["user_obj"].inouts[user_msg["instance"]-1]
+
+class FakeTypeObj:
+    """
+        getInOutBytes creates and dispatches a user message to ras, like NormalUser.getInOutBytes
+    """
+    def __init__(self,user_obj):
+        self.user_obj=user_obj
+
+    def getInOutBytes(self,instance):
+        user_msg={"action":"GET_INOUT_BYTES","user_obj":self.user_obj,"instance":instance}
+        user_msg.update(self.user_obj.getInstanceInfo(instance))
+        return rases[user_msg["ras_id"]].getInOutBytes(user_msg)
+
+class FakeUser:
+    def __init__(self,user_id,_type):
+        self.user_id=user_id
+        self.type=_type
+        self.instances=0
+        self.instance_infos=[]
+        self.inouts=[]
+        self.type_obj=FakeTypeObj(self)
+
+    def login(self,ras_id,unique_id_val):
+        self.instances+=1
+        self.instance_infos.append({"ras_id":ras_id,"unique_id_val":unique_id_val,"login_time":time.time()})
+        self.inouts.append((random.randint(0,10**9),random.randint(0,10**9),random.randint(0,10**5),random.randint(0,10**5)))
+
+    def getUserID(self):
+        return self.user_id
+
+    def isNormalUser(self):
+        return self.type=="Normal"
+
+    def getInstanceInfo(self,instance):
+        return self.instance_infos[instance-1]
+
+    def getGlobalUniqueID(self,instance):
+        return (self.instance_infos[instance-1]["ras_id"],self.instance_infos[instance-1]["unique_id_val"])
+
+    def getInstanceFromUniqueID(self,ras_id,unique_id_val):
+        for instance in xrange(1,self.instances+1):
+            if self.getGlobalUniqueID(instance)==(ras_id,unique_id_val):
+                return instance
+
+    def getTypeObj(self):
+        return self.type_obj
+
+class OldClients:
+    """
+        processInstance of old onlines loop clients: internet_onlines, voip_onlines, internet_bw, user_bw
+        and onlines snapshot
+    """
+    def __init__(self):
+        self.internet_count=self.voip_count=self.in_sum=self.out_sum=0
+        self.user_bw={}
+        self.internet_onlines={}
+        self.voip_onlines={}
+
+    def internetOnlines(self,user_obj,instance):
+        if user_obj.isNormalUser():
+            self.internet_count+=1
+
+    def voipOnlines(self,user_obj,instance):
+        if not user_obj.isNormalUser():
+            self.voip_count+=1
+
+    def internetBW(self,user_obj,instance):
+        if user_obj.isNormalUser():
+            _in,out,in_rate,out_rate=user_obj.getTypeObj().getInOutBytes(instance)
+            self.in_sum+=in_rate
+            self.out_sum+=out_rate
+
+    def userBW(self,user_obj,instance):
+        if user_obj.isNormalUser():
+            _in,out,in_rate,out_rate=user_obj.getTypeObj().getInOutBytes(instance)
+            ras_id,unique_id_val=user_obj.getGlobalUniqueID(instance)
+            self.user_bw[",".join(map(str,(user_obj.getUserID(),ras_id,unique_id_val)))]=(in_rate,out_rate)
+
+    def onlinesSnapshot(self,user_obj,instance):
+        ras_id,unique_id_val=user_obj.getGlobalUniqueID(instance)
+        if user_obj.isNormalUser():
+            self.internet_onlines[ras_id]=self.internet_onlines.get(ras_id,0)+1
+        else:
+            self.voip_onlines[ras_id]=self.voip_onlines.get(ras_id,0)+1
+
+def oldLoop(onlines):
+    clients=OldClients()
+    methods=("internetOnlines","voipOnlines","internetBW","userBW","onlinesSnapshot")
+    for user_obj in onlines.itervalues():
+        for instance in xrange(1,user_obj.instances+1):
+            for method_name in methods:
+                try:
+                    getattr(clients,method_name)(user_obj,instance)
+                except:
+                    pass
+    return (clients.internet_count,clients.voip_count,[clients.in_sum,clients.out_sum],clients.user_bw,
+            clients.internet_onlines,clients.voip_onlines)
+
+def newLoop(store):
+    store.refresh()
+    user_bw={}
+    columns=store.getColumns("keys","user_id","service","in_rate","out_rate")
+    for (ras_id,unique_id_val),user_id,service,in_rate,out_rate in zip(*columns):
+        if service==SERVICE_NORMAL:
+            user_bw[",".join(map(str,(user_id,ras_id,unique_id_val)))]=(in_rate,out_rate)
+    return (store.getCount(SERVICE_NORMAL),
+            store.getCount(SERVICE_VOIP),
+            store.sumColumns(("in_rate","out_rate"),SERVICE_NORMAL),
+            user_bw,
+            store.countByRas(SERVICE_NORMAL),
+            store.countByRas(SERVICE_VOIP))
+
+rases={}
+for ras_id in xrange(1,21):
+    rases[ras_id]=FakeRas()
+onlines={}
+store=OnlineSessionStore()
+for i in xrange(SESSIONS):
+    user_id=random.randint(1,SESSIONS*2/3)
+    if not onlines.has_key(user_id):
+        onlines[user_id]=FakeUser(user_id,random.choice(["Normal","Normal","VoIP"]))
+    user_obj=onlines[user_id]
+    user_obj.login(random.randint(1,20),"port%s"%i)
+    store.addSession(user_obj,user_obj.instances)
+
+#logout some sessions, rows are moved
+for user_obj in random.sample(onlines.values(),SESSIONS/10):
+    store.removeSession(user_obj.getGlobalUniqueID(user_obj.instances))
+    user_obj.instances-=1
+    user_obj.instance_infos.pop()
+    user_obj.inouts.pop()
+
+assert oldLoop(onlines)==newLoop(store)
+for name,loop_method,arg in (("old",oldLoop,onlines),("new",newLoop,store)):
+    start=time.time()
+    for i in xrange(10):
+        loop_method(arg)
+    print "%s sessions, %s loop: %.3f seconds"%(store.getCount(),name,(time.time()-start)/10)
+
+start=time.time()
+for i in xrange(10):
+    store.refresh()
+print "%s sessions, refresh of counters: %.4f seconds"%(store.getCount(),(time.time()-start)/10)
+
+start=time.time()
+for i in xrange(10):
+    store.sumColumns(("in_rate","out_rate"),SERVICE_NORMAL)
+print "%s sessions, sum of rates: %.4f seconds"%(store.getCount(),(time.time()-start)/10)
@@ -0,0 +1,95 @@
+#benchmark of user attribute lookups and memory, compares merged attributes snapshot with old user then group lookup
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.group import group_main
+from core.group.group import Group
+from core.group.group_loader import GroupLoader
+from core.user.attribute import UserAttributes
+from core.ibs_exceptions import *
+import random
+import time
+
+USERS=100000
+GROUPS=20
+
+class OldUserAttributes:
+    def __init__(self,attributes,group_id):
+        self.attributes=attributes
+        self.group_id=group_id
+
+    def getAttr(self,attr_name):
+        if self.attributes.has_key(attr_name):
+            return self.attributes[attr_name]
+        return group_main.getLoader().getGroupByID(self.group_id).getAttr(attr_name)
+
+    def hasAttr(self,attr_name):
+        return self.attributes.has_key(attr_name) or group_main.getLoader().getGroupByID(self.group_id).hasAttr(attr_name)
+
+def getRSS():
+    """
+        return resident memory of process in KB
+    """
+    for line in open("/proc/self/status"):
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+
+def createAttrs(names,count):
+    attrs={}
+    for attr_name in random.sample(names,count):
+        attrs["".join(list(attr_name))]=str(random.choice([0,1,10,3600,"kbps"])) #new string objects, like db results
+    return attrs
+
+def createUsers(attrs_class):
+    start_rss=getRSS()
+    users=[]
+    for i in xrange(USERS):
+        users.append(attrs_class(createAttrs(user_attr_names,5),random.randint(1,GROUPS)))
+    return users,getRSS()-start_rss
+
+def lookupsPerSecond(users,max_seconds=2):
+    start=time.time()
+    count=0
+    for user_attrs in users:
+        for attr_name in lookup_names:
+            if user_attrs.hasAttr(attr_name):
+                user_attrs.getAttr(attr_name)
+            count+=1
+        if time.time()-start>max_seconds:
+            break
+    return count/(time.time()-start)
+
+old_loader=getattr(group_main,"group_loader",None)
+group_main.group_loader=GroupLoader()
+try:
+    group_attr_names=map(lambda x:"group_attr_%s"%x,xrange(30))
+    user_attr_names=group_attr_names[:10]+map(lambda x:"user_attr_%s"%x,xrange(10))
+    lookup_names=random.sample(group_attr_names,8)+random.sample(user_attr_names,4)+["missing_attr"]
+    for group_id in xrange(1,GROUPS+1):
+        group_main.getLoader()._GroupLoader__addInternal(Group(group_id,"group%s"%group_id,"",0,
+                                                               createAttrs(group_attr_names,15)))
+
+    old_users,old_memory=createUsers(OldUserAttributes)
+    new_users,new_memory=createUsers(UserAttributes)
+    for old_attrs,new_attrs in zip(old_users,new_users)[:1000]:
+        new_attrs.attributes=old_attrs.attributes
+        new_attrs.group_id=old_attrs.group_id
+        new_attrs.merged_attrs=None
+        for attr_name in lookup_names:
+            assert old_attrs.hasAttr(attr_name)==new_attrs.hasAttr(attr_name)
+            if old_attrs.hasAttr(attr_name):
+                assert old_attrs.getAttr(attr_name)==new_attrs.getAttr(attr_name)
+
+    print "memory after load: old %6s KB, new %6s KB"%(old_memory,new_memory)
+    start_rss=getRSS()
+    print "%s users, first lookups: old %10.0f/sec, new %10.0f/sec"%(USERS,lookupsPerSecond(old_users,3600),
+                                                                     lookupsPerSecond(new_users,3600))
+    snapshots_memory=getRSS()-start_rss
+    print "%s users, next lookups:  old %10.0f/sec, new %10.0f/sec"%(USERS,lookupsPerSecond(old_users,3600),
+                                                                     lookupsPerSecond(new_users,3600))
+    print "memory of all built snapshots: new %6s KB"%snapshots_memory
+
+    group_obj=group_main.getLoader().getGroupByID(new_users[0].group_id)
+    group_obj.attributes["new_group_attr"]="1"
+    group_main.getLoader()._GroupLoader__addInternal(group_obj) #same as reloading group
+    assert new_users[0].getAttr("new_group_attr")=="1"
+finally:
+    group_main.group_loader=old_loader
@@ -0,0 +1,112 @@
+#benchmark of user plugin hook dispatch, compares per user hook tables with old dispatch on all plugins
+#plugins have the same names, priorities, parent classes and implemented hooks as core/user/plugins
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.user import user_plugin
+import itertools
+import time
+
+#(plugin_name,priority,attribute name for attr checking plugins or None,implemented hooks)
+PLUGINS=[("lock",1,None,["login"]),
+         ("h323_plugin",1,None,["login"]),
+         ("limit_mac",1,"limit_mac",["login"]),
+         ("password",1,None,["login"]),
+         ("limit_caller_id",1,"limit_caller_id",["login"]),
+         ("limit_station_ip",1,"limit_station_ip",["login"]),
+         ("fast_dial",1,"fast_dial",["login","update"]),
+         ("assign_ip",3,"assign_ip",["login","logout"]),
+         ("remote_ip",3,None,["login","update"]),
+         ("ippool",4,None,["login","logout","update"]),
+         ("terminate_cause_plugin",5,None,["logout"]),
+         ("abs_exp_date",5,"abs_exp_date",["login","canStayOnline"]),
+         ("idle_timeout",5,"idle_timeout",["login"]),
+         ("voip_user_plugin",5,None,["login","update","logout"]),
+         ("radius_attrs",5,"radius_attrs",["login"]),
+         ("multi_login",5,None,["login","logout"]),
+         ("session_timeout",5,"session_timeout",["login"]),
+         ("time_periodic_accounting_monthly",5,None,["login","logout","commit","update"]),
+         ("traffic_periodic_accounting_monthly",5,None,["login","logout","commit","update"]),
+         ("time_periodic_accounting_daily",5,None,["login","logout","commit","update"]),
+         ("traffic_periodic_accounting_daily",5,None,["login","logout","commit","update"]),
+         ("rel_exp_date",5,None,["login","commit","canStayOnline"]),
+         ("charge",6,None,["login","update","logout","canStayOnline"]),
+         ("mschap_end",9,None,["login"])]
+
+PERIODIC_ATTRS=("time_periodic_accounting_monthly","traffic_periodic_accounting_monthly",
+                "time_periodic_accounting_daily","traffic_periodic_accounting_daily")
+
+USER_ATTRS=["abs_exp_date","rel_exp_date","multi_login","normal_charge"] #attributes of a typical user
+
+def hookMethod(*args):
+    pass
+
+def createPluginClass(plugin_name,attr_name,hooks):
+    if plugin_name in PERIODIC_ATTRS:
+        class Plugin(user_plugin.AttrCheckUserPlugin):
+            def __init__(self,user_obj):
+                user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,plugin_name)
+    elif attr_name!=None:
+        class Plugin(user_plugin.AttrCheckUserPlugin):
+            has_attr_name=attr_name
+    else:
+        class Plugin(user_plugin.UserPlugin):
+            pass
+
+    prefix=""
+    if issubclass(Plugin,user_plugin.AttrCheckUserPlugin):
+        prefix="s_"
+    for hook in hooks:
+        setattr(Plugin,prefix+hook,hookMethod)
+    return Plugin
+
+class FakeLoadedUser:
+    def hasAttr(self,attr_name):
+        return attr_name in USER_ATTRS
+
+class FakeUser:
+    def getLoadedUser(self):
+        return FakeLoadedUser()
+
+def oldCallPluginsMethod(plugin_classes,user_obj,args,method_name):
+    """
+        old UserPluginManager.__callPluginsMethod
+    """
+    ret_vals = []
+    for (plugin_class, plugin_name) in itertools.chain(*plugin_classes):
+        method = getattr(getattr(user_obj,plugin_name), method_name)
+        ret_vals.append(method(*args))
+    return ret_vals
+
+def callsPerSecond(call_method,args,max_seconds=2):
+    start=time.time()
+    count=0
+    while time.time()-start<max_seconds:
+        for i in xrange(1000):
+            call_method(*args)
+        count+=1000
+    return count/(time.time()-start)
+
+manager=user_plugin.UserPluginManager()
+plugin_classes=([],[],[],[],[],[],[],[],[],[])
+for plugin_name,priority,attr_name,hooks in PLUGINS:
+    plugin_class=createPluginClass(plugin_name,attr_name,hooks)
+    manager.register(plugin_name,plugin_class,priority)
+    plugin_classes[priority].append((plugin_class,plugin_name))
+
+old_user=FakeUser()
+for plugin_class,plugin_name in itertools.chain(*plugin_classes):
+    setattr(old_user,plugin_name,plugin_class(old_user))
+new_user=FakeUser()
+manager.callHooks("USER_INIT",new_user)
+
+print "created plugins: old %s, new %s"%(len(PLUGINS),len(filter(None,map(lambda x:getattr(new_user,x[0]),PLUGINS))))
+print "plugin init: old %8.0f users/sec, new %8.0f users/sec"%(
+        callsPerSecond(lambda:map(lambda x:x[0](FakeUser()),itertools.chain(*plugin_classes)),[]),
+        callsPerSecond(manager.callHooks,["USER_INIT",FakeUser()]))
+for hook,method_name,args in (("USER_LOGIN","login",[None]),("USER_CAN_STAY_ONLINE","canStayOnline",[])):
+    print "%s: old %8.0f calls/sec, new %8.0f calls/sec"%(hook,
+            callsPerSecond(oldCallPluginsMethod,[plugin_classes,old_user,args,method_name]),
+            callsPerSecond(manager.callHooks,[hook,new_user,args]))
+
+USER_ATTRS.append("session_timeout")
+manager.callHooks("USER_RELOAD",new_user)
+assert new_user.session_timeout!=None and new_user.session_timeout.s_login in new_user.plugin_hooks["login"]
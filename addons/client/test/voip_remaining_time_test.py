@@ -0,0 +1,133 @@
+#randomized equivalence test of VoipRemainingTime against simulation of VoipCharge.checkLimits
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.charge.voip_charge import VoipCharge
+from core.charge.voip_charge_rule import VoipChargeRule
+from core.charge.voip_tariff import tariff_main
+from core.charge.voip_tariff.tariff import Tariff,Prefix
+from core.charge.voip_tariff.tariff_loader import TariffLoader
+from core.lib.day_of_week import DayOfWeekInt,DayOfWeekIntContainer
+from core.ibs_exceptions import *
+from core.ibs_logger import Logger
+from core import ibs_exceptions
+import tempfile
+import shutil
+import random
+import time
+
+class FakeChargeInfo:
+    def __init__(self):
+        self.accounting_started=[0]
+
+class FakeTypeObj:
+    def __init__(self,called_number,call_start_time):
+        self.called_number=called_number
+        self.call_start_time=call_start_time
+
+    def getCalledNumber(self,instance):
+        return self.called_number
+
+    def getCallStartTime(self,instance):
+        return self.call_start_time
+
+class FakeUser:
+    def __init__(self,ras_id,port,called_number,call_start_time):
+        self.instances=1
+        self.charge_info=FakeChargeInfo()
+        self.global_unique_id=(ras_id,port)
+        self.type_obj=FakeTypeObj(called_number,call_start_time)
+
+    def getGlobalUniqueID(self,instance):
+        return self.global_unique_id
+
+    def getTypeObj(self):
+        return self.type_obj
+
+def createTariffs(loader):
+    for tariff_id in (1,2):
+        prefixes=[]
+        for prefix_id,code in enumerate(("0098","00982","001","0044")):
+            prefixes.append(Prefix(tariff_id*100+prefix_id,code,code,random.choice([0,random.uniform(1,100)]),
+                                   random.choice([0,0,10,90]),0,1,0))
+        if tariff_id==2:
+            prefixes=prefixes[:2] #tariff 2 doesn't have all prefixes
+        loader._TariffLoader__keepObj(Tariff(tariff_id,"tariff%s"%tariff_id,"",prefixes))
+
+def formatSeconds(seconds):
+    return "%d:%d:%d"%(seconds/3600,seconds%3600/60,seconds%60)
+
+def createCharge():
+    charge_obj=VoipCharge(1,"test","",0,"t","VoIP")
+    rules={}
+    for rule_id in xrange(random.randint(1,20)):
+        ras_id=random.choice(["_ALL_",1,2])
+        ports=random.choice([["_ALL_"],["p1"],["p1","p2"]])
+        dows=DayOfWeekIntContainer(*map(DayOfWeekInt,random.sample(range(7),random.randint(1,7))))
+        start,end=random.sample(xrange(0,86400,random.choice([1,60,3600])),2)
+        start,end=min(start,end),max(start,end)
+        if random.random()<0.2:
+            end_str="24"
+        else:
+            end_str=formatSeconds(end)
+        rule=VoipChargeRule(rule_id,charge_obj,dows,formatSeconds(start),end_str,random.choice([1,2]),ras_id,ports)
+        if filter(lambda other:other.hasOverlap(rule) or rule.hasOverlap(other),rules.values()):
+            continue
+        rules[rule_id]=rule
+    charge_obj.setRules(rules)
+    return charge_obj
+
+def compare(charge_obj,user_obj,credit,start):
+    instance=1
+    try:
+        call_start_rule=charge_obj._getEffectiveRuleForTime(user_obj,instance,user_obj.getTypeObj().getCallStartTime(instance))
+    except LoginException:
+        return False
+    call_start_prefix=call_start_rule.getPrefixObj(user_obj,instance,False)
+    playing={instance:{"call_start_time":user_obj.getTypeObj().getCallStartTime(instance),
+                       "call_start_rule":call_start_rule,
+                       "call_start_prefix":call_start_prefix}}
+
+    simulated=charge_obj._simulateRemainingTime(user_obj,True,FakeResult(),playing,credit,start)
+    calculated=charge_obj.remaining_time.calcRemainingTime(user_obj,instance,credit,start,
+                                                           user_obj.getTypeObj().getCallStartTime(instance),
+                                                           call_start_prefix.getFreeSeconds())
+    #simulation subtracts credit step by step, and calculation solves on cumulative cost of steps, so they
+    #may differ by float rounding. When rounding leaves a tiny credit after credit finish time, simulation
+    #takes one more minimum step of one second
+    diff=simulated-calculated
+    assert abs(diff)<1e-6*max(1,simulated) or abs(diff-1)<1e-6*max(1,simulated), \
+           "simulated %r calculated %r credit %r start %r"%(simulated,calculated,credit,start)
+    if abs(diff)>=1e-6*max(1,simulated):
+        extra_steps[0]+=1
+    return True
+
+class FakeResult:
+    def addInstanceToKill(self,instance,reason):
+        pass
+
+log_dir=None
+if not hasattr(ibs_exceptions,"debug_log_handle"): #standalone, simulation logs to debug and error logs
+    log_dir=tempfile.mkdtemp()
+    ibs_exceptions.debug_log_handle=Logger("%s/debug.log"%log_dir)
+    ibs_exceptions.error_log_handle=Logger("%s/error.log"%log_dir)
+
+extra_steps=[0]
+old_loader=getattr(tariff_main,"tariff_loader",None)
+tariff_main.tariff_loader=TariffLoader()
+try:
+    compared=0
+    for charge_count in xrange(200):
+        createTariffs(tariff_main.tariff_loader)
+        charge_obj=createCharge()
+        for call_count in xrange(50):
+            start=time.time()+random.uniform(0,14*86400)
+            if not charge_obj.remaining_time.canCalc(start):
+                continue
+            user_obj=FakeUser(random.choice([1,2,3]),random.choice(["p1","p2","p3"]),
+                              random.choice(["00981234","00982234","0011234","00441234"]),start-random.choice([0,5,30,120]))
+            if compare(charge_obj,user_obj,random.uniform(0.01,10000),start):
+                compared+=1
+    print "%s calls compared, all match, %s with extra one second step of simulation"%(compared,extra_steps[0])
+finally:
+    tariff_main.tariff_loader=old_loader
+    if log_dir!=None:
+        shutil.rmtree(log_dir)
@@ -0,0 +1,50 @@
+#benchmark of voip tariff longest prefix match, compares findPrefix with old sequential search
+#can be run through client.py or standalone with PYTHONPATH=/usr/local/IBSng
+from core.charge.voip_tariff.tariff import Tariff,Prefix
+import random
+import time
+
+def sequentialFindPrefix(tariff_obj,called_number):
+    longest_code=""
+    for code in tariff_obj.prefixes_code.iterkeys():
+        if called_number.startswith(code) and len(code)>len(longest_code):
+            longest_code=code
+    if longest_code:
+        return tariff_obj.getPrefixByCode(longest_code)
+    return None
+
+def createTariff(prefix_count):
+    codes={}
+    while len(codes)<prefix_count:
+        codes["00%s"%random.randint(1,10**random.randint(1,8))]=True
+    prefixes=[]
+    for prefix_id,code in enumerate(codes.keys()):
+        prefixes.append(Prefix(prefix_id,code,"prefix %s"%code,1.0,0,0,1,0))
+    return Tariff(1,"bench","",prefixes)
+
+def lookupsPerSecond(find_method,tariff_obj,numbers,max_seconds=2):
+    start=time.time()
+    count=0
+    for number in numbers:
+        find_method(tariff_obj,number)
+        count+=1
+        if time.time()-start>max_seconds:
+            break
+    return count/(time.time()-start)
+
+for prefix_count in (1000,10000,100000):
+    tariff_obj=createTariff(prefix_count)
+    numbers=map(lambda x:"00%s"%random.randint(10**9,10**11),xrange(10000))
+    for number in numbers[:200]:
+        assert tariff_obj.findPrefix(number)==sequentialFindPrefix(tariff_obj,number)
+
+    print "%6s prefixes: findPrefix %10.0f lookups/sec, sequential %8.0f lookups/sec"%(prefix_count,
+                                                lookupsPerSecond(Tariff.findPrefix,tariff_obj,numbers),
+                                                lookupsPerSecond(sequentialFindPrefix,tariff_obj,numbers))
+
+tariff_obj=createTariff(1000)
+code=tariff_obj.prefixes_code.keys()[0]
+tariff_obj.setPrefixes([Prefix(100001,code+"5","new",2.0,0,0,1,0)])
+assert tariff_obj.findPrefix(code+"5123456789").getPrefixID()==100001
+tariff_obj.delPrefixes([code+"5"])
+assert tariff_obj.findPrefix(code+"5123456789")==sequentialFindPrefix(tariff_obj,code+"5123456789")
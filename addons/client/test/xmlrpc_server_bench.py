@@ -0,0 +1,68 @@
+#benchmark of xmlrpc server, compares calls/sec of a local client with and without keep alive connections
+#starts a second server on a free local port, should be run through client.py
+from core.server import handlers_manager,handler
+from core.server.xmlrpcserver import XMLRPCServer
+from core.threadpool import thread_main
+import xmlrpclib
+import socket
+import time
+
+class BenchHandler(handler.Handler):
+    def __init__(self):
+        handler.Handler.__init__(self,"bench")
+        self.registerHandlerMethod("echo")
+
+    def echo(self,request):
+        request.needAuthType(request.ANONYMOUS)
+        return request["value"]
+
+class CloseTransport(xmlrpclib.Transport):
+    """
+        open a new connection for each call
+    """
+    def request(self,*args,**kargs):
+        try:
+            return xmlrpclib.Transport.request(self,*args,**kargs)
+        finally:
+            self.close()
+
+def callsPerSecond(proxy,max_seconds=3):
+    start=time.time()
+    count=0
+    while time.time()-start<max_seconds:
+        for i in xrange(100):
+            assert proxy.bench.echo({"auth_type":"ANONYMOUS","auth_name":"","auth_pass":"","value":i})==i
+        count+=100
+    return count/(time.time()-start)
+
+def pipelined(address,count):
+    """
+        send "count" requests in one packet, return list of values in responses
+    """
+    body=xmlrpclib.dumps(({"auth_type":"ANONYMOUS","auth_name":"","auth_pass":"","value":0},),"bench.echo")
+    requests=[]
+    for i in xrange(count):
+        request_body=body.replace("<int>0</int>","<int>%s</int>"%i)
+        requests.append("POST /RPC2 HTTP/1.1\r\nHost: localhost\r\nContent-length: %s\r\n\r\n%s"%(len(request_body),request_body))
+
+    sock=socket.create_connection(address)
+    sock.sendall("".join(requests))
+    data=""
+    while data.count("</methodResponse>")<count:
+        data+=sock.recv(65536)
+    sock.close()
+    return map(lambda response:xmlrpclib.loads(response[response.index("<?xml"):])[0][0],
+               data.split("HTTP/1.1 200 OK")[1:])
+
+if not handlers_manager.getManager().handlerRegistered("bench"):
+    handlers_manager.getManager().registerHandler(BenchHandler())
+
+server=XMLRPCServer(("127.0.0.1",0))
+thread_main.runThread(server.serve_forever,[],"main")
+try:
+    url="http://%s:%s"%server.server_address
+    assert pipelined(server.server_address,10)==range(10)
+    print "without keep alive: %8.0f calls/sec"%callsPerSecond(xmlrpclib.ServerProxy(url,CloseTransport()))
+    print "with keep alive:    %8.0f calls/sec"%callsPerSecond(xmlrpclib.ServerProxy(url))
+finally:
+    server.stop()
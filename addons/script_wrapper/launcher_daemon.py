@@ -0,0 +1,151 @@
+#!/usr/bin/python
+"""
+    launcher_daemon is a long lived helper process of IBSng script launcher.
+    It reads jobs from stdin and writes results to stdout, so IBSng doesn't need to start a shell and a
+    script_wrapper interpreter for each script it runs.
+
+    Each message on the pipe is a decimal length line followed by a pickled dictionary.
+    Jobs are {"id":int, "argv":list of str, "timeout":int, "mode":"system"|"popen"|"popen3"}
+    Results are {"id":int, "exit_code":int, "output":str, "error":str, "timed_out":bool}
+
+    Targets are executed directly with argv (no shell), in their own process group, and whole process group
+    is killed if it doesn't exit in timeout seconds. Exit code will be 255 if timeout occures or 254 if
+    error occures, same as script_wrapper.
+"""
+import os
+import sys
+import signal
+import threading
+import subprocess
+import Queue
+import cPickle
+from optparse import OptionParser
+
+TIMEOUT_EXIT_CODE=255
+ERROR_EXIT_CODE=254
+
+write_lock=threading.Lock()
+
+def readMessage(fd):
+    """
+        read a message from fd, return None on EOF
+    """
+    length_line=fd.readline()
+    if not length_line:
+        return None
+    return cPickle.loads(fd.read(int(length_line)))
+
+def writeMessage(fd,message):
+    data=cPickle.dumps(message,2)
+    write_lock.acquire()
+    try:
+        fd.write("%d\n%s"%(len(data),data))
+        fd.flush()
+    finally:
+        write_lock.release()
+
+class Job:
+    def __init__(self,job_dic):
+        self.job_id=job_dic["id"]
+        self.argv=job_dic["argv"]
+        self.timeout=job_dic["timeout"]
+        self.mode=job_dic["mode"]
+        self.timed_out=False
+
+    def run(self):
+        """
+            run the job and return result dictionary
+        """
+        try:
+            exit_code,output,error=self.__spawn()
+        except:
+            exit_code,output,error=ERROR_EXIT_CODE,"","%s: %s"%(self.argv[0],sys.exc_info()[1])
+
+        if self.timed_out:
+            exit_code=TIMEOUT_EXIT_CODE
+
+        return {"id":self.job_id,
+                "exit_code":exit_code,
+                "output":output,
+                "error":error,
+                "timed_out":self.timed_out}
+
+    def __spawn(self):
+        devnull=open(os.devnull,"r+")
+        try:
+            if self.mode=="system":
+                stdout,stderr=devnull,devnull
+            elif self.mode=="popen":
+                stdout,stderr=subprocess.PIPE,subprocess.STDOUT
+            else:
+                stdout,stderr=subprocess.PIPE,subprocess.PIPE
+
+            proc=subprocess.Popen(self.argv,stdin=devnull,stdout=stdout,stderr=stderr,
+                                  close_fds=True,preexec_fn=os.setsid)
+            timer=threading.Timer(self.timeout,self.__kill,[proc.pid])
+            timer.start()
+            try:
+                output,error=proc.communicate()
+            finally:
+                timer.cancel()
+        finally:
+            devnull.close()
+
+        if proc.returncode<0: #killed by signal
+            exit_code=ERROR_EXIT_CODE
+        else:
+            exit_code=proc.returncode
+
+        return exit_code,output or "",error or ""
+
+    def __kill(self,pid):
+        self.timed_out=True
+        try:
+            os.killpg(pid,signal.SIGKILL)
+        except OSError:
+            pass
+
+def worker(job_queue,out_fd):
+    while True:
+        job=job_queue.get()
+        if job==None:
+            return
+        writeMessage(out_fd,job.run())
+
+def parseOptions():
+    usage="""usage: %prog [options]
+
+               launcher_daemon reads jobs from stdin and runs them concurrently.
+               It exits when stdin is closed
+    """
+    parser=OptionParser(usage=usage)
+    parser.add_option("-j","--jobs",type="int",dest="jobs",default=8,help="Number of concurrent jobs")
+    options,args=parser.parse_args()
+    return options.jobs
+
+def main():
+    jobs=parseOptions()
+    signal.signal(signal.SIGINT,signal.SIG_IGN)
+
+    in_fd,out_fd=sys.stdin,sys.stdout
+    sys.stdout=sys.stderr #don't let anything else write to result pipe
+
+    job_queue=Queue.Queue()
+    workers=[]
+    for i in range(jobs):
+        thread=threading.Thread(target=worker,args=(job_queue,out_fd))
+        thread.setDaemon(True)
+        thread.start()
+        workers.append(thread)
+
+    while True:
+        job_dic=readMessage(in_fd)
+        if job_dic==None:
+            break
+        job_queue.put(Job(job_dic))
+
+    for thread in workers:
+        job_queue.put(None)
+
+if __name__=="__main__":
+    main()
@@ -158,11 +158,17 @@ class Admin:
             password(Password instance): password to check
             return 1 if it's correct and 0 if it's not
         """
-        if password == self.password:
+        if password_lib.checkPassword(self.password,password):
             return 1
         else:
             return 0
 
+    def getPassword(self):
+        """
+            return password of admin as stored, a Password instance
+        """
+        return self.password
+
 
     def isAuthorizedFromAddr(self,remote_addr):
         if self.hasPerm("LIMIT LOGIN ADDR"):
@@ -196,6 +202,14 @@ class Admin:
         self.__updateActivity(remote_addr, long(time.time()))
 	self.checkAuth(auth_pass, remote_addr)
 
+    def checkServerSessionAuth(self, remote_addr):
+        """
+            check authentication of a server request that has a valid session token, password is already
+            checked when session was created
+        """
+        self.__updateActivity(remote_addr, long(time.time()))
+        self.canLogin(remote_addr)
+
     def __updateActivity(self, last_ip, last_update):
         self.activity_status["last_request_ip"], self.activity_status["last_activity"] = last_ip, last_update
 
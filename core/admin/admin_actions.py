@@ -149,7 +149,10 @@ class AdminActions:
             raise GeneralException(errorText("ADMIN","NEGATIVE_DEPOSIT_NOT_ALLOWED")%deposit)
         
         if need_query:
-            return self.consumeDepositQuery(admin_obj.getAdminID(),deposit)
+            admin_id=admin_obj.getAdminID()
+            #deposit query may run in a transaction, reload in memory deposit if it's rolled back
+            db_main.onTransactionEnd(lambda committed:committed or self.__getAdminLoader().loadAdmin(admin_id))
+            return self.consumeDepositQuery(admin_id,deposit)
         
     def consumeDepositQuery(self,admin_id,deposit):
         return ibs_db.createUpdateQuery("admins",
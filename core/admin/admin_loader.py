@@ -8,6 +8,7 @@ class AdminLoader:
     def __init__(self):
         self.admins_id={}
         self.admins_name={}
+        self.admin_infos={} #admin_id=>(admin_info,perms,locks) of loaded admins, to find changed admins on reload
         
     def __getitem__(self,key):
         if isInt(key):
@@ -62,9 +63,14 @@ class AdminLoader:
         """
             load admin with id "admin_id" and put it in internally used dic
         """
-        admin_obj=self.__loadAdminObj(admin_id)
+        infos=self.__getAdminsInfos("admin_id=%s"%admin_id)
+        if not infos.has_key(admin_id):
+            raise GeneralException(errorText("ADMIN","ADMIN_ID_INVALID")%admin_id)
+
+        admin_obj=self.__loadAdminObj(*infos[admin_id])
         self.admins_id[admin_id]=admin_obj
         self.admins_name[admin_obj.username]=admin_obj
+        self.admin_infos[admin_id]=infos[admin_id]
         
     def loadAdminByName(self,username):
         """
@@ -78,8 +84,35 @@ class AdminLoader:
         """
             load all of admins available in "admin" table
         """
-        admin_ids=self.__getAllAdminIDs()
-        map(self.loadAdmin,admin_ids)
+        infos=self.__getAdminsInfos("true")
+        for admin_id,info in infos.iteritems():
+            admin_obj=self.__loadAdminObj(*info)
+            self.admins_id[admin_id]=admin_obj
+            self.admins_name[admin_obj.username]=admin_obj
+        self.admin_infos=infos
+
+    def reloadAllAdmins(self):
+        """
+            reload admins from db, only admins that they or their permissions or locks have been changed are
+            recreated. New dics are built aside and replaced at once, so lookups see either old or new admins
+            return dic of "added","changed","removed" admin ids
+        """
+        infos=self.__getAdminsInfos("true")
+        (added,changed,removed)=diffDics(self.admin_infos,infos)
+
+        admins_id=self.admins_id.copy()
+        admins_name=self.admins_name.copy()
+        for admin_id in changed+removed:
+            del(admins_name[admins_id[admin_id].getUsername()])
+            del(admins_id[admin_id])
+
+        for admin_id in changed+added:
+            admin_obj=self.__loadAdminObj(*infos[admin_id])
+            admins_id[admin_id]=admin_obj
+            admins_name[admin_obj.username]=admin_obj
+
+        self.admins_id,self.admins_name,self.admin_infos=admins_id,admins_name,infos
+        return {"added":added,"changed":changed,"removed":removed}
         
     def unLoadAdmin(self, admin_id):
         """
@@ -88,29 +121,18 @@ class AdminLoader:
         admin_obj = self.getAdminByID(admin_id)
         del(self.admins_id[admin_id])
         del(self.admins_name[admin_obj.getUsername()])
+        if self.admin_infos.has_key(admin_id):
+            del(self.admin_infos[admin_id])
 
-    def __loadAdminObj(self,admin_id):
+    def __loadAdminObj(self,admin_info,perms,locks):
         """
-            get admin information from db(including basic info,perms and locks), 
-            Create an object of these information, and return the object
+            Create an admin object from admin basic info, perms and locks returned by __getAdminsInfos
+            and return the object
         """
-        admin_info=self.__getAdminBasicInfoDB(admin_id)
         admin_obj=self.__createAdminObj(admin_info)
-        admin_perms=perm_loader.getLoader().getPermsOfAdmin(admin_obj)
-        admin_locks=self.__getAdminLocks(admin_id)
-        admin_obj.setPerms(admin_perms)
-        admin_obj.setLocks(admin_locks)
+        admin_obj.setPerms(perm_loader.getLoader().getPermsOfAdmin(admin_obj,perms))
+        admin_obj.setLocks(map(self.__createAdminLockObj,locks))
         return admin_obj
-        
-    def __getAdminBasicInfoDB(self,admin_id):
-        """
-            return dic of admin basic information from "admin" table
-        """
-        try:
-            return db_main.getHandle().get("admins","admin_id=%s"%admin_id)[0]
-        except:
-            logException(LOG_ERROR,"AdminLoader.__getAdminBasicInfoDB")
-            raise
 
     def __createAdminObj(self,admin_info):
         """
@@ -121,29 +143,32 @@ class AdminLoader:
                            admin_info["admin_id"],admin_info["deposit"],admin_info["creator_id"],
                            admin_info["due"])
     
-    def __getAdminLocks(self,admin_id):
-        """
-            retrieve locks of admin with id "admin_id" and return a list of AdminLock instances 
-        """
-        locks=self.__getAdminLocksDB(admin_id)
-        return map(self.__createAdminLockObj,locks)
-
     def __createAdminLockObj(self,lock_dic):
         """
             create an AdminLock object from "lock_dic"
         """
         return admin_lock.AdminLock(lock_dic["lock_id"],lock_dic["locker_admin_id"],lock_dic["admin_id"],lock_dic["reason"])
 
-    def __getAdminLocksDB(self,admin_id):
+    def __getAdminsInfos(self,condition):
         """
-            get admin locks from "admin_locks" table.
+            return a dic of admin_id=>(admin_info,perms,locks) for admins matching "condition" on "admins" table
+            admin_info is a dic of admin basic information, perms and locks are lists of dics from "admin_perms"
+            and "admin_locks" tables. each table is read in one query, for all admins
         """
-        return db_main.getHandle().get("admin_locks","admin_id=%s"%admin_id)
+        infos={}
+        for admin_info in db_main.getHandle().get("admins",condition):
+            infos[admin_info["admin_id"]]=(admin_info,[],[])
 
-    
-    def __getAllAdminIDs(self):
-        """
-            return a list of all admin_ids from "admins" table
-        """
-        admin_ids=db_main.getHandle().get("admins","true",0,-1,"",["admin_id"])
-        return [m["admin_id"] for m in admin_ids]
+        if not infos:
+            return infos
+
+        admin_ids_condition="admin_id in (select admin_id from admins where %s)"%condition
+        for _dic in db_main.getHandle().get("admin_perms",admin_ids_condition,0,-1,"admin_id,perm_name"):
+            if infos.has_key(_dic["admin_id"]):
+                infos[_dic["admin_id"]][1].append(_dic)
+
+        for _dic in db_main.getHandle().get("admin_locks",admin_ids_condition,0,-1,"admin_id,lock_id"):
+            if infos.has_key(_dic["admin_id"]):
+                infos[_dic["admin_id"]][2].append(_dic)
+
+        return infos
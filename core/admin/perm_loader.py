@@ -65,12 +65,11 @@ class PermLoader:
         return perm_obj
 
 
-    def getPermsOfAdmin(self,admin_obj):
+    def getPermsOfAdmin(self,admin_obj,perms):
         """
-            retrieve permissions of admin with id "admin_obj.admin_id",create and return AdminPermission instances
-            in a dic with format {"PERM_NAME":ADMIN_PERM_OBJ} 
+            create and return AdminPermission instances of "admin_obj" in a dic with format {"PERM_NAME":ADMIN_PERM_OBJ}
+            perms is a list of dics of permissions of admin, returned from table admin_perms
         """
-        perms=self.__getPermsOfAdminDB(admin_obj.getAdminID())
         return self.__createAdminPermsDic(perms,admin_obj)
 
 
@@ -93,13 +92,6 @@ class PermLoader:
                                                self.__getPermObj(perm["perm_name"]),perm["perm_value"])
         return admin_perms_dic
     
-    def __getPermsOfAdminDB(self,admin_id):
-        """
-            retrieve and return a list of dics, containing permissions of admin with id "admin_id" from db
-            and from admin_perms table
-        """
-        return db_main.getHandle().get("admin_perms","admin_id=%s"%admin_id)    
-
     def __getPermObj(self,perm_name):
         """
             return instance of Permission class with name "perm_name"
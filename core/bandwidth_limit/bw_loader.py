@@ -63,34 +63,23 @@ class BWLoader:
             raise GeneralException(errorText("BANDWIDTH","INVALID_STATIC_IP")%static_ip_addr)
 #############################################################
     def loadAll(self):
-        interface_ids=self.__getAllInterfaceIDs()
-        map(self.loadInterface,interface_ids)
-        map(self.loadNodesByInterfaceID,interface_ids)
-        map(self.loadLeavesByInterfaceID,interface_ids)
-        self.loadAllStaticIPs()
+        """
+            load all interfaces, nodes, leaves and static ips, each table is read in one query
+        """
+        for int_info in db_main.getHandle().get("bw_interface","",0,-1,"interface_id"):
+            self.__keepInterfaceObj(self.__createInterfaceObj(int_info))
 
-    def __getAllInterfaceIDs(self):
-        int_ids_db=self.__getAllInterfaceIDsDB()
-        return map(lambda _dic:_dic["interface_id"],int_ids_db) 
-    
-    def __getAllInterfaceIDsDB(self):
-        return db_main.getHandle().get("bw_interface","",0,-1,"interface_id",["interface_id"])
-    
-    def loadNodesByInterfaceID(self,interface_id):
-        node_ids=self.__getNodesWithInterfaceID(interface_id)
-        map(self.loadNode,node_ids)
+        for node_info in db_main.getHandle().get("bw_node","",0,-1,"node_id"):
+            self.__keepNodeObj(self.__createNodeObj(node_info))
 
-    def __getNodesWithInterfaceID(self,interface_id):
-        node_ids_db=db_main.getHandle().get("bw_node","",0,-1,"node_id",["node_id"])
-        return map(lambda _dic:_dic["node_id"],node_ids_db)
+        services={} #leaf_id=>list of service infos
+        for service_info in db_main.getHandle().get("bw_leaf_services","",0,-1,"leaf_service_id"):
+            services.setdefault(service_info["leaf_id"],[]).append(service_info)
 
-    def loadLeavesByInterfaceID(self,interface_id):
-        leaf_ids=self.__getLeavesWithInterfaceID(interface_id)
-        map(self.loadLeaf,leaf_ids)
+        for leaf_info in db_main.getHandle().get("bw_leaf","",0,-1,"leaf_id"):
+            self.__keepLeafObj(self.__createLeafObj(leaf_info,services.get(leaf_info["leaf_id"],[])))
 
-    def __getLeavesWithInterfaceID(self,interface_id):
-        leaf_ids_db=db_main.getHandle().get("bw_leaf","",0,-1,"leaf_id",["leaf_id"])
-        return map(lambda _dic:_dic["leaf_id"],leaf_ids_db)
+        self.loadAllStaticIPs()
 
 ##############################################################
     def interfaceNameExists(self,interface_name):
@@ -100,7 +89,7 @@ class BWLoader:
         return self.__interfaces_name.keys()
 
     def loadInterface(self,interface_id):
-        interface_obj=self.__createInterfaceObj(interface_id)
+        interface_obj=self.__createInterfaceObj(self.__getInterfaceInfo(interface_id))
         self.__keepInterfaceObj(interface_obj)
 
     def unloadInterface(self,interface_id):
@@ -112,8 +101,7 @@ class BWLoader:
         self.__interfaces_id[interface_obj.getInterfaceID()]=interface_obj
         self.__interfaces_name[interface_obj.getInterfaceName()]=interface_obj
 
-    def __createInterfaceObj(self,interface_id):
-        int_info=self.__getInterfaceInfo(interface_id)
+    def __createInterfaceObj(self,int_info):
         return Interface(int_info["interface_id"],int_info["interface_name"],int_info["comment"])
         
     def __getInterfaceInfo(self,interface_id):
@@ -125,7 +113,12 @@ class BWLoader:
         return self.__nodes_id.keys()
 
     def loadNode(self,node_id):
-        node_obj=self.__createNodeObj(node_id)
+        try:
+            node_info=self.__getNodeInfoDB(node_id)
+        except IndexError:
+            raise GeneralException(errorText("BANDWIDTH","NODE_ID_NOT_FOUND")%node_id)
+
+        node_obj=self.__createNodeObj(node_info)
         self.__keepNodeObj(node_obj)
 
     def unloadNode(self,node_id):
@@ -134,12 +127,7 @@ class BWLoader:
     def __keepNodeObj(self,node_obj):
         self.__nodes_id[node_obj.getNodeID()]=node_obj
 
-    def __createNodeObj(self,node_id):
-        try:
-            node_info=self.__getNodeInfoDB(node_id)
-        except IndexError:
-            raise GeneralException(errorText("BANDWIDTH","NODE_ID_NOT_FOUND")%node_id)
-
+    def __createNodeObj(self,node_info):
         return Node(node_info["node_id"],node_info["parent_id"],node_info["interface_id"],node_info["rate_kbits"],node_info["ceil_kbits"])
     
     def __getNodeInfoDB(self,node_id):
@@ -154,7 +142,12 @@ class BWLoader:
         return self.__leaves_name.keys()
 
     def loadLeaf(self,leaf_id):
-        leaf_obj=self.__createLeafObj(leaf_id)
+        try:
+            leaf_info=self.__getLeafInfoDB(leaf_id)
+        except IndexError:
+            raise GeneralException(errorText("BANDWIDTH","LEAF_ID_NOT_FOUND")%leaf_id)
+
+        leaf_obj=self.__createLeafObj(leaf_info,self.__getLeafServicesDB(leaf_id))
         self.__keepLeafObj(leaf_obj)
         
     def unloadLeaf(self,leaf_id):
@@ -166,12 +159,8 @@ class BWLoader:
         self.__leaves_id[leaf_obj.getLeafID()]=leaf_obj
         self.__leaves_name[leaf_obj.getLeafName()]=leaf_obj
 
-    def __createLeafObj(self,leaf_id):
-        try:
-            leaf_info=self.__getLeafInfoDB(leaf_id)
-        except IndexError:
-            raise GeneralException(errorText("BANDWIDTH","LEAF_ID_NOT_FOUND")%leaf_id)
-        services=self.__getleafServicesObjs(leaf_id)
+    def __createLeafObj(self,leaf_info,services_infos):
+        services=map(self.__createLeafServicesObj,services_infos)
         return Leaf(leaf_info["leaf_id"],
                     leaf_info["leaf_name"],
                     leaf_info["parent_id"],
@@ -182,10 +171,6 @@ class BWLoader:
                     leaf_info["default_ceil_kbits"],
                     services)
 
-    def __getleafServicesObjs(self,leaf_id):
-        services_infos=self.__getLeafServicesDB(leaf_id)
-        return map(self.__createLeafServicesObj,services_infos)
-
     def __createLeafServicesObj(self,service_info):
         return LeafService(service_info["leaf_service_id"],service_info["leaf_id"],service_info["protocol"],service_info["filter"],service_info["rate_kbits"],service_info["ceil_kbits"])
     
@@ -196,11 +181,11 @@ class BWLoader:
         return db_main.getHandle().get("bw_leaf_services","leaf_id=%s"%leaf_id)
     ###########################################################
     def loadAllStaticIPs(self):
-        static_ip_ids=self.__getAllStaticIPIDs()
-        map(self.loadStaticIP,static_ip_ids)
+        for info in db_main.getHandle().get("bw_static_ip","",0,-1,"bw_static_ip_id"):
+            self.__keepStaticIP(self.__createStaticIPObj(info))
 
     def loadStaticIP(self,static_ip_id):
-        static_ip_obj=self.__createStaticIPObj(static_ip_id)
+        static_ip_obj=self.__createStaticIPObj(self.__getStaticIPInfo(static_ip_id))
         self.__keepStaticIP(static_ip_obj)
 
     def unloadStaticIP(self,static_ip_id):
@@ -218,16 +203,11 @@ class BWLoader:
         map(function,self.__static_ips_id.values())
 
 
-    def __getAllStaticIPIDs(self):
-        ids_db=db_main.getHandle().get("bw_static_ip","",0,-1,"bw_static_ip_id",["bw_static_ip_id"])
-        return map(lambda x:x["bw_static_ip_id"],ids_db)
-
     def __keepStaticIP(self,static_ip_obj):
         self.__static_ips_ip[static_ip_obj.getIP()]=static_ip_obj
         self.__static_ips_id[static_ip_obj.getStaticIPID()]=static_ip_obj
 
-    def __createStaticIPObj(self,static_ip_id):
-        info=self.__getStaticIPInfo(static_ip_id)
+    def __createStaticIPObj(self,info):
         return StaticIP(info["bw_static_ip_id"],info["ip"],info["transmit_leaf_id"],info["receive_leaf_id"])
 
     def __getStaticIPInfo(self,static_ip_id):
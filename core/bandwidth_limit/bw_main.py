@@ -1,5 +1,6 @@
 from core.server import handlers_manager
 from core.event import periodic_events
+from core.ibs_exceptions import *
 import signal
 
 
@@ -21,6 +22,9 @@ def init():
     global iptables
     from core.bandwidth_limit.iptables import IPTables
     iptables=IPTables()
+
+    global mark_runner
+    mark_runner=createMarkRunner()
     
     initTree()
 
@@ -55,6 +59,22 @@ def getMarkIDPool():
 def getIPTablesRunner():
     return iptables
 
+def getMarkRunner():
+    """
+        return runner that user leaves use to mark their packets, selected by defs.BW_MARK_BACKEND
+    """
+    return mark_runner
+
+def createMarkRunner():
+    from core import defs
+    if defs.BW_MARK_BACKEND=="ipset":
+        from core.bandwidth_limit.ipset import IPSet
+        return IPSet()
+    elif defs.BW_MARK_BACKEND!="iptables":
+        toLog("Unknown bandwidth mark backend %s, using iptables"%defs.BW_MARK_BACKEND,LOG_ERROR)
+
+    return getIPTablesRunner()
+
 def getManager():
     return manager
     
@@ -70,6 +90,7 @@ def registerInParents():
         getLoader().getAllLeafNames())
 
 def initTree():
+    getMarkRunner().resetSets()
     map(lambda interface_name:getLoader().getInterfaceByName(interface_name).createTree(),
         getLoader().getAllInterfaceNames())
 
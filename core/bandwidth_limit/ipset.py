@@ -0,0 +1,137 @@
+"""
+    ipset based packet marker
+"""
+from core import defs
+from core.ibs_exceptions import *
+from core.script_launcher import launcher_main
+from threading import RLock
+
+class IPSet:
+    """
+        Mark packets using one ipset per (leaf, direction, service). Each set is referenced by a single
+        iptables mangle rule which copies the mark stored with the matched set member (skbinfo) to the packet.
+        Adding or removing a user leaf mark is a single "ipset add"/"ipset del", so kernel classification
+        doesn't walk a rule per online user.
+
+        Same interface as IPTables, so it can be used as mark runner of user leaves
+    """
+    SET_PREFIX="IBSng_"
+
+    def __init__(self):
+        self.lock=RLock()
+        self.sets={} #set_name=>True, sets that has been created and has their iptables rule
+
+    def addMark(self,mark_id,ip_addr,direction,leaf_service,leaf_obj):
+        """
+            add "ip_addr" to set of "leaf_service" (or default set of leaf_obj if leaf_service is None), so packets
+            from "direction" of "ip_addr" will be marked with "mark_id"
+            mark_id(int): mark to set for packets
+            ip_addr(str): ip address of source or destination, depends on direction
+            direction(str): can be "send" or "receive"
+            leaf_service(LeafService instance or None): leaf service of the mark, None means leaf default
+            leaf_obj(Leaf instance): leaf that leaf_service belongs to
+        """
+        set_name=self.__getSetName(leaf_obj,direction,leaf_service)
+        if set_name not in self.sets:
+            self.__ensureLeafSets(leaf_obj,direction)
+        self.runIPSet("-exist add %s %s skbmark 0x%x"%(set_name,ip_addr,mark_id))
+
+    def delMark(self,mark_id,ip_addr,direction,leaf_service,leaf_obj):
+        """
+            delete "ip_addr" from set of "leaf_service", same arguments as addMark
+        """
+        self.runIPSet("-exist del %s %s"%(self.__getSetName(leaf_obj,direction,leaf_service),ip_addr))
+
+    def resetSets(self):
+        """
+            forget about created sets, sets and their rules will be recreated on next addMark.
+            Should be called when IBSng mangle chains are flushed (ex. tree recreation)
+        """
+        self.lock.acquire()
+        try:
+            self.sets={}
+        finally:
+            self.lock.release()
+
+    ###############################
+    def __ensureLeafSets(self,leaf_obj,direction):
+        """
+            create sets of leaf_obj for "direction" that are not created yet.
+            Default set is created before service sets, as iptables rules are appended and later
+            marks override previous ones, services take precedence over default
+        """
+        set_names=[(self.__getSetName(leaf_obj,direction,None),None)]
+        for leaf_service in leaf_obj.getServices():
+            set_names.append((self.__getSetName(leaf_obj,direction,leaf_service),leaf_service))
+
+        self.lock.acquire()
+        try:
+            for set_name,leaf_service in set_names:
+                if set_name not in self.sets:
+                    self.__createSet(set_name,direction,leaf_service)
+        finally:
+            self.lock.release()
+
+    def __createSet(self,set_name,direction,leaf_service):
+        self.runIPSet("-exist create %s hash:ip skbinfo"%set_name)
+        self.runIPSet("flush %s"%set_name)
+        bw_iptables=IPSetIPTablesRule()
+        bw_iptables.delRule(set_name,direction,leaf_service) #don't duplicate rule if it's already there
+        bw_iptables.addRule(set_name,direction,leaf_service)
+        self.sets[set_name]=True
+
+    def __getSetName(self,leaf_obj,direction,leaf_service):
+        """
+            return set name for leaf/direction/service. ipset names are limited to 31 characters
+        """
+        if leaf_service==None:
+            service_part="d"
+        else:
+            service_part=str(leaf_service.getLeafServiceID())
+        return "%s%s_%s_%s"%(self.SET_PREFIX,leaf_obj.getLeafID(),direction[0],service_part)
+
+    ###############################
+    def runIPSet(self,command):
+        ret_val=launcher_main.getLauncher().system(defs.BW_IPSET_COMMAND,command.split())
+        if ret_val!=0:
+            toLog("ipset command '%s %s' returned non zero value %s"%(defs.BW_IPSET_COMMAND,command,ret_val),LOG_DEBUG)
+
+class IPSetIPTablesRule:
+    """
+        iptables rule that maps marks from a set to packets
+    """
+    def addRule(self,set_name,direction,leaf_service):
+        self.__runIPTables("-t mangle -A %s %s -j SET --map-set %s %s --map-mark"%
+                            (self.__getChain(direction),self.__createCondition(set_name,direction,leaf_service),
+                             set_name,self.__getFlag(direction)))
+
+    def delRule(self,set_name,direction,leaf_service):
+        self.__runIPTables("-t mangle -D %s %s -j SET --map-set %s %s --map-mark"%
+                            (self.__getChain(direction),self.__createCondition(set_name,direction,leaf_service),
+                             set_name,self.__getFlag(direction)))
+
+    def __createCondition(self,set_name,direction,leaf_service):
+        cond="-m set --match-set %s %s "%(set_name,self.__getFlag(direction))
+        if leaf_service!=None:
+            protocol=leaf_service.getProtocol()
+            if protocol in ("udp","tcp"):
+                cond+=" -m multiport "
+            cond+=" -p %s --%s"%(protocol,leaf_service.getFilter())
+        return cond
+
+    def __getFlag(self,direction):
+        if direction=="send":
+            return "src"
+        else:
+            return "dst"
+
+    def __getChain(self,direction):
+        if direction=="send":
+            return "IBSng_PREROUTING"
+        else:
+            return "IBSng_POSTROUTING"
+
+    def __runIPTables(self,command):
+        ret_val=launcher_main.getLauncher().system(defs.BW_IPTABLES_COMMAND,command.split())
+        if ret_val!=0:
+            toLog("iptables command '%s %s' returned non zero value %s"%(defs.BW_IPTABLES_COMMAND,command,ret_val),LOG_DEBUG)
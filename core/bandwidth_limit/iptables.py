@@ -3,7 +3,7 @@ from core.ibs_exceptions import *
 from core.script_launcher import launcher_main
 
 class IPTables:
-    def addMark(self,mark_id,ip_addr,direction,leaf_service):
+    def addMark(self,mark_id,ip_addr,direction,leaf_service,leaf_obj=None):
         """
             add a rule to iptables mangle table to mark packets from "direction" of "ip_addr" with conditions 
             in leaf_service, with "mark_id"
@@ -13,17 +13,24 @@ class IPTables:
             leaf_service(Leaf instance or None): leaf service to create conditions
                                                  currently we just add protocol from leafservice
                                                  and filter should be in iptables syntax without -- prefix
+            leaf_obj(Leaf instance): leaf of user, not used here but needed by other mark runners
         """
         self.runIPTables("-t mangle -A %s %s -j MARK --set-mark %s"%
                             (self.__getChain(direction), self.__createCondition(ip_addr,direction,leaf_service),mark_id))
 
-    def delMark(self,mark_id,ip_addr,direction,leaf_service):
+    def delMark(self,mark_id,ip_addr,direction,leaf_service,leaf_obj=None):
         """
             delete a mark rule from iptables, same as addMark
         """
         self.runIPTables("-t mangle -D %s %s -j MARK --set-mark %s"%
                             (self.__getChain(direction), self.__createCondition(ip_addr,direction,leaf_service),mark_id))
 
+    def resetSets(self):
+        """
+            iptables runner doesn't keep any state, see IPSet.resetSets
+        """
+        pass
+
     def __createCondition(self,ip_addr,direction,leaf_service):
         if direction=="send":
             cond="-s"
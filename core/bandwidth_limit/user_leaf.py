@@ -116,7 +116,7 @@ class UserLeaf:
                                        "rate %skbit"%leaf_service.getRate(),
                                        "ceil %skbit"%leaf_service.getCeil(),
                                        "quantum 3000")
-        bw_main.getIPTablesRunner().addMark(mark_id,self.ip_addr,self.direction,leaf_service)
+        bw_main.getMarkRunner().addMark(mark_id,self.ip_addr,self.direction,leaf_service,self.getLeafObj())
         bw_main.getTCRunner().addFilter(self.getLeafObj().getInterfaceName(),
                                         "protocol ip",
                                         "prio 1",
@@ -139,7 +139,7 @@ class UserLeaf:
                                        "rate %skbit"%self.getLeafObj().getDefaultRate(),
                                        "ceil %skbit"%self.getLeafObj().getDefaultCeil(),
                                        "quantum 3000")
-        bw_main.getIPTablesRunner().addMark(mark_id,self.ip_addr,self.direction,None)
+        bw_main.getMarkRunner().addMark(mark_id,self.ip_addr,self.direction,None,self.getLeafObj())
         bw_main.getTCRunner().addFilter(self.getLeafObj().getInterfaceName(),
                                         "protocol ip",
                                         "prio 1",
@@ -200,4 +200,4 @@ class UserLeaf:
         bw_main.getMarkIDPool().freeID(self.service_marks+[self.default_mark])
 
     def __delMark(self,mark_id,leaf_service):
-        bw_main.getIPTablesRunner().delMark(mark_id,self.ip_addr,self.direction,leaf_service)
+        bw_main.getMarkRunner().delMark(mark_id,self.ip_addr,self.direction,leaf_service,self.getLeafObj())
@@ -5,6 +5,7 @@ from core import defs
 from core.errors import errorText
 from core.db import db_main
 from core.charge.user_charge import *
+from core.charge.rule_index import RuleIndex
 from core.admin import admin_main
 from core.ibs_exceptions import *
 from core.errors import errorText
@@ -120,6 +121,7 @@ class ChargeWithRules(Charge):
     def __init__(self,charge_id,name,comment,admin_id,visible_to_all,_type):
         Charge.__init__(self,charge_id,name,comment,admin_id,visible_to_all,_type)
         self.rules={} #{rule_id=>rule_obj}
+        self.compileRules()
 
     def getRules(self):
         return self.rules
@@ -175,19 +177,11 @@ class ChargeWithRules(Charge):
             return applicable rule for _time
             _time(int): epoch time in seconds
         """     
-        max_priority=-1
-        max_applicable_rule=None
-        
-        for rule_id in self.rules:
-            rule=self.rules[rule_id]
-            if rule.priority > max_priority and rule.appliable(user_obj,instance,_time):
-                max_priority=rule.priority
-                max_applicable_rule=rule
-                
-        if max_priority==-1:
+        rule=self.rule_index.getEffectiveRule(user_obj,instance,_time)
+        if rule==None:
             raise LoginException(errorText("USER_LOGIN","NO_APPLICABLE_RULE"))
 
-        return max_applicable_rule
+        return rule
         
     def getNextMoreApplicableRule(self,user_obj, instance):
         """
@@ -209,17 +203,7 @@ class ChargeWithRules(Charge):
             _time(long): seconds from epoch
         """
         
-        earliest_more_applicable_rule = None
-        secs=secondsFromMorning(_time)
-        
-        for rule_id in self.rules:
-            rule=self.rules[rule_id]
-            if rule.interval.containsDay(_time) and rule.interval > secs:
-                if rule.priority>cur_rule.priority and rule.anytimeAppliable(user_obj,instance):
-                    if earliest_more_applicable_rule==None or earliest_more_applicable_rule.interval > rule.interval:
-                        earliest_more_applicable_rule=rule
-                
-        return earliest_more_applicable_rule
+        return self.rule_index.getNextMoreApplicableRule(user_obj, instance, cur_rule, _time)
 
 
     def calcInstanceCreditUsage(self,user_obj,instance,round_result):
@@ -255,6 +239,13 @@ class ChargeWithRules(Charge):
             used for loading rules into this charge
         """
         self.rules=rules
+        self.compileRules()
+
+    def compileRules(self):
+        """
+            (re)compile rule index of this charge, should be called whenever rules of charge changes
+        """
+        self.rule_index=RuleIndex(self.rules)
 
     def checkConflict(self,new_charge_rule_obj,ignore_rule_ids=[]):
         """
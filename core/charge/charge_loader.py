@@ -6,12 +6,14 @@ from core.ibs_exceptions import *
 from core.errors import errorText
 from core.lib.time_lib import *
 from core.lib.day_of_week import *
+from core.lib.general import diffDics
 import threading
 
 class ChargeLoader:
     def __init__(self):
         self.charges_id={} #{charge_id=>charge_obj}
         self.charges_name={} #{charge_name=>charge_obj}
+        self.charge_infos={} #{charge_id=>(charge_info,rules)} of loaded charges, to find changed charges on reload
         self.rule_loader=ChargeRuleLoader(self)
     
     def __getitem__(self,key):
@@ -36,17 +38,51 @@ class ChargeLoader:
         """
             create a new charge object and all corresponding rules and put it in self.charges
         """
-        charge_obj=self.__createCharge(charge_id)
+        infos=self.__getChargesInfos("charge_id=%s"%charge_id)
+        try:
+            charge_info,rules=infos[charge_id]
+        except KeyError:
+            raise GeneralException(errorText("CHARGES","INVALID_CHARGE_ID")%charge_id)
+
+        charge_obj=self.__createCharge(charge_info,rules)
         self.charges_id[charge_id]=charge_obj
         self.charges_name[charge_obj.getChargeName()]=charge_obj
+        self.charge_infos[charge_id]=infos[charge_id]
 
     def loadAllCharges(self):
         """
             load all charges  from db and put em in self.charges
         """
-        charge_ids=self.__getAllChargeIDs()
-        for charge_id in charge_ids:
-            self.loadCharge(charge_id)
+        infos=self.__getChargesInfos("true")
+        for charge_id,(charge_info,rules) in infos.iteritems():
+            charge_obj=self.__createCharge(charge_info,rules)
+            self.charges_id[charge_id]=charge_obj
+            self.charges_name[charge_obj.getChargeName()]=charge_obj
+
+        self.charge_infos=infos
+
+    def reloadAllCharges(self):
+        """
+            reload charges from db, only charges that they or their rules have been changed are recreated.
+            New dics are built aside and replaced at once, so lookups see either old or new charges
+            return dic of "added","changed","removed" charge ids
+        """
+        infos=self.__getChargesInfos("true")
+        (added,changed,removed)=diffDics(self.charge_infos,infos)
+
+        charges_id=self.charges_id.copy()
+        charges_name=self.charges_name.copy()
+        for charge_id in changed+removed:
+            del(charges_name[charges_id[charge_id].getChargeName()])
+            del(charges_id[charge_id])
+
+        for charge_id in changed+added:
+            charge_obj=self.__createCharge(*infos[charge_id])
+            charges_id[charge_id]=charge_obj
+            charges_name[charge_obj.getChargeName()]=charge_obj
+
+        self.charges_id,self.charges_name,self.charge_infos=charges_id,charges_name,infos
+        return {"added":added,"changed":changed,"removed":removed}
     
     def unloadCharge(self,charge_id):
         """
@@ -55,6 +91,8 @@ class ChargeLoader:
         charge_obj=self.getChargeByID(charge_id)
         del(self.charges_id[charge_obj.getChargeID()])
         del(self.charges_name[charge_obj.getChargeName()])
+        if self.charge_infos.has_key(charge_id):
+            del(self.charge_infos[charge_id])
 
 
     def checkChargeID(self,charge_id):
@@ -92,15 +130,12 @@ class ChargeLoader:
     def getAllChargeNames(self):
         return self.charges_name.keys()
 
-    def __createCharge(self,charge_id):
+    def __createCharge(self,charge_info,rules):
         """
-            create and return a new charge object from charge_id information . it'll load all corresponding
-            rules into the object
+            create and return a new charge object from charge_info and rules returned by __getChargesInfos
         """
-        charge_info=self.__getChargeInfo(charge_id)
         charge_obj=self.__createChargeObject(charge_info)       
-        rules=self.rule_loader.loadChargeRules(charge_obj)
-        charge_obj.setRules(rules)
+        charge_obj.setRules(self.rule_loader.createChargeRules(charge_obj,rules))
         return charge_obj
 
         
@@ -112,77 +147,61 @@ class ChargeLoader:
         return klass(charge_info["charge_id"],charge_info["name"],charge_info["comment"],
                                charge_info["admin_id"],charge_info["visible_to_all"],charge_info["charge_type"])
         
-    def __getChargeInfo(self,charge_id):
+    def __getChargesInfos(self,condition):
         """
-            return a dic of charge properties or raise an exception on error
+            return a dic of {charge_id=>(charge_info,rules)} for charges matching "condition" on "charges" table
+            charge_info is a dic of charge properties
+            rules is a list of (rule_info,ports,day_of_weeks) of charge rules, sorted by charge_rule_id
+            each table is read in one query, for all charges
         """
-        try:
-            charge_info=db_main.getHandle().get("charges","charge_id=%s"%charge_id)[0]
-        except:
-            logException("ChargeLoader.getChargeInfo: error in getting charge information")
-            raise
-        
-        return charge_info
-    
-    def __getAllChargeIDs(self):
-        """
-            return a list of charge id's from database
-        """
-        charge_ids=db_main.getHandle().get("charges","true",0,-1,"",["charge_id"])
-        return [m["charge_id"] for m in charge_ids]
+        infos={}
+        rules_tables={}
+        for charge_info in db_main.getHandle().get("charges",condition):
+            infos[charge_info["charge_id"]]=(charge_info,[])
+            rules_tables[getRulesTable(charge_info["charge_type"])]=None
+
+        if not infos:
+            return infos
+
+        charge_ids_condition="charge_id in (select charge_id from charges where %s)"%condition
+        rules={} #{charge_rule_id=>(rule_info,ports,day_of_weeks)}
+        for rules_table in rules_tables:
+            for rule_info in db_main.getHandle().get(rules_table,charge_ids_condition,0,-1,"charge_rule_id"):
+                if infos.has_key(rule_info["charge_id"]):
+                    rules[rule_info["charge_rule_id"]]=(rule_info,[],[])
+                    infos[rule_info["charge_id"]][1].append(rules[rule_info["charge_rule_id"]])
+
+        #charge_rules is parent of internet and voip rule tables
+        rule_ids_condition="charge_rule_id in (select charge_rule_id from charge_rules where %s)"%charge_ids_condition
+        for _dic in db_main.getHandle().get("charge_rule_ports",rule_ids_condition,0,-1,"charge_rule_id,ras_port"):
+            if rules.has_key(_dic["charge_rule_id"]):
+                rules[_dic["charge_rule_id"]][1].append(_dic["ras_port"])
+
+        for _dic in db_main.getHandle().get("charge_rule_day_of_weeks",rule_ids_condition,0,-1,"charge_rule_id,day_of_week"):
+            if rules.has_key(_dic["charge_rule_id"]):
+                rules[_dic["charge_rule_id"]][2].append(_dic["day_of_week"])
+
+        return infos
 
 
 class ChargeRuleLoader:
     def __init__(self,charge_loader):
         self.charge_loader=charge_loader
 
-    def loadChargeRules(self,charge_obj):
+    def createChargeRules(self,charge_obj,rules):
         """
-            return a dic of rules of charge_id in format {charge_rule_id=>charge_rule_obj}
+            rules(list): list of (rule_info,ports,day_of_weeks) of charge rules
+            return a dic of rules of charge_obj in format {charge_rule_id=>charge_rule_obj}
         """
         rules_dic={}
-        rules=self.__getChargeRuleIDs(charge_obj)
-        for rule_info in rules:
-            ports=self.__getRulePorts(rule_info["charge_rule_id"])
-            day_of_weeks=self.__getDayOfWeeks(rule_info["charge_rule_id"])
-            day_of_week_container=apply(DayOfWeekIntContainer,day_of_weeks)
+        for rule_info,ports,day_of_weeks in rules:
+            day_of_week_container=apply(DayOfWeekIntContainer,map(DayOfWeekInt,day_of_weeks))
             rule_obj=self.__createChargeRuleObject(charge_obj,rule_info,day_of_week_container,ports)
             rules_dic[rule_obj.getRuleID()]=rule_obj
         return rules_dic
 
-
-    def __getChargeRuleIDs(self,charge_obj):
-        """
-            return a list of rules and their properties belongs to charge_id
-        """
-        rules_table=getRulesTable(charge_obj.getType())
-        return db_main.getHandle().get(rules_table,"charge_id=%s"%charge_obj.getChargeID())
-
-
     def __createChargeRuleObject(self,charge_obj,rule_info,day_of_weeks,ports):
         """
             create a charge rule object from rule_info dic and ports list
         """
         return getChargeRuleObjForType(charge_obj.getType(),rule_info,charge_obj,day_of_weeks,ports)
-
-    def __getRulePorts(self,charge_rule_id):
-        """
-            return a list of ports belongs to charge_rule_id
-        """
-        ports=db_main.getHandle().get("charge_rule_ports","charge_rule_id=%s"%charge_rule_id)
-        return [m["ras_port"] for m in ports]
-        
-
-    def __getDayOfWeeks(self,charge_rule_id):
-        """
-            return a list of DayOfWeekInt instances 
-        """
-        return map(DayOfWeekInt,self.__getDayOfWeeksDB(charge_rule_id))
-
-    def __getDayOfWeeksDB(self,charge_rule_id):
-        """
-            return a list of day of week integers belongs to charge_rule_id
-        """
-        dows=db_main.getHandle().get("charge_rule_day_of_weeks","charge_rule_id=%s"%charge_rule_id)
-        return [m["day_of_week"] for m in dows]
-        
\ No newline at end of file
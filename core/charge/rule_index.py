@@ -0,0 +1,99 @@
+from core.charge.charge_rule import ChargeRule
+from core.lib.time_lib import secondsFromMorning
+import bisect
+import time
+
+class RuleIndex:
+    """
+        Compiled index of charge rules, used to find effective rule and next more applicable rule without checking
+        all rules of charge.
+        Rules are kept in lists keyed by (day_of_week, ras_id, port), where ras_id and port may be ChargeRule.ALL.
+        Each list is sorted by start time of rules. Rules of one list doesn't overlap (checked by
+        ChargeWithRules.checkConflict), so the rule containing a time is found by binary search.
+        Priority of a rule is determined by whether its ras and port are wildcards, so all rules of a key have
+        same priority. Found rules are still checked with anytimeAppliable, as rule types may have
+        extra conditions (ex. voip rules need a prefix for called number)
+    """
+    def __init__(self,rules):
+        """
+            rules(dic): dic of rule_id=>rule_obj
+        """
+        self.index={} #(dow,ras_id,port)=>(list of start seconds, list of end seconds, list of rules)
+        self.__compile(rules.values())
+
+    def __compile(self,rules):
+        lists={}
+        for rule in rules:
+            if ChargeRule.ALL in rule.ports:
+                ports=[ChargeRule.ALL]
+            else:
+                ports=rule.ports
+
+            for dow in rule.getDows():
+                for port in ports:
+                    lists.setdefault((dow.getIntValue(),rule.ras_id,port),[]).append((rule.interval.getStartSeconds(),rule))
+
+        for key in lists:
+            rules_list=lists[key]
+            rules_list.sort(lambda x,y:cmp(x[0],y[0]))
+            self.index[key]=(map(lambda x:x[0],rules_list),
+                             map(lambda x:x[1].interval.getEndSeconds(),rules_list),
+                             map(lambda x:x[1],rules_list))
+
+    def __getCandidateLists(self,user_obj,instance,dow):
+        """
+            return lists of rules that may apply to instance of user on day "dow", in descending order of priority
+        """
+        (ras_id,port)=user_obj.getGlobalUniqueID(instance)
+        candidates=[]
+        for key in ((dow,ras_id,port),(dow,ras_id,ChargeRule.ALL),(dow,ChargeRule.ALL,port),(dow,ChargeRule.ALL,ChargeRule.ALL)):
+            if self.index.has_key(key):
+                candidates.append(self.index[key])
+        return candidates
+
+    def getEffectiveRule(self,user_obj,instance,_time):
+        """
+            return applicable rule with highest priority for _time, or None if no rule is applicable
+            this is same as checking ChargeRule.appliable of all rules
+        """
+        if secondsFromMorning(_time) == 23*3600+59*60+59:
+            _time += 1
+
+        return self.getEffectiveRuleForDay(user_obj,instance,time.localtime(_time)[6],secondsFromMorning(_time))
+
+    def getEffectiveRuleForDay(self,user_obj,instance,dow,secs):
+        """
+            same as getEffectiveRule, but time is given as day of week and seconds from morning
+        """
+        if secs == 23*3600+59*60+59:
+            dow,secs = (dow+1)%7,0
+
+        for starts,ends,rules in self.__getCandidateLists(user_obj,instance,dow):
+            _index=bisect.bisect_right(starts,secs)-1
+            if _index>=0 and ends[_index]>secs and rules[_index].anytimeAppliable(user_obj,instance):
+                return rules[_index]
+        return None
+
+    def getNextMoreApplicableRule(self,user_obj,instance,cur_rule,_time):
+        """
+            return rule with earliest end time in day of _time, that ends after _time and has more priority than
+            cur_rule, or None if there's no such rule
+        """
+        return self.getNextMoreApplicableRuleForDay(user_obj,instance,cur_rule,time.localtime(_time)[6],secondsFromMorning(_time))
+
+    def getNextMoreApplicableRuleForDay(self,user_obj,instance,cur_rule,dow,secs):
+        """
+            same as getNextMoreApplicableRule, but time is given as day of week and seconds from morning
+        """
+        earliest_rule=None
+        for starts,ends,rules in self.__getCandidateLists(user_obj,instance,dow):
+            if rules[0].priority<=cur_rule.priority:
+                break
+
+            for _index in xrange(bisect.bisect_right(ends,secs),len(rules)):
+                if earliest_rule!=None and not earliest_rule.interval > rules[_index].interval:
+                    break
+                if rules[_index].anytimeAppliable(user_obj,instance):
+                    earliest_rule=rules[_index]
+                    break
+        return earliest_rule
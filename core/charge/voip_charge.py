@@ -2,6 +2,7 @@ from core.charge.charge import ChargeWithRules
 from core.ibs_exceptions import *
 from core.errors import errorText
 from core.user.can_stay_online_result import CanStayOnlineResult
+from core.charge.voip_remaining_time import VoipRemainingTime
 from core.lib.time_lib import *
 import time
 
@@ -9,6 +10,10 @@ CHARGE_DEBUG=False
 
 class VoipCharge(ChargeWithRules): 
 
+    def compileRules(self):
+        ChargeWithRules.compileRules(self)
+        self.remaining_time=VoipRemainingTime(self)
+
     def checkLimits(self,user_obj,before_start_accounting=False):
         """
             Check Limits and return a CanStayOnlineResult
@@ -38,6 +43,25 @@ class VoipCharge(ChargeWithRules):
             toLog("Playing Dic: %s"%playing, LOG_DEBUG)
         #playing instances, those who have accounting started
         
+        if before_start_accounting and len(playing)==1 and self.remaining_time.canCalc(start):
+            instance=playing.keys()[0]
+            remaining_time=self.remaining_time.calcRemainingTime(user_obj,instance,credit,start,
+                                                                 playing[instance]["call_start_time"],
+                                                                 playing[instance]["call_start_prefix"].getFreeSeconds())
+        else:
+            remaining_time=self._simulateRemainingTime(user_obj,before_start_accounting,result,playing,credit,start)
+
+        if int(remaining_time) <= 0 and before_start_accounting:
+            raise LoginException(errorText("USER_LOGIN","CREDIT_FINISHED"))
+        else:
+            result.newRemainingTime(remaining_time)
+            return result
+
+    def _simulateRemainingTime(self,user_obj,before_start_accounting,result,playing,credit,start):
+        """
+            simulate charging of playing instances from "start" and return remaining time
+            instances without effective rule are added to result
+        """
         remaining_time = 0
         first_iter = True #is this the first iteration? first iteration is important because it examines current state of user
         break_loop = False
@@ -146,11 +170,7 @@ class VoipCharge(ChargeWithRules):
 
     
         #end while
-        if int(remaining_time) <= 0 and before_start_accounting:
-            raise LoginException(errorText("USER_LOGIN","CREDIT_FINISHED"))
-        else:
-            result.newRemainingTime(remaining_time)
-            return result
+        return remaining_time
 
 
     ###########################################################
@@ -0,0 +1,198 @@
+from core.charge.voip_tariff import tariff_main
+from core.lib.time_lib import secondsFromMorning
+from core import defs
+import threading
+import calendar
+import bisect
+import time
+
+MAX_REMAINING_TIME=7 * 24 * 3600 #same as VoipCharge.checkLimits, who can talk for one week?
+DAY_SECONDS=24 * 3600
+
+class RuleChain:
+    """
+        Piecewise linear cost function of a profile, starting from a (day_of_week, seconds_from_morning) node.
+        Each piece is a step of VoipCharge.checkLimits simulation, that ends on a rule change.
+        offsets[k] and costs[k] are seconds and credit from start of chain to start of piece k
+    """
+    def __init__(self):
+        self.offsets=[0]
+        self.costs=[0.0]
+        self.rates=[] #credit usage per second of pieces
+        self.raws=[] #seconds to next rule change of pieces, before rounding up to one second
+
+    def addPiece(self,rate,raw,step):
+        self.rates.append(rate)
+        self.raws.append(raw)
+        self.offsets.append(self.offsets[-1]+step)
+        self.costs.append(self.costs[-1]+rate*step)
+
+    def solve(self,credit,elapsed):
+        """
+            return remaining time when call is in this chain with "credit" and "elapsed" seconds passed
+            from start of calculation. Piece that credit finishes in is found by binary search on cumulative
+            cost, and finish time in the piece is credit left divided by its rate
+        """
+        pieces=len(self.rates)
+        credit_piece=bisect.bisect_left(self.costs,credit)-1 #piece which credit finishes in
+        time_piece=bisect.bisect_right(self.offsets,MAX_REMAINING_TIME-elapsed)-1 #piece which passes maximum time
+        piece=min(credit_piece,time_piece)
+
+        if piece>=pieces: #no applicable rule at end of chain
+            return elapsed+self.offsets[pieces]
+
+        if piece==credit_piece:
+            credit_finish_time=(credit-self.costs[piece])/self.rates[piece]
+            return elapsed+self.offsets[piece]+max(1,min(self.raws[piece],credit_finish_time))
+
+        return elapsed+self.offsets[piece+1]
+
+class CostProfile:
+    """
+        Cost profile of a call on a charge, all calls with same ras, port and prefixes share a profile.
+        Keeps chains of rule changes, keyed by (day_of_week, seconds_from_morning) of chain start
+    """
+    def __init__(self):
+        self.chains={}
+
+class VoipRemainingTime:
+    """
+        Calculate remaining time of a voip call before start accounting, same as simulation of
+        VoipCharge.checkLimits, but rule changes of the week are precomputed per cost profile and
+        credit finish time is found by binary search on cumulative cost.
+        Only usable for one instance and when local time offset doesn't change in next week
+    """
+    def __init__(self,charge_obj):
+        self.charge_obj=charge_obj
+        self.profiles={} #profile key=>CostProfile
+        self.lock=threading.Lock()
+
+        self.ras_ids={}
+        self.ports={}
+        self.tariff_ids={}
+        for rule in charge_obj.getRules().itervalues():
+            self.ras_ids[rule.getRasID()]=True
+            for port in rule.getPorts():
+                self.ports[port]=True
+            self.tariff_ids[rule.tariff_id]=True
+
+    def canCalc(self,_time):
+        """
+            return True if local time offset is same for the whole week after _time
+        """
+        return self.__getUTCOffset(_time)==self.__getUTCOffset(_time+MAX_REMAINING_TIME+2*DAY_SECONDS)
+
+    def __getUTCOffset(self,_time):
+        return calendar.timegm(time.localtime(_time))-int(_time)
+
+    def calcRemainingTime(self,user_obj,instance,credit,start,call_start_time,free_seconds):
+        """
+            return remaining time of "instance" of user_obj, starting from "start"
+            credit(float): current credit of user
+            call_start_time(float): start time of call, used for free seconds
+            free_seconds(int): free seconds of prefix at call start
+        """
+        profile=self.__getProfile(user_obj,instance)
+        remaining_time=0
+
+        while start-call_start_time<free_seconds: #free seconds, no credit is used
+            rule,rate,raw=self.__getRuleChange(user_obj,instance,time.localtime(start)[6],secondsFromMorning(start))
+            if rule==None:
+                return remaining_time
+            next_event=max(1,min(raw,free_seconds-(start-call_start_time)))
+            remaining_time+=next_event
+            if remaining_time>MAX_REMAINING_TIME:
+                return remaining_time
+            start+=next_event
+
+        #first step starts on an arbitrary second, so it's not kept in chains
+        dow,secs=time.localtime(start)[6],secondsFromMorning(start)
+        rule,rate,raw=self.__getRuleChange(user_obj,instance,dow,secs)
+        if rule==None:
+            return remaining_time
+
+        credit_finish_time=defs.MAXLONG
+        if rate:
+            credit_finish_time=credit/rate
+        next_event=max(1,min(raw,credit_finish_time))
+        credit-=next_event*rate
+        remaining_time+=next_event
+        if credit<=0 or next_event==credit_finish_time or remaining_time>MAX_REMAINING_TIME:
+            return remaining_time
+
+        dow,secs=self.__addSeconds(dow,secs,next_event)
+        return self.__getChain(profile,user_obj,instance,dow,secs).solve(credit,remaining_time)
+
+    ########################################
+    def __getProfile(self,user_obj,instance):
+        """
+            return cost profile of instance. Ras and port that no rule uses are all the same for rules, also
+            prefix objects are part of key, so profiles are not used after tariff changes
+        """
+        ras_id,port=user_obj.getGlobalUniqueID(instance)
+        if not self.ras_ids.has_key(ras_id):
+            ras_id=None
+        if not self.ports.has_key(port):
+            port=None
+
+        called_number=user_obj.getTypeObj().getCalledNumber(instance)
+        prefixes=[]
+        for tariff_id in self.tariff_ids:
+            prefixes.append(tariff_main.getLoader().getTariffByID(tariff_id).findPrefix(called_number))
+        key=(ras_id,port,tuple(prefixes))
+
+        self.lock.acquire()
+        try:
+            try:
+                return self.profiles[key]
+            except KeyError:
+                if len(self.profiles)>=defs.VOIP_REMAINING_TIME_PROFILES:
+                    self.profiles={}
+                self.profiles[key]=CostProfile()
+                return self.profiles[key]
+        finally:
+            self.lock.release()
+
+    def __getChain(self,profile,user_obj,instance,dow,secs):
+        try:
+            return profile.chains[(dow,secs)]
+        except KeyError:
+            chain=self.__createChain(user_obj,instance,dow,secs)
+            profile.chains[(dow,secs)]=chain
+            return chain
+
+    def __createChain(self,user_obj,instance,dow,secs):
+        chain=RuleChain()
+        while chain.offsets[-1]<=MAX_REMAINING_TIME:
+            rule,rate,raw=self.__getRuleChange(user_obj,instance,dow,secs)
+            if rule==None:
+                break
+            step=max(1,raw)
+            chain.addPiece(rate,raw,step)
+            dow,secs=self.__addSeconds(dow,secs,step)
+        return chain
+
+    def __getRuleChange(self,user_obj,instance,dow,secs):
+        """
+            return (effective_rule,credit usage per second,seconds until rule change) for dow and secs
+            effective_rule is None if there's no applicable rule
+        """
+        rule_index=self.charge_obj.rule_index
+        effective_rule=rule_index.getEffectiveRuleForDay(user_obj,instance,dow,secs)
+        if effective_rule==None:
+            return (None,0,0)
+
+        raw=effective_rule.interval.getEndSeconds()-secs+1
+        if effective_rule.priority<3:
+            next_more_applicable_rule=rule_index.getNextMoreApplicableRuleForDay(user_obj,instance,effective_rule,dow,secs)
+            if next_more_applicable_rule!=None:
+                raw=min(raw,next_more_applicable_rule.interval.getStartSeconds()-secs)
+
+        return (effective_rule,effective_rule.getPrefixObj(user_obj,instance,False).getCPM()/60.0,raw)
+
+    def __addSeconds(self,dow,secs,seconds):
+        secs+=seconds
+        while secs>=DAY_SECONDS:
+            secs-=DAY_SECONDS
+            dow=(dow+1)%7
+        return dow,secs
@@ -1,6 +1,7 @@
 from core.lib.sort import SortedList
 from core.ibs_exceptions import *
 from core.errors import errorText
+import threading
 import re
 
 class Tariff:
@@ -14,12 +15,65 @@ class Tariff:
         self.comment=comment
         self.prefixes_code={} #prefix_code=>obj
         self.prefixes_id={} #prefix_id=>obj
-        self.__addPrefixes(prefixes)
+        self.code_lengths={} #length of code=>number of codes with this length
+        self.lengths=[] #lengths of codes, in descending order. Used by findPrefix
+        self.lock=threading.Lock() #serializes changes of prefixes
+        self.setPrefixes(prefixes)
         
-    def __addPrefixes(self,prefixes):
-        for prefix in prefixes:
-            self.prefixes_code[prefix.getPrefixCode()]=prefix
-            self.prefixes_id[prefix.getPrefixID()]=prefix
+    def __addPrefix(self,prefixes_code,prefixes_id,code_lengths,prefix):
+        prefixes_code[prefix.getPrefixCode()]=prefix
+        prefixes_id[prefix.getPrefixID()]=prefix
+        code_len=len(prefix.getPrefixCode())
+        code_lengths[code_len]=code_lengths.get(code_len,0)+1
+
+    def __delPrefix(self,prefixes_code,prefixes_id,code_lengths,prefix):
+        del(prefixes_code[prefix.getPrefixCode()])
+        del(prefixes_id[prefix.getPrefixID()])
+        code_len=len(prefix.getPrefixCode())
+        code_lengths[code_len]-=1
+        if not code_lengths[code_len]:
+            del(code_lengths[code_len])
+
+    def __replacePrefixes(self,prefixes_code,prefixes_id,code_lengths):
+        """
+            replace dics of tariff with new ones. Dics are never changed after they're set, so readers
+            like findPrefix always see either old or new prefixes, without locking
+        """
+        lengths=code_lengths.keys()
+        lengths.sort()
+        lengths.reverse()
+        self.prefixes_code,self.prefixes_id,self.code_lengths,self.lengths=prefixes_code,prefixes_id,code_lengths,lengths
+
+    ###################################
+    def setPrefixes(self,prefixes):
+        """
+            add prefixes to tariff. Prefixes that already exists (with same prefix id) are replaced
+            prefixes(list of Prefix instances): new or updated prefixes
+        """
+        self.lock.acquire()
+        try:
+            prefixes_code,prefixes_id,code_lengths=self.prefixes_code.copy(),self.prefixes_id.copy(),self.code_lengths.copy()
+            for prefix in prefixes:
+                if prefixes_id.has_key(prefix.getPrefixID()):
+                    self.__delPrefix(prefixes_code,prefixes_id,code_lengths,prefixes_id[prefix.getPrefixID()])
+                self.__addPrefix(prefixes_code,prefixes_id,code_lengths,prefix)
+            self.__replacePrefixes(prefixes_code,prefixes_id,code_lengths)
+        finally:
+            self.lock.release()
+
+    def delPrefixes(self,prefix_codes):
+        """
+            delete prefixes with code in "prefix_codes" from tariff, codes that doesn't exist are ignored
+        """
+        self.lock.acquire()
+        try:
+            prefixes_code,prefixes_id,code_lengths=self.prefixes_code.copy(),self.prefixes_id.copy(),self.code_lengths.copy()
+            for code in prefix_codes:
+                if prefixes_code.has_key(code):
+                    self.__delPrefix(prefixes_code,prefixes_id,code_lengths,prefixes_code[code])
+            self.__replacePrefixes(prefixes_code,prefixes_id,code_lengths)
+        finally:
+            self.lock.release()
     
     ###################################
     def getTariffID(self):
@@ -87,19 +141,17 @@ class Tariff:
         """
             find and return Prefix Object for called_number. Prefix is selected using longest match algorithm.
             return None if called_number has no defined prefix
-            XXX: using sequential search!
-        """
-        longest_len=0
-        longest_code=""
-        for code in self.prefixes_code.iterkeys():
-            if called_number.startswith(code) and len(code)>longest_len:
-                longest_len=len(code)
-                longest_code=code
-    
-        if longest_len:
-            return self.getPrefixByCode(longest_code)
-        else:
-            return None
+            Only one dictionary lookup is done for each distinct length of codes, longest first
+        """
+        prefixes_code=self.prefixes_code
+        called_len=len(called_number)
+        for code_len in self.lengths:
+            if 0<code_len<=called_len:
+                try:
+                    return prefixes_code[called_number[:code_len]]
+                except KeyError:
+                    pass
+        return None
             
         
 class Prefix:
@@ -122,7 +122,7 @@ class TariffActions:
         tariff_obj=tariff_main.getLoader().getTariffByName(tariff_name)
         prefix_ids=map(lambda x:self.__getNewPrefixID(),xrange(len(prefix_codes)))
         self.__addPrefixDB(tariff_obj.getTariffID(),prefix_ids,prefix_codes,prefix_names,cpms,free_seconds,min_durations,round_tos,min_chargable_durations)
-        tariff_main.getLoader().loadTariffByID(tariff_obj.getTariffID())
+        tariff_main.getLoader().loadPrefixesByID(tariff_obj.getTariffID(),prefix_ids)
         return {"errs":[],"success":True}
 
     def __addPrefixCheckInput(self,tariff_name,prefix_codes,prefix_names,cpms,free_seconds,min_durations,round_tos,min_chargable_durations):
@@ -233,7 +233,7 @@ class TariffActions:
         self.__updatePrefixCheckInput(tariff_name,prefix_id,prefix_code,prefix_name,cpm,free_second,min_duration,round_to,min_chargable_duration)
         tariff_obj=tariff_main.getLoader().getTariffByName(tariff_name)
         self.__updatePrefixDB(tariff_obj.getTariffID(),prefix_id,prefix_code,prefix_name,cpm,free_second,min_duration,round_to,min_chargable_duration)
-        tariff_main.getLoader().loadTariffByID(tariff_obj.getTariffID())
+        tariff_main.getLoader().loadPrefixesByID(tariff_obj.getTariffID(),[prefix_id])
 
     def __updatePrefixCheckInput(self,tariff_name,prefix_id,prefix_code,prefix_name,cpm,free_second,min_duration,round_to,min_chargable_duration):
         tariff_obj=tariff_main.getLoader().getTariffByName(tariff_name)
@@ -269,7 +269,7 @@ class TariffActions:
         self.__delPrefixCheckInput(tariff_name,prefix_codes)
         tariff_obj=tariff_main.getLoader().getTariffByName(tariff_name)
         self.__delPrefixDB(tariff_obj.getTariffID(),prefix_codes)
-        tariff_main.getLoader().loadTariffByID(tariff_obj.getTariffID())
+        tariff_obj.delPrefixes(prefix_codes)
 
     def __delPrefixCheckInput(self,tariff_name,prefix_codes):
         tariff_obj=tariff_main.getLoader().getTariffByName(tariff_name)
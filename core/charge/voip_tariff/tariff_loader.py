@@ -53,8 +53,23 @@ class TariffLoader:
             raise GeneralException(errorText("VOIP_TARIFF","TARIFF_ID_DOESNT_EXISTS"))
         return info_db[0]
     ###############################
+    def loadPrefixesByID(self,tariff_id,prefix_ids):
+        """
+            load prefixes with ids in "prefix_ids" from database into tariff, without reloading whole tariff
+        """
+        if not prefix_ids:
+            return
+        prefixes=self.__getPrefixesByIDDB(tariff_id,prefix_ids)
+        self.getTariffByID(tariff_id).setPrefixes(self.__createPrefixObjsFromDics(prefixes))
+
+    def __getPrefixesByIDDB(self,tariff_id,prefix_ids):
+        return db_main.getHandle().get("tariff_prefix_list",
+                                       "tariff_id=%s and prefix_id in (%s)"%(tariff_id,",".join(map(str,prefix_ids))))
+    ###############################
     def __createPrefixObjs(self,tariff_id):
-        prefixes=self.__getPrefixesDB(tariff_id)
+        return self.__createPrefixObjsFromDics(self.__getPrefixesDB(tariff_id))
+
+    def __createPrefixObjsFromDics(self,prefixes):
         return map(lambda dic:Prefix(dic["prefix_id"],
                                      dic["prefix_code"],
                                      dic["prefix_name"],
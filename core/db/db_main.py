@@ -1,4 +1,6 @@
 from core.db import dbpool
+from core.ibs_exceptions import *
+import threading
 
 class DBHandleQuery:
     def __init__(self,dedicate_handle=False):
@@ -43,6 +45,23 @@ class DBHandleQuery:
         dbpool.getPool().release(self.__handle)
         self.__handle=None
         
+class TransactionHandleQuery(DBHandleQuery):
+    """
+        dedicated handle of a transaction that spans multiple queries of a thread. IBSQueries and transaction
+        queries run without their own BEGIN and COMMIT, so they're committed or rolled back with the transaction
+    """
+    def __init__(self):
+        DBHandleQuery.__init__(self,True)
+        self.end_methods=[] #methods that are called with "committed" flag when transaction ends
+
+    def runIBSQuery(self,ibs_query):
+        for query in ibs_query:
+            self.query(query)
+
+    def transactionQuery(self,query):
+        return self.query(query)
+
+thread_transactions=threading.local()
     
 def init():
     dbpool.initPool()
@@ -62,8 +81,69 @@ def shutdown():
     dbpool.getPool().close()
 
 def getHandle(dedicated=False):
+    """
+        return a db handle. If current thread started a transaction, its handle is returned for non dedicated
+        handles, so queries run in the transaction
+    """
+    transaction=getattr(thread_transactions,"handle",None)
+    if transaction!=None and not dedicated:
+        return transaction
     return DBHandleQuery(dedicated)
 
+def beginTransaction():
+    """
+        start a transaction for current thread, next queries of thread run in it until endTransaction is called
+    """
+    if getattr(thread_transactions,"handle",None)!=None:
+        raise DBException("Transaction already started")
+
+    handle=TransactionHandleQuery()
+    try:
+        handle.query("BEGIN;")
+    except:
+        handle.releaseHandle()
+        raise
+    thread_transactions.handle=handle
+
+def endTransaction(commit):
+    """
+        commit or roll back transaction of current thread, and call methods registered by onTransactionEnd
+        return True if transaction committed, if commit failed, DBException is raised after end methods are called
+    """
+    handle=thread_transactions.handle
+    thread_transactions.handle=None
+    committed=False
+    try:
+        try:
+            if commit:
+                handle.query("COMMIT;")
+                committed=True
+            else:
+                handle.query("ROLLBACK;")
+        except:
+            try:
+                handle.query("ROLLBACK;")
+            except:
+                pass
+            raise
+    finally:
+        handle.releaseHandle()
+        for method in handle.end_methods:
+            try:
+                method(committed)
+            except:
+                logException(LOG_ERROR,"endTransaction")
+    return committed
+
+def onTransactionEnd(method):
+    """
+        call method with "committed" flag after transaction of current thread ends. Used to fix in memory
+        objects that changed with queries of transaction. Does nothing if thread has no transaction
+    """
+    transaction=getattr(thread_transactions,"handle",None)
+    if transaction!=None:
+        transaction.end_methods.append(method)
+
 def vacuumDB():
     getHandle().query("vacuum analyze")
     
\ No newline at end of file
@@ -2,6 +2,9 @@ import types
 from core.ibs_exceptions import *
 from core.db.db_result_wrapper import *
 from core import defs
+from core.stats import histogram
+
+query_time_histogram=histogram.getHistogram("db_query_time")
 
 class ibs_db: #abstract parent class for all db implementions. Children must implement esp. query and connect 
     def __init__(self,dbname,host,port,user,password):
@@ -56,7 +59,9 @@ class ibs_db: #abstract parent class for all db implementions. Children must imp
             result=self._runQueryDB(query)
             return result
         finally:
-            self._logQuery(query, time.time()-start)
+            query_time=time.time()-start
+            query_time_histogram.observe(query_time)
+            self._logQuery(query, query_time)
 
     def _runQueryDB(self, query):
         """
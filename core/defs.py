@@ -11,10 +11,18 @@ DEBUG_LEVEL=3 #debug level
 
 LOG_RADIUS_REQUESTS=True #LOG radius requests in /var/log/IBSng/ibs_radius.log
 LOG_RADIUS_RESPONSES=True #LOG radius responses in /var/log/IBSng/ibs_radius.log
+LOG_RADIUS_NAS_IPS=[] #only log radius packets of these nas ips, empty list means all
+LOG_RADIUS_USERNAMES=[] #only log radius packets with these User-Name values, empty list means all
+LOG_RADIUS_SAMPLE_RATE=1 #log one of each LOG_RADIUS_SAMPLE_RATE radius requests (and their responses)
 
 LOG_SERVER_REQUESTS=True #LOG server requests in /var/log/IBSng/ibs_server.log, Normally not useful
 LOG_DATABASE_QUERIES=True #LOG every query we send to database
 LOG_EVENTS=False #LOG every event that event schedueler runs
+TRACE_RADIUS_REQUESTS=True #time stages of radius requests, for auth_stage_* and acct_stage_* statistics and slow request log
+SLOW_REQUEST_TIME=1.0 #log timeline of traced requests taking more seconds than this in /var/log/IBSng/ibs_slow.log, 0 disables
+LOG_ASYNC=True #write debug, radius, server and query logs from writer threads, instead of writing in each logging thread
+LOG_BUFFER_SIZE=100000 #maximum number of log records waiting for writer thread of a log file, more records are dropped
+LOG_FLUSH_INTERVAL=1 #seconds writer thread of a log file collects records before writing them
 
 IBS_ROOT="/usr/local/IBSng"
 IBS_CORE="%s/core"%IBS_ROOT
@@ -33,9 +41,61 @@ MAX_SERVER_THREADS=4
 MAX_EVENT_THREADS=4
 MAX_OTHER_THREADS=6
 MAX_RADIUS_THREADS=5
+MAX_SNMP_THREADS=2 #threads that run callbacks of snmp engine walks
 THREAD_POOL_MAX_SIZE=30
 THREAD_POOL_MAX_RELEASE_TIME=600
 
+#######  SCRIPT LAUNCHER
+SCRIPT_LAUNCHER_DAEMON=False #run external scripts through a long lived helper process instead of shell + script_wrapper per call
+SCRIPT_LAUNCHER_DAEMON_JOBS=8 #number of scripts launcher daemon runs concurrently
+
+#######  SNMP ENGINE
+SNMP_ENGINE_MAX_REPETITIONS=25 #GETBULK max-repetitions for snmp v2c walks
+SNMP_ENGINE_DEVICE_MAX_OUTSTANDING=2 #maximum concurrent walks on one device
+SNMP_ENGINE_DEVICE_MIN_INTERVAL=0.01 #minimum seconds between two packets sent to one device
+SNMP_ENGINE_DEVICE_MAX_QUEUE=50 #maximum waiting walks of one device, more walks fail immediately
+
+#######  RAS UPDATE SCHEDULER
+RAS_UPDATE_SCHEDULER_TICK=1 #seconds between checks for due ras updates
+RAS_UPDATE_JITTER=0.1 #ras updates are shifted randomly up to this fraction of their interval
+RAS_UPDATE_BUDGET=1.0 #updates that take longer than this fraction of their interval are backed off
+RAS_UPDATE_MAX_BACKOFF=8 #maximum multiplier of interval for failing updates
+
+#######  VOIP CHARGE
+VOIP_REMAINING_TIME_PROFILES=1000 #maximum number of cached cost profiles of each voip charge
+
+#######  SERVER
+SERVER_RESPONSE_CACHE=True #cache responses of handler methods that registered with a cache ttl
+SERVER_RESPONSE_CACHE_SIZE=1000 #maximum number of cached responses
+SERVER_KEEPALIVE_TIMEOUT=60 #seconds an idle client connection is kept open
+SERVER_MAX_HEADER_SIZE=65536 #maximum size of http headers of a request in bytes
+SERVER_MAX_REQUEST_SIZE=64*1024*1024 #maximum size of a request body in bytes
+SERVER_AUTH_CACHE_SIZE=1000 #maximum number of recently verified passwords, kept to avoid md5 crypt on each request
+SERVER_SESSION_TTL=8*3600 #seconds a session token, returned by login.createSession, is valid
+
+#######  STATISTICS
+METRICS_SERVER_ENABLED=True #serve statistics and histograms in prometheus text format on http://METRICS_SERVER_IP:METRICS_SERVER_PORT/metrics
+METRICS_SERVER_IP="127.0.0.1"
+METRICS_SERVER_PORT=1236
+PROFILER_MAX_DURATION=600 #maximum seconds of a sampling profile, started by util.startProfiler
+PROFILER_MAX_SAMPLE_RATE=1000 #maximum samples per second of sampling profiler
+
+#######  ONLINE SESSIONS
+ONLINE_SESSIONS_PERSIST=True #keep state of online sessions in ONLINE_SESSIONS_FILE, and restore them on start
+ONLINE_SESSIONS_FILE="/var/lib/IBSng/online_sessions.journal"
+ONLINE_SESSIONS_SNAPSHOT_INTERVAL=60 #seconds between snapshots of all online sessions, journal is compacted on each snapshot
+ONLINE_SESSIONS_FLUSH_INTERVAL=1 #seconds between writes of buffered session changes to journal
+ONLINE_SESSIONS_MAX_AGE=900 #don't restore sessions if journal hasn't been written for this many seconds
+ONLINE_SESSIONS_KEEP_ON_SHUTDOWN=False #if users are not killed on shutdown, keep them in journal instead of clearing them.
+                                       #usage of kept sessions that can't be restored on next start is not committed
+
+#######  STARTUP
+PARALLEL_INIT=True #initialize independent modules concurrently on start, each module starts after modules it depends on
+
+#######  BANDWIDTH LIMIT
+BW_MARK_BACKEND="iptables" #"iptables": one mangle rule per user ip, "ipset": one ipset per leaf, user ips are set members
+BW_IPSET_COMMAND="ipset"
+
 MAXLONG=0x7fffffff
 
 def init():
@@ -32,7 +32,11 @@ GENERAL_ERRORS={
     "INVALID_ORDER_BY":"Invalid Order By value %s",
     "INVALID_MAC_ADDRESS":"Mac Address %s is invalid",
     "INVALID_CALLER_ID_PATTERN":"Caller ID pattern %s is invalid",
-    "INVALID_RADIUS_TIME":"Radius time %s is invalid"
+    "INVALID_RADIUS_TIME":"Radius time %s is invalid",
+    "INVALID_ATOMIC_METHOD":"Method %s can't be called in an atomic multicall",
+    "TRANSACTION_ROLLED_BACK":"Transaction rolled back, because a call of multicall failed",
+    "INVALID_SESSION":"Invalid session token",
+    "SESSION_EXPIRED":"Session expired, please login again"
     
 }
 
@@ -329,7 +333,9 @@ PLUGIN_ERRORS={
 REPORT_ERRORS={
     "INVALID_CLEAN_TABLE":"Table %s is not available for cleaning",
     "INVALID_AUTO_CLEAN_TABLE_DATE":"Auto clean date %s for table %s is invalid",
-    "INVALID_SNAPSHOT_NAME":"Invalid Snapshot name %s"
+    "INVALID_SNAPSHOT_NAME":"Invalid Snapshot name %s",
+    "INVALID_CURSOR":"Invalid report cursor %s",
+    "CURSOR_NEEDS_LOGIN_TIME_ORDER":"Report cursor can be used only when sorting by login time"
 }
 
 MESSAGE_ERRORS={
@@ -343,6 +349,12 @@ IAS_ERRORS={
     "INVALID_EVENT_ID":"Invalid Event ID"
 }
 
+UTIL_ERRORS={
+    "PROFILER_IS_RUNNING":"Profiler is already running",
+    "INVALID_PROFILE_DURATION":"Profile duration should be between 1 and %s seconds",
+    "INVALID_PROFILE_SAMPLE_RATE":"Profile sample rate should be between 1 and %s samples per second"
+}
+
 def errorText(event,error,add_error_key=True):
     """
         return "error" text representation in "event"
@@ -373,7 +385,8 @@ def errorText(event,error,add_error_key=True):
                    "VOIP_TARIFF":VOIP_TARIFF_ERRORS,
                    "REPORTS":REPORT_ERRORS,
                    "MESSAGES":MESSAGE_ERRORS,
-                   "IAS":IAS_ERRORS
+                   "IAS":IAS_ERRORS,
+                   "UTIL":UTIL_ERRORS
                   }
                    
         err_str=error_map[event][error]
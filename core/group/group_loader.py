@@ -8,6 +8,8 @@ class GroupLoader:
     def __init__(self):
         self.groups_name={}
         self.groups_id={}
+        self.version=0 #increased on every load/unload, so users can invalidate their merged attributes
+        self.group_infos={} #group_id=>(group_info,group_attrs) of loaded groups, to find changed groups on reload
 
     def __getitem__(self,key):
         if isInt(key):
@@ -48,10 +50,13 @@ class GroupLoader:
         """
             load group with id "group_id"
         """
-        (group_id,group_name,comment,owner_id)=self.__getGroupInfoDB(group_id)
-        group_attrs=self.__getGroupAttrs(group_id)
-        group_obj=self.__createGroupObj(group_id,group_name,comment,owner_id,group_attrs)
-        self.__addInternal(group_obj)
+        group_id=to_int(group_id,"group id")
+        infos=self.__getGroupsInfos("group_id=%s"%group_id)
+        if not infos.has_key(group_id):
+            raise GeneralException(errorText("GROUPS","GROUP_ID_INVALID")%group_id)
+
+        self.__addInternal(self.__createGroupObj(*infos[group_id]))
+        self.group_infos[group_id]=infos[group_id]
 
     def loadGroupByName(self,group_name):
         """
@@ -63,8 +68,36 @@ class GroupLoader:
 
 
     def loadAllGroups(self):
-        group_ids=self.__getAllGroupIDs()
-        map(self.loadGroup,group_ids)
+        infos=self.__getGroupsInfos("true")
+        for group_info,group_attrs in infos.itervalues():
+            self.__addInternal(self.__createGroupObj(group_info,group_attrs))
+        self.group_infos=infos
+
+    def reloadAllGroups(self):
+        """
+            reload groups from db, only groups that they or their attributes have been changed are recreated.
+            New dics are built aside and replaced at once, so lookups see either old or new groups
+            return dic of "added","changed","removed" group ids
+        """
+        infos=self.__getGroupsInfos("true")
+        (added,changed,removed)=diffDics(self.group_infos,infos)
+
+        groups_id=self.groups_id.copy()
+        groups_name=self.groups_name.copy()
+        for group_id in changed+removed:
+            del(groups_name[groups_id[group_id].getGroupName()])
+            del(groups_id[group_id])
+
+        for group_id in changed+added:
+            group_obj=self.__createGroupObj(*infos[group_id])
+            groups_id[group_id]=group_obj
+            groups_name[group_obj.getGroupName()]=group_obj
+
+        self.groups_id,self.groups_name,self.group_infos=groups_id,groups_name,infos
+        if added or changed or removed:
+            self.version+=1
+
+        return {"added":added,"changed":changed,"removed":removed}
 
     def unloadGroup(self,group_id):
         """
@@ -73,46 +106,35 @@ class GroupLoader:
         group_obj=self.getGroupByID(group_id)
         del(self.groups_name[group_obj.getGroupName()])
         del(self.groups_id[group_id])
-
-    def __getAllGroupIDs(self):
-        group_ids=db_main.getHandle().get("groups","true",0,-1,"",["group_id"])
-        return [m["group_id"] for m in group_ids]
+        if self.group_infos.has_key(group_id):
+            del(self.group_infos[group_id])
+        self.version+=1
 
     def __addInternal(self,group_obj):
         self.groups_name[group_obj.getGroupName()]=group_obj
         self.groups_id[group_obj.getGroupID()]=group_obj
+        self.version+=1
     
-    def __createGroupObj(self,group_id,group_name,comment,owner_id,group_attrs):
-        return Group(group_id,group_name,comment,owner_id,group_attrs)
+    def __createGroupObj(self,group_info,group_attrs):
+        return Group(group_info["group_id"],group_info["group_name"],group_info["comment"],group_info["owner_id"],
+                     internAttrs(group_attrs))
 
-    def __getGroupInfoDB(self,group_id):
+    def __getGroupsInfos(self,condition):
         """
-            get group info of group with id "group_id" from "groups" table
-            and return (group_id,group_name) tuple
+            return a dic of group_id=>(group_info,group_attrs) for groups matching "condition" on "groups" table
+            group_info is a dic of group row in "groups" table, and group_attrs is a dic in format {attr_name:attr_value}
+            each table is read in one query, for all groups
         """
-        group_info=db_main.getHandle().get("groups","group_id=%s"%to_int(group_id,"group id"))
-        return (group_info[0]["group_id"],group_info[0]["group_name"],group_info[0]["comment"],group_info[0]["owner_id"])
+        infos={}
+        for group_info in db_main.getHandle().get("groups",condition):
+            infos[group_info["group_id"]]=(group_info,{})
 
-    def __getGroupAttrs(self,group_id):
-        """
-            get attributes of group with id "group_id" from db, and return a dic of Attribute instances
-            in format {attr_name:attr_value}
-        """
-        attr_list=self.__getGroupAttrsDB(group_id)
-        return self.__attrListToDic(attr_list)
+        if not infos:
+            return infos
 
-    def __attrListToDic(self,attr_list):
-        """
-            attr_list is a list of attribute dics return from db select query
-            return a dic in format {attr_name:attr_value}
-        """
-        attr_dic={}
-        for _dic in attr_list:
-            attr_dic[_dic["attr_name"]]=_dic["attr_value"]
-        return attr_dic
-    
-    def __getGroupAttrsDB(self,group_id):
-        """
-            return group attrs from db in a list of associative dics
-        """
-        return db_main.getHandle().get("group_attrs","group_id=%s"%group_id)
+        group_ids_condition="group_id in (select group_id from groups where %s)"%condition
+        for _dic in db_main.getHandle().get("group_attrs",group_ids_condition):
+            if infos.has_key(_dic["group_id"]):
+                infos[_dic["group_id"]][1][_dic["attr_name"]]=_dic["attr_value"]
+
+        return infos
@@ -3,6 +3,7 @@ import time
 import defs
 import sys
 import signal
+import atexit
 from core.ibs_logger import Logger
 
 LOG_DEBUG=1
@@ -11,17 +12,42 @@ LOG_RADIUS=4
 LOG_SERVER=8
 LOG_QUERY=16
 LOG_CONSOLE=32
+LOG_SLOW=64
 
 def init():
-    global debug_log_handle, error_log_handle, radius_log_handle, server_log_handle, query_log_handle, console_log_handle
-    debug_log_handle=Logger("/var/log/IBSng/ibs_debug.log")
+    global debug_log_handle, error_log_handle, radius_log_handle, server_log_handle, query_log_handle, console_log_handle, slow_log_handle
+    if defs.LOG_ASYNC: #high volume logs are written by writer threads, errors are written synchronously
+        buffer_size=defs.LOG_BUFFER_SIZE
+    else:
+        buffer_size=0
+
+    debug_log_handle=Logger("/var/log/IBSng/ibs_debug.log",buffer_size,defs.LOG_FLUSH_INTERVAL)
     error_log_handle=Logger("/var/log/IBSng/ibs_error.log")
-    radius_log_handle=Logger("/var/log/IBSng/ibs_radius.log")
-    server_log_handle=Logger("/var/log/IBSng/ibs_server.log")
-    query_log_handle=Logger("/var/log/IBSng/ibs_queries.log")
+    radius_log_handle=Logger("/var/log/IBSng/ibs_radius.log",buffer_size,defs.LOG_FLUSH_INTERVAL)
+    server_log_handle=Logger("/var/log/IBSng/ibs_server.log",buffer_size,defs.LOG_FLUSH_INTERVAL)
+    query_log_handle=Logger("/var/log/IBSng/ibs_queries.log",buffer_size,defs.LOG_FLUSH_INTERVAL)
     console_log_handle=Logger("/var/log/IBSng/ibs_console.log")
+    slow_log_handle=Logger("/var/log/IBSng/ibs_slow.log",buffer_size,defs.LOG_FLUSH_INTERVAL)
 
     setReOpenSignalHandler()
+    atexit.register(shutdown)
+
+def shutdown():
+    """
+        write buffered log records and stop writer threads
+    """
+    for logger in getLoggers():
+        logger.stop()
+
+def getLoggers():
+    return [debug_log_handle,error_log_handle,radius_log_handle,server_log_handle,query_log_handle,console_log_handle,
+            slow_log_handle]
+
+def getDroppedLogRecords():
+    """
+        return number of log records dropped, because buffer of log writer thread was full
+    """
+    return sum(map(lambda logger:logger.getDroppedCount(),getLoggers()))
 
 ##################################
 
@@ -30,7 +56,7 @@ def toLog(_str,log_file,debug_level=0,add_stack=0):
         log _str to a log file that explained by log_file
         if IBS debug_level is more than debug_level
         _str(string): string to log
-        log_file(integer): explained by LOG_DEBUG , LOG_ERROR , LOG_RADIUS, LOG_SERVER definitions (on top of this file)
+        log_file(integer): explained by LOG_DEBUG , LOG_ERROR , LOG_RADIUS, LOG_SERVER, ... definitions (on top of this file)
         debug_level(integer): minimum debug level to log this event
     """
     if debug_level>defs.DEBUG_LEVEL: 
@@ -54,6 +80,9 @@ def toLog(_str,log_file,debug_level=0,add_stack=0):
     if log_file & LOG_CONSOLE:
         console_log_handle.write(_str,add_stack)
 
+    if log_file & LOG_SLOW:
+        slow_log_handle.write(_str,add_stack)
+
 def getExceptionText():
     """
         create and return text of last exception
@@ -79,7 +108,7 @@ def reOpenSignalHandler(signum,frame):
     """
         set re open flag on all loggers, and return
     """
-    for logger in [debug_log_handle,error_log_handle,radius_log_handle,server_log_handle,query_log_handle]:
+    for logger in getLoggers():
         logger.re_open = True
 
     return
@@ -1,17 +1,40 @@
 import threading
+import types
+import traceback
 import time
+import sys
 import os
 
 class Logger:
     PERMISSION=0600
-    
-    def __init__(self,file_name):
+
+    def __init__(self,file_name,buffer_size=0,flush_interval=1):
+        """
+            file_name(str): path of log file
+            buffer_size(int): if non zero, records are written by a writer thread, and at most buffer_size records
+                              wait for it. Records are dropped if buffer is full
+            flush_interval(int): seconds writer thread waits for more records before writing them
+        """
         self.re_open=False
         self.file_name=file_name
         self.open()
         self.tlock=threading.RLock()
+        self.time_str=""
+        self.time_str_epoch=0
 
-    def open(self):     
+        self.buffer_size=buffer_size
+        if buffer_size:
+            self.flush_interval=flush_interval
+            self.records=[]
+            self.records_cond=threading.Condition(threading.Lock())
+            self.dropped=0 #records dropped since last write
+            self.total_dropped=0
+            self.stopping=False
+            self.writer_thread=threading.Thread(target=self.__writerLoop,name="logger %s"%file_name)
+            self.writer_thread.setDaemon(True)
+            self.writer_thread.start()
+
+    def open(self):
         try:
             self.fd=open(self.file_name,"a+")
             self.__chmodFile()
@@ -19,33 +42,60 @@ class Logger:
             sys.stderr.write("Warning: Can't open log file %s\n" % errStr)
             raise
         except Exception,e:
-            sys.stderr.write("Warning: Can't open log file %s\n" % errStr)
+            sys.stderr.write("Warning: Can't open log file %s\n" % e)
             raise
-    
+
     def __chmodFile(self):
         """
             chmod file to 0600
         """
         os.chmod(self.file_name,self.PERMISSION)
-    
+
     def write(self,_str,add_stack=False):
+        """
+            _str(str or object): string to log. Objects are converted to string by writer thread if logger
+                                 is buffered, so expensive formatting doesn't happen in logging thread
+        """
+        if not self.buffer_size:
+            self.__writeRecords([self.__formatRecord(_str,add_stack)])
+        elif type(_str) not in types.StringTypes and not add_stack:
+            self.__enqueue((self.timeStr(),_str))
+        else:
+            self.__enqueue(self.__formatRecord(_str,add_stack))
+
+    def __formatRecord(self,_str,add_stack):
+        record="%s %s \n"%(self.timeStr(),_str)
+        if add_stack:
+            record+="\n%s"%self.stackTrace()
+        return record
+
+    def __formatLazyRecord(self,record):
+        """
+            format (time string,object) records of buffered loggers
+        """
+        if type(record) in types.StringTypes:
+            return record
+
+        try:
+            return "%s %s \n"%record
+        except:
+            return "%s Logger: Can't format record %s\n"%(record[0],traceback.format_exc())
+
+    def __writeRecords(self,records):
         self.tlock.acquire()
         try:
             try:
                 if self.re_open:
                     self.reOpenFD()
 
-                self.fd.write("%s %s \n"%(self.timeStr() , _str)) 
-                if add_stack:
-                    self.fd.write("\n%s"%self.stackTrace())
-        
+                self.fd.write("".join(records))
                 self.fd.flush()
-            
+
             except IOError,(errNo,errStr):
                 if not self.re_open:
                     self.re_open=True
-                    self.write(str)
-        
+                    self.__writeRecords(records)
+
         finally:
             self.tlock.release()
 
@@ -57,9 +107,79 @@ class Logger:
         return retStr
 
     def timeStr(self):
-        return time.strftime("%Y/%m/%d-%H:%M:%S")
+        """
+            return formatted current time, it's formatted once per second
+        """
+        now=int(time.time())
+        if now!=self.time_str_epoch:
+            self.time_str=time.strftime("%Y/%m/%d-%H:%M:%S",time.localtime(now))
+            self.time_str_epoch=now
+        return self.time_str
 
     def reOpenFD(self):
         self.fd.close()
         self.open()
         self.re_open = False
+
+    ###############################
+    def __enqueue(self,record):
+        self.records_cond.acquire()
+        try:
+            stopping=self.stopping
+            if not stopping:
+                if len(self.records)>=self.buffer_size:
+                    self.dropped+=1
+                    return
+
+                self.records.append(record)
+                if len(self.records)==self.buffer_size/2: #don't wait for flush interval, buffer is filling fast
+                    self.records_cond.notify()
+        finally:
+            self.records_cond.release()
+
+        if stopping: #writer thread is stopped or stopping
+            self.__writeRecords([self.__formatLazyRecord(record)])
+
+    def __writerLoop(self):
+        while True:
+            self.records_cond.acquire()
+            try:
+                if not self.stopping and len(self.records)<self.buffer_size/2:
+                    self.records_cond.wait(self.flush_interval)
+                records,self.records=self.records,[]
+                dropped,self.dropped=self.dropped,0
+                self.total_dropped+=dropped
+                stopping=self.stopping
+            finally:
+                self.records_cond.release()
+
+            if dropped:
+                records.append(self.__formatRecord("Logger: %s records dropped, log buffer is full"%dropped,False))
+            if records:
+                self.__writeRecords(map(self.__formatLazyRecord,records))
+            if stopping:
+                return
+
+    def getDroppedCount(self):
+        """
+            return number of records dropped because of full buffer
+        """
+        if not self.buffer_size:
+            return 0
+        return self.total_dropped+self.dropped
+
+    def stop(self):
+        """
+            write buffered records and stop writer thread. Later records are written directly
+        """
+        if not self.buffer_size or self.stopping:
+            return
+
+        self.records_cond.acquire()
+        try:
+            self.stopping=True
+            self.records_cond.notify()
+        finally:
+            self.records_cond.release()
+
+        self.writer_thread.join()
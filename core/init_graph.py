@@ -0,0 +1,135 @@
+from core.ibs_exceptions import *
+import threading
+import time
+import sys
+
+class InitGraph:
+    """
+        runs init steps of modules, each step starts as soon as steps it depends on are done, so independent
+        steps (ex. loaders that read their tables) run concurrently, each with it's own db handle.
+        Time of each step is logged. If a step fails, no more steps are started, and exception of first failed
+        step is raised from run after running steps are done
+    """
+    def __init__(self,parallel=True):
+        """
+            parallel(bool): run independent steps concurrently, if False steps are run one by one in order they're added
+        """
+        self.parallel=parallel
+        self.steps=[] #list of (name,method,depends)
+        self.step_names={}
+        self.cond=threading.Condition()
+
+    def addStep(self,name,method,depends=()):
+        """
+            name(str): unique name of step
+            method(callable): method that initializes module
+            depends(sequence of str): name of steps that should be done before this step starts.
+                                      they should have been already added
+        """
+        if self.step_names.has_key(name):
+            raise IBSException("Init step %s already added"%name)
+
+        for dep_name in depends:
+            if not self.step_names.has_key(dep_name):
+                raise IBSException("Init step %s depends on unknown step %s"%(name,dep_name))
+
+        self.steps.append((name,method,tuple(depends)))
+        self.step_names[name]=True
+
+    def run(self):
+        """
+            run all steps, return dic of step name=>seconds it took
+        """
+        self.timings={}
+        self.done={}
+        self.running={}
+        self.failed=None #(name,exc_info) of first failed step
+        start=time.time()
+
+        if self.parallel:
+            self.__runParallel()
+        else:
+            self.__runSequential()
+
+        if self.failed!=None:
+            name,exc_info=self.failed
+            toLog("Init step %s failed"%name,LOG_ERROR)
+            raise exc_info[0],exc_info[1],exc_info[2]
+
+        toLog("Init steps done in %.3f seconds, %s"%(time.time()-start,self.__slowestSteps()),LOG_DEBUG)
+        return self.timings
+
+    def __runSequential(self):
+        for name,method,depends in self.steps:
+            self.__runStep(name,method)
+            if self.failed!=None:
+                return
+
+    def __runParallel(self):
+        self.cond.acquire()
+        try:
+            while True:
+                if self.failed==None:
+                    self.__startReadySteps()
+
+                if not self.running and (self.failed!=None or len(self.done)==len(self.steps)):
+                    return
+
+                if not self.running: #nothing running and nothing can start
+                    raise IBSException("Init steps %s have unsatisfiable dependencies"%
+                                        ",".join([step[0] for step in self.steps if not self.done.has_key(step[0])]))
+
+                self.cond.wait()
+        finally:
+            self.cond.release()
+
+    def __startReadySteps(self):
+        """
+            start threads for steps that all their dependencies are done, should be called with cond held
+        """
+        for name,method,depends in self.steps:
+            if self.done.has_key(name) or self.running.has_key(name):
+                continue
+
+            if [dep_name for dep_name in depends if not self.done.has_key(dep_name)]:
+                continue
+
+            self.running[name]=True
+            thread=threading.Thread(target=self.__runStepThread,args=(name,method),name="init %s"%name)
+            thread.setDaemon(True)
+            thread.start()
+
+    def __runStepThread(self,name,method):
+        try:
+            self.__runStep(name,method)
+        finally:
+            self.cond.acquire()
+            try:
+                del(self.running[name])
+                self.cond.notify()
+            finally:
+                self.cond.release()
+
+    def __runStep(self,name,method):
+        start=time.time()
+        try:
+            method()
+        except:
+            logException(LOG_ERROR,"Init step %s"%name)
+            self.cond.acquire()
+            try:
+                if self.failed==None:
+                    self.failed=(name,sys.exc_info())
+            finally:
+                self.cond.release()
+            return
+
+        duration=time.time()-start
+        self.timings[name]=duration
+        self.done[name]=True
+        toLog("Init step %s done in %.3f seconds"%(name,duration),LOG_DEBUG)
+
+    def __slowestSteps(self):
+        timings=self.timings.items()
+        timings.sort(lambda a,b:cmp(b[1],a[1]))
+        return "slowest: %s"%", ".join(["%s %.3f"%(name,duration) for name,duration in timings[:5]])
@@ -88,8 +88,10 @@ class IPpoolLoader:
         """
             load all ip pools into object, normally should be called by startup routing
         """
-        ippool_ids=self.__getAllIPpoolIds()
-        map(self.loadIPpoolByID,ippool_ids)
+        ips=self.__getAllIPpoolsIPs()
+        for ippool_info in self.__getAllIPpoolsInfoDB():
+            ippool_obj=self.__createIPpoolObj(ippool_info,ips.get(ippool_info["ippool_id"],[]))
+            self.__keepObj(ippool_obj)
 
     def getAllIPpoolNames(self):
         return self.pool_names.keys()
@@ -109,12 +111,20 @@ class IPpoolLoader:
         self.unloadIPpoolByName(old_name)
         self.__keepObj(ippool_obj)
     
-    def __getAllIPpoolIds(self):
+    def __getAllIPpoolsInfoDB(self):
         """
-            return a list of ippool id's from ippool table
+            return a list of dics of all ippools informations from ippool table
         """
-        ippoolids_dic=db_main.getHandle().get("ippool","true",0,-1,"ippool_id",["ippool_id"])
-        return map(lambda x:x["ippool_id"],ippoolids_dic)
+        return db_main.getHandle().get("ippool","true",0,-1,"ippool_id")
+
+    def __getAllIPpoolsIPs(self):
+        """
+            return a dic of ippool_id=>list of ip's of ippool, for all ippools, in one query
+        """
+        ips={}
+        for _dic in db_main.getHandle().get("ippool_ips","true",0,-1,"",["ippool_id","ip"]):
+            ips.setdefault(_dic["ippool_id"],[]).append(_dic["ip"])
+        return ips
 
     def __keepObj(self,ippool_obj):
         """
@@ -5,6 +5,7 @@ import sys
 import traceback
 import imp
 import types
+import threading
 from core.ibs_exceptions import *
 from core.errors import errorText
 
@@ -224,4 +225,72 @@ def filterNonAlnum(_str):
         remove all non-alpha numeric characters from _str and return it
     """
     return filter_non_alnum_sub_pattern.sub("", _str)
-    
\ No newline at end of file
+
+def internStr(value):
+    """
+        return interned "value" if it's a string, otherwise return it unchanged
+    """
+    if type(value)==types.StringType:
+        return intern(value)
+    return value
+
+def internAttrs(attrs):
+    """
+        return a new dic of attrs with interned names and string values
+        attributes of loaded users and groups share the same strings this way
+    """
+    interned={}
+    for attr_name,attr_value in attrs.iteritems():
+        interned[internStr(attr_name)]=internStr(attr_value)
+    return interned
+
+def diffDics(old,new):
+    """
+        compare values of "old" and "new" dics by key
+        return (added,changed,removed) lists of keys
+    """
+    added=[]
+    changed=[]
+    for key,value in new.iteritems():
+        if not old.has_key(key):
+            added.append(key)
+        elif old[key]!=value:
+            changed.append(key)
+
+    removed=[key for key in old if not new.has_key(key)]
+    return (added,changed,removed)
+
+class PendingResult:
+    """
+        returned by methods that finish their work later on another thread.
+        Done callbacks are called with "failed" flag when work is done
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.callbacks=[]
+        self.failed=None #None while work is not done yet
+
+    def addDoneCallback(self,callback):
+        """
+            callback(callable): called with failed(bool) argument, it's called immediately if work is already done
+        """
+        self.lock.acquire()
+        try:
+            if self.failed==None:
+                self.callbacks.append(callback)
+                return
+        finally:
+            self.lock.release()
+
+        callback(self.failed)
+
+    def setDone(self,failed):
+        self.lock.acquire()
+        try:
+            self.failed=failed
+            callbacks,self.callbacks=self.callbacks,[]
+        finally:
+            self.lock.release()
+
+        for callback in callbacks:
+            callback(failed)
@@ -3,6 +3,12 @@ import random
 import re
 import types
 import random
+import threading
+import hashlib
+import hmac
+import os
+
+from core import defs
 
 def getPasswords(_count,_type,_len):
     """
@@ -90,4 +96,70 @@ class Password:
     def isMd5Hash(self):
         if self.password[0:3]=='$1$':
             return 1
-        return 0
\ No newline at end of file
+        return 0
+
+
+class VerifiedPasswords:
+    """
+        LRU of recently verified (stored password, given password) pairs, so clients that send their password
+        with each request don't cost an md5 crypt per request. Given passwords are kept as keyed digests,
+        and only successful checks are kept. Changing stored password changes the key, so old pairs are not used
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.digest_key=os.urandom(16)
+        self.pairs={} #(stored password,digest of given password)=>last use counter
+        self.counter=0
+
+    def check(self,stored_password,given_password):
+        """
+            return True if given_password matches stored_password
+            stored_password, given_password(Password instance or str):
+        """
+        if type(stored_password)==types.StringType:
+            stored_password=Password(stored_password)
+        if type(given_password)==types.StringType:
+            given_password=Password(given_password)
+
+        key=(stored_password.getPassword(),
+             hmac.new(self.digest_key,given_password.getPassword(),hashlib.sha1).digest())
+        self.lock.acquire()
+        try:
+            if self.pairs.has_key(key):
+                self.counter+=1
+                self.pairs[key]=self.counter
+                return True
+        finally:
+            self.lock.release()
+
+        if not given_password==stored_password:
+            return False
+
+        self.lock.acquire()
+        try:
+            self.counter+=1
+            self.pairs[key]=self.counter
+            if len(self.pairs)>defs.SERVER_AUTH_CACHE_SIZE:
+                self.__removeOldest()
+        finally:
+            self.lock.release()
+        return True
+
+    def __removeOldest(self):
+        """
+            remove least recently used half of pairs, should be called with lock held
+        """
+        counters=self.pairs.values()
+        counters.sort()
+        median=counters[len(counters)/2]
+        for key,counter in self.pairs.items():
+            if counter<median:
+                del(self.pairs[key])
+
+verified_passwords=VerifiedPasswords()
+
+def checkPassword(stored_password,given_password):
+    """
+        return True if given_password matches stored_password, recently verified pairs are not checked again
+    """
+    return verified_passwords.check(stored_password,given_password)
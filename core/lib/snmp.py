@@ -1,6 +1,8 @@
 from core.lib.pysnmp import asn1, v1, v2c
 from core.lib.pysnmp import role
 from core.ibs_exceptions import *
+from core.lib import snmp_engine
+from core.lib.general import PendingResult
 import threading
 
 class Snmp:
@@ -17,9 +19,9 @@ class Snmp:
         self.ip=ip
         self.port=port
         self.community=community
-        self.version=version
-        self.timeout=timeout
-        self.retries=retries
+        self.version=str(version)
+        self.timeout=int(timeout)
+        self.retries=int(retries)
         self.lock=threading.Semaphore(max_concurrent)
         self.clients_lock=threading.Lock()
         
@@ -121,6 +123,51 @@ class Snmp:
             exc_value=self.__getExceptionValue()
             self._raiseException("SnmpWalk on oid: %s is \"%s\""%(oid,exc_value))
 
+    def walkAsync(self,oids,callback):
+        """
+            walk on all of "oids" using the global snmp engine, without blocking the caller.
+            callback will be called with a dic of {oid:{oid:value}} when all walks are done,
+            or with None if any of walks failed
+            oids(list of str): oids to walk on
+            return a PendingResult that is done after callback is called
+        """
+        state={"remaining":len(oids),"results":{},"failed":False}
+        state_lock=threading.Lock()
+        pending=PendingResult()
+
+        def walkDone(oid,result,error):
+            state_lock.acquire()
+            try:
+                if error!=None:
+                    state["failed"]=True
+                    toLog(error,LOG_DEBUG)
+                else:
+                    state["results"][oid]=result
+                state["remaining"]-=1
+                if state["remaining"]:
+                    return
+            finally:
+                state_lock.release()
+
+            try:
+                if state["failed"]:
+                    callback(None)
+                else:
+                    callback(state["results"])
+            finally:
+                pending.setDone(state["failed"])
+
+        for oid in oids:
+            snmp_engine.getEngine().submitWalk(self.ip,
+                                               self.community,
+                                               oid,
+                                               lambda result,error,oid=oid:walkDone(oid,result,error),
+                                               self.version,
+                                               self.timeout,
+                                               self.retries,
+                                               self.port)
+        return pending
+
     def __walk(self,oid):
 #       req = self.module.GETREQUEST()    
         req = self.module.GETNEXTREQUEST()
@@ -0,0 +1,348 @@
+"""
+    Non-blocking SNMP walk engine.
+    All walks of all devices are multiplexed over one UDP socket by a single select loop. SNMP v2c walks use
+    GETBULK, v1 walks use GETNEXT. Select loop runs in its own thread, and results are passed to callbacks on
+    "snmp" thread wrapper.
+"""
+from core.lib.pysnmp import asn1, v1, v2c
+from core.threadpool import thread_main
+from core.ibs_exceptions import *
+from core import defs
+from core import main
+import threading
+import socket
+import select
+import random
+import errno
+import time
+import os
+import sys
+
+END_OF_WALK_TYPES=("endOfMibView","noSuchObject","noSuchInstance")
+
+def getEngine():
+    """
+        return the global snmp engine, engine is created and started on first call
+    """
+    global snmp_engine
+    engine_lock.acquire()
+    try:
+        if snmp_engine==None:
+            snmp_engine=SnmpEngine(defs.SNMP_ENGINE_MAX_REPETITIONS,
+                                   defs.SNMP_ENGINE_DEVICE_MAX_OUTSTANDING,
+                                   defs.SNMP_ENGINE_DEVICE_MIN_INTERVAL,
+                                   defs.SNMP_ENGINE_DEVICE_MAX_QUEUE)
+            snmp_engine.start()
+        return snmp_engine
+    finally:
+        engine_lock.release()
+
+snmp_engine=None
+engine_lock=threading.Lock()
+
+class WalkJob:
+    def __init__(self,address,community,version,oid,timeout,retries,max_repetitions,callback):
+        self.address=address
+        self.community=community
+        self.version=version
+        self.oid=oid
+        self.timeout=timeout
+        self.retries=retries
+        self.max_repetitions=max_repetitions
+        self.callbacks=[callback] #callbacks of this job and duplicate walks merged into it
+
+        self.oid_obj=asn1.OBJECTID(oid)
+        self.last_oid=oid
+        self.result={} #oid:value
+        self.tries=0
+        self.request_id=None
+        self.deadline=None
+
+    def createRequest(self,request_id):
+        encoded_oids=(asn1.OBJECTID().encode(self.last_oid),)
+        if self.version=="2c":
+            return v2c.GETBULKREQUEST().encode(community=self.community,
+                                               request_id=request_id,
+                                               non_repeaters=0,
+                                               max_repetitions=self.max_repetitions,
+                                               encoded_oids=encoded_oids)
+        else:
+            return v1.GETNEXTREQUEST().encode(community=self.community,
+                                              request_id=request_id,
+                                              encoded_oids=encoded_oids)
+
+    def processResponse(self,rsp):
+        """
+            add variable bindings of rsp to result
+            return True if walk is completed, or False if next request should be sent
+            raise SnmpException on agent error
+        """
+        if rsp["error_status"]:
+            if self.version!="2c" and rsp["error_status"]==2: #no such name, end of mib on v1
+                return True
+            raise SnmpException("SNMP error %s from %s on walk of %s"%(rsp["error_status"],self.address[0],self.oid))
+
+        if not rsp["encoded_oids"]:
+            return True
+
+        for encoded_oid,encoded_val in zip(rsp["encoded_oids"],rsp["encoded_vals"]):
+            oid=asn1.OBJECTID().decode(encoded_oid)[0]
+            val_obj=asn1.decode(encoded_val)[0]
+            if val_obj.__class__.__name__ in END_OF_WALK_TYPES or oid==self.last_oid or \
+               not self.oid_obj.isaprefix(oid):
+                return True
+
+            self.result[oid]=val_obj()
+            self.last_oid=oid
+
+        return False
+
+class Device:
+    def __init__(self):
+        self.queue=[] #waiting jobs
+        self.outstanding=0 #number of running jobs
+        self.next_send_time=0
+
+class SnmpEngine:
+    def __init__(self,max_repetitions,max_outstanding,min_interval,max_queue):
+        """
+            max_repetitions(int): default GETBULK max-repetitions
+            max_outstanding(int): maximum number of concurrent walks on one device
+            min_interval(float): minimum seconds between two packets sent to one device
+            max_queue(int): maximum number of waiting walks of one device, walks after that fail immediately
+        """
+        self.max_repetitions=max_repetitions
+        self.max_outstanding=max_outstanding
+        self.min_interval=min_interval
+        self.max_queue=max_queue
+
+        self.lock=threading.RLock()
+        self.devices={} #(ip,port)=>Device
+        self.requests={} #request_id=>WalkJob, jobs that has a request in flight
+        self.delayed=[] #jobs that should send their next request when device rate limit allows
+        self.last_request_id=random.randint(1,0x3fffffff)
+        self.ready_devices={} #addresses that have waiting jobs
+
+        self.sock=socket.socket(socket.AF_INET,socket.SOCK_DGRAM)
+        self.sock.setblocking(0)
+        self.sock.bind(("0.0.0.0",0))
+        self.wakeup_read,self.wakeup_write=os.pipe()
+
+    def start(self):
+        """
+            start select loop in a dedicated thread, it lives as long as the process, so it doesn't take a slot
+            of thread wrappers
+        """
+        thread=threading.Thread(target=self.__loop,name="snmp engine")
+        thread.setDaemon(True)
+        thread.start()
+
+    def submitWalk(self,ip,community,oid,callback,version="2c",timeout=10,retries=3,port=161,max_repetitions=None):
+        """
+            walk on "oid" of agent at ip:port, without blocking the caller
+            callback(callable): called with (result,error). result is a dic of {oid:value} or None when walk failed,
+                                error is None or the error string
+        """
+        if max_repetitions==None:
+            max_repetitions=self.max_repetitions
+
+        address=(ip,port)
+        version=str(version)
+        self.lock.acquire()
+        try:
+            device=self.__getDevice(address)
+            for job in device.queue:
+                if job.oid==oid and job.community==community and job.version==version:
+                    #same walk is already waiting, share its result
+                    job.callbacks.append(callback)
+                    return
+
+            if len(device.queue)>=self.max_queue:
+                self.__runCallbacks([callback],None,"SnmpWalk on %s oid %s: too many waiting walks for device"%(ip,oid))
+                return
+
+            device.queue.append(WalkJob(address,community,version,oid,timeout,retries,max_repetitions,callback))
+            self.ready_devices[address]=True
+        finally:
+            self.lock.release()
+
+        self.__wakeup()
+
+    def __getDevice(self,address):
+        try:
+            return self.devices[address]
+        except KeyError:
+            self.devices[address]=Device()
+            return self.devices[address]
+
+    def __wakeup(self):
+        try:
+            os.write(self.wakeup_write,"x")
+        except OSError:
+            pass
+
+    ################################
+    def __loop(self):
+        while not main.isShuttingDown():
+            try:
+                self.lock.acquire()
+                try:
+                    now=time.time()
+                    self.__checkTimeouts(now)
+                    wait=self.__startWaitingJobs(now)
+                finally:
+                    self.lock.release()
+
+                readables=select.select([self.sock,self.wakeup_read],[],[],wait)[0]
+                if self.wakeup_read in readables:
+                    os.read(self.wakeup_read,4096)
+                if self.sock in readables:
+                    self.__readResponses()
+            except:
+                logException(LOG_ERROR,"Snmp Engine")
+
+    def __startWaitingJobs(self,now):
+        """
+            send first request of waiting jobs, respecting per device limits
+            return seconds we can wait before something needs our attention
+        """
+        wait=1.0
+        for address in self.ready_devices.keys():
+            device=self.devices[address]
+            while device.queue and device.outstanding<self.max_outstanding:
+                if device.next_send_time>now:
+                    wait=min(wait,device.next_send_time-now)
+                    break
+                device.outstanding+=1
+                self.__sendRequest(device.queue.pop(0),now)
+
+            if not device.queue:
+                del(self.ready_devices[address])
+
+        delayed,self.delayed=self.delayed,[]
+        for job in delayed:
+            self.__continueJob(job,now)
+
+        for job in self.delayed:
+            wait=min(wait,self.devices[job.address].next_send_time-now)
+
+        for job in self.requests.itervalues():
+            wait=min(wait,job.deadline-now)
+
+        return max(wait,0)
+
+    def __continueJob(self,job,now):
+        """
+            send next request of a walk or retransmit its last request, or delay it if device rate limit doesn't allow
+        """
+        if self.devices[job.address].next_send_time>now:
+            self.requests.pop(job.request_id,None)
+            self.delayed.append(job)
+        else:
+            self.__sendRequest(job,now)
+
+    def __sendRequest(self,job,now):
+        self.requests.pop(job.request_id,None)
+
+        self.last_request_id=(self.last_request_id % 0x7ffffffe) + 1
+        job.request_id=self.last_request_id
+        job.deadline=now+job.timeout
+        job.tries+=1
+        self.requests[job.request_id]=job
+        self.__getDevice(job.address).next_send_time=now+self.min_interval
+        try:
+            self.sock.sendto(job.createRequest(job.request_id),job.address)
+        except socket.error,e:
+            if e[0] not in (errno.EAGAIN,errno.ENOBUFS):
+                self.__finishJob(job,"send error: %s"%e)
+
+    def __checkTimeouts(self,now):
+        for job in self.requests.values():
+            if job.deadline<=now:
+                if job.tries>job.retries:
+                    self.__finishJob(job,"timeout")
+                else:
+                    self.__continueJob(job,now)
+
+    def __finishJob(self,job,error=None):
+        """
+            remove job from engine and call its callback
+            should be called with lock held
+        """
+        self.requests.pop(job.request_id,None)
+        self.__getDevice(job.address).outstanding-=1
+        if self.__getDevice(job.address).queue:
+            self.ready_devices[job.address]=True
+
+        if error==None:
+            result=job.result
+        else:
+            result=None
+            error="SnmpWalk on %s oid %s: %s"%(job.address[0],job.oid,error)
+
+        self.__runCallbacks(job.callbacks,result,error)
+
+    def __runCallbacks(self,callbacks,result,error):
+        for callback in callbacks:
+            thread_main.runThread(self.__callCallback,[callback,result,error],"snmp")
+
+    def __callCallback(self,callback,result,error):
+        try:
+            callback(result,error)
+        except:
+            logException(LOG_ERROR,"Snmp Engine Callback")
+
+    ################################
+    def __readResponses(self):
+        while True:
+            try:
+                data,src=self.sock.recvfrom(65536)
+            except socket.error,e:
+                if e[0] in (errno.EAGAIN,errno.EWOULDBLOCK,errno.EINTR):
+                    return
+                raise
+
+            self.lock.acquire()
+            try:
+                self.__handleResponse(data,src)
+            finally:
+                self.lock.release()
+
+    def __handleResponse(self,data,src):
+        try:
+            rsp=self.__decodeResponse(data)
+        except:
+            if defs.DEBUG_LEVEL>=defs.DEBUG_ALL:
+                logException(LOG_DEBUG,"Snmp Engine: Invalid response from %s"%(src,))
+            return
+
+        job=self.requests.get(rsp["request_id"])
+        if job==None or job.address[0]!=src[0]: #late response of a retried request or a spoofed packet
+            return
+        del(self.requests[rsp["request_id"]])
+
+        try:
+            completed=job.processResponse(rsp)
+        except SnmpException,e:
+            self.__finishJob(job,str(e))
+            return
+        except: #malformed response, job should still be finished, so its device doesn't stall
+            logException(LOG_ERROR,"Snmp Engine: Can't process response of %s for walk of %s"%(src[0],job.oid))
+            self.__finishJob(job,"invalid response: %s"%sys.exc_info()[1])
+            return
+
+        if completed:
+            self.__finishJob(job)
+        else:
+            job.tries=0
+            self.__continueJob(job,time.time())
+
+    def __decodeResponse(self,data):
+        msg=v1.MESSAGE()
+        msg.decode_header(data)
+        if msg["version"]==1:
+            rsp=v2c.RESPONSE()
+        else:
+            rsp=v1.GETRESPONSE()
+        rsp.decode(data)
+        return rsp
@@ -9,6 +9,7 @@ class LoginHandler(handler.Handler):
     def __init__(self):
         handler.Handler.__init__(self,"login")
         self.registerHandlerMethod("login")
+        self.registerHandlerMethod("createSession")
     
     def login(self,request):
         request.checkArgs("login_auth_name","login_auth_type","login_auth_pass")
@@ -32,4 +33,16 @@ class LoginHandler(handler.Handler):
             raise GeneralException(errorText("GENERAL","ACCESS_DENIED"))
 
         return True
-                
\ No newline at end of file
+                
+
+    def createSession(self,request):
+        """
+            create a session token for requester, that can be sent as "auth_session" instead of "auth_pass"
+            in next requests, so password is not checked on each request
+            token is only valid from the same remote address, until password of requester changes,
+            session expires or server restarts
+            return a dic in format {"auth_session":token,"expire":expiration epoch}
+        """
+        request.needAuthType(request.ADMIN,request.NORMAL_USER,request.VOIP_USER)
+        token,expire=request.createSession()
+        return {"auth_session":token,"expire":expire}
@@ -8,6 +8,7 @@ SHUTDOWN=False
 NO_LOGIN=True
 
 def init():
+    setInitStartTime()
     ibs_exceptions.init()
     ibs_exceptions.toLog("IBS starting...",ibs_exceptions.LOG_DEBUG)
     unSetShutdownFlag()
@@ -34,80 +35,95 @@ def init():
     import core.defs
     core.defs.init()
     
-    from core.script_launcher import launcher_main
-    launcher_main.init()
-
     from core.server import server
     server.init()    
 
+    initModules()
+
+    ibs_exceptions.toLog("Starting server",ibs_exceptions.LOG_DEBUG)
+    server.startServer()    
+
+    setStartTime()
+    unSetNoLoginFlag()
+
+    ibs_exceptions.toLog("Modules Initialized, Entering Post Inits",ibs_exceptions.LOG_DEBUG)
+    runPostInits()
+
+    ibs_exceptions.toLog("IBS successfully started.",ibs_exceptions.LOG_DEBUG)
+    sys.excepthook=sys_except_hook
+
+    unsetStartingFlag()
+    
+def initModules():
+    """
+        initialize modules, each module is initialized after modules it depends on, and independent modules
+        are initialized concurrently if defs.PARALLEL_INIT is set
+    """
+    from core import defs
+    from core.init_graph import InitGraph
+    graph=InitGraph(defs.PARALLEL_INIT)
+
     import core.admin.admin_main
-    core.admin.admin_main.init()
+    graph.addStep("admin",core.admin.admin_main.init)
 
     import core.login.login_main
-    core.login.login_main.init()
+    graph.addStep("login",core.login.login_main.init,["admin"])
 
     import core.defs_lib.defs_main
-    core.defs_lib.defs_main.init()
+    graph.addStep("defs_lib",core.defs_lib.defs_main.init)
 
     import core.stats.stat_main
-    core.stats.stat_main.init()
+    graph.addStep("stats",core.stats.stat_main.init)
+
+    from core.script_launcher import launcher_main
+    graph.addStep("launcher",launcher_main.init,["stats"])
 
     import core.charge.charge_main
-    core.charge.charge_main.init()
+    graph.addStep("charge",core.charge.charge_main.init)
 
     import core.group.group_main
-    core.group.group_main.init()
+    graph.addStep("group",core.group.group_main.init)
 
     import core.ias.ias_main
-    core.ias.ias_main.init()
+    graph.addStep("ias",core.ias.ias_main.init)
 
     import core.log_console.console_main
-    core.log_console.console_main.init()
+    graph.addStep("log_console",core.log_console.console_main.init)
 
     import core.user.user_main
-    core.user.user_main.init()
+    graph.addStep("user",core.user.user_main.init,["admin","login","defs_lib","stats","launcher","charge","group","ias","log_console"])
 
     import core.util.util_main
-    core.util.util_main.init()
+    graph.addStep("util",core.util.util_main.init)
     
     import core.ippool.ippool_main
-    core.ippool.ippool_main.init()
+    graph.addStep("ippool",core.ippool.ippool_main.init)
 
     import core.report.report_main
-    core.report.report_main.init()
+    graph.addStep("report",core.report.report_main.init,["user"])
     
     import core.bandwidth_limit.bw_main
-    core.bandwidth_limit.bw_main.init()
+    graph.addStep("bandwidth_limit",core.bandwidth_limit.bw_main.init,["launcher"])
 
     import core.ras.ras_main
-    core.ras.ras_main.init()
+    graph.addStep("ras",core.ras.ras_main.init,["user","ippool","bandwidth_limit"])
+
+    graph.addStep("restore_onlines",core.user.user_main.restoreOnlines,["ras"])
 
     import radius_server.rad_main
-    radius_server.rad_main.init()
+    graph.addStep("radius",radius_server.rad_main.init,["ras","restore_onlines"])
     
     import snapshot.snapshot_main
-    snapshot.snapshot_main.init()
+    graph.addStep("snapshot",snapshot.snapshot_main.init,["user","ras"])
 
     import message.message_main
-    message.message_main.init()
+    graph.addStep("message",message.message_main.init,["user"])
 
     import web_analyzer.web_analyzer_main
-    web_analyzer.web_analyzer_main.init()
-    
-    ibs_exceptions.toLog("Starting server",ibs_exceptions.LOG_DEBUG)
-    server.startServer()    
+    graph.addStep("web_analyzer",web_analyzer.web_analyzer_main.init,["user"])
 
-    setStartTime()
-    unSetNoLoginFlag()
+    graph.run()
 
-    ibs_exceptions.toLog("Modules Initialized, Entering Post Inits",ibs_exceptions.LOG_DEBUG)
-    runPostInits()
-
-    ibs_exceptions.toLog("IBS successfully started.",ibs_exceptions.LOG_DEBUG)
-    sys.excepthook=sys_except_hook
-
-    unsetStartingFlag()
-    
 ############################################
 post_init_methods=[]
 
@@ -143,6 +159,9 @@ def mainThreadShutdown():
     from core.server import server    
     server.shutdown()
 
+    from core.script_launcher import launcher_main
+    launcher_main.shutdown()
+
     thread_main.shutdown(10)
 
     from core.db import db_main
@@ -198,6 +217,16 @@ def setStartTime():
 def getStartTime():
     return START_TIME
 
+def setInitStartTime():
+    global INIT_START_TIME
+    INIT_START_TIME = time.time()
+
+def getInitStartTime():
+    """
+        return time that initialization of IBS started, used to track startup time
+    """
+    return INIT_START_TIME
+
 def sys_except_hook(_type,value,tback):
     ibs_exceptions.toLog("Unhandled sys exception :%s %s " %(_type,value),ibs_exceptions.LOG_ERROR)
     ibs_exceptions.toLog("".join(traceback.format_exception(_type, value, tback)),ibs_exceptions.LOG_ERROR)
@@ -1,4 +1,3 @@
-from core.event import periodic_events 
 from core.ras.msgs import RasMsg
 from core.ibs_exceptions import *
 from core.ippool import ippool_main
@@ -6,6 +5,8 @@ from core.lib.sort import *
 from core.ras import ras_main
 from core.user import user_main
 from core.lib.general import *
+from core.stats import trace
+import types
 import time
 
 PORT_TYPES=["Internet","Voice-Origination","Voice-Termination"]
@@ -13,6 +14,7 @@ PORT_TYPES=["Internet","Voice-Origination","Voice-Termination"]
 class Ras:
     default_attributes={"online_check":1}
     #type_attrs static attribute should be set on each ras implemention
+    session_state_dics=("onlines","inouts","internet_onlines") #dictionaries of sessions saved by getSessionState
 
     def __init__(self, ras_ip, ras_id, ras_description, ras_type, radius_secret, comment, ports, ippools, attributes):
         """
@@ -140,6 +142,16 @@ class Ras:
         
         return self.isOnline(user_msg)
 
+    def _isOnlineBatch(self,user_msgs):
+        """
+            check if users in "user_msgs" are online on ras
+            return a list of bools, in same order as user_msgs
+        """
+        if not self.getAttribute("online_check"):
+            return [True]*len(user_msgs)
+
+        return self.isOnlineBatch(user_msgs)
+
     def _handleRadAuthPacket(self,request,reply):
         """
             request(Radius Packet Instance): Authenticate Request Packet
@@ -161,7 +173,9 @@ class Ras:
             called after authentication is done
         """
         if auth_success and ras_msg.getAction() == "INTERNET_AUTHENTICATE":
+            span=trace.beginSpan("ippool")
             self._applyIPpool(ras_msg)
+            trace.endSpan(span)
 
     def _handleRadAcctPacket(self,request,reply):
         """
@@ -176,9 +190,14 @@ class Ras:
             ras_msg is created by "request" , "reply"
         """
         ras_msg=RasMsg(request,reply,self)
+        span=trace.beginSpan("ras_handle")
         apply(method,[ras_msg])
+        trace.endSpan(span)
         if ras_msg.getAction():
-            return (ras_msg,ras_msg.send())
+            span=trace.beginSpan("dispatch")
+            result=ras_msg.send()
+            trace.endSpan(span)
+            return (ras_msg,result)
 
     def _applyIPpool(self,ras_msg):
         """
@@ -331,6 +350,15 @@ class Ras:
             this function should be overrided by ras implementions
         """
         return False
+
+    def isOnlineBatch(self,user_msgs):
+        """
+            must return a list of bools, that shows wether user of each message in "user_msgs" is online or not
+            
+            Default implemention calls isOnline for each message. Rases that can answer for all sessions with
+            one query from device should override this
+        """
+        return map(self.isOnline,user_msgs)
     
     def killUser(self,user_msg):
         """
@@ -353,7 +381,34 @@ class Ras:
             user_msg has an attribute action, that shows the action ("apply" or "remove") that should be taken
         """
         return True
-    
+
+    def getSessionState(self,unique_id_val):
+        """
+            return picklable state that ras keeps for session with "unique_id_val", to be passed to
+            restoreSessionState after a restart
+
+            Default implemention saves entries of dictionaries named in session_state_dics, that are
+            keyed by unique id value. Rases that keep sessions in other forms should override both methods
+        """
+        state={}
+        for dic_name in self.session_state_dics:
+            dic=getattr(self,dic_name,None)
+            if isinstance(dic,types.DictType) and dic.has_key(unique_id_val):
+                state[dic_name]=dic[unique_id_val]
+        return state
+
+    def restoreSessionState(self,unique_id_val,state):
+        """
+            restore state returned by getSessionState before restart. Last update times are set to now, so
+            restored sessions are not considered stale before next update from ras
+        """
+        for dic_name,value in state.iteritems():
+            dic=getattr(self,dic_name,None)
+            if isinstance(dic,types.DictType):
+                if isinstance(value,types.DictType) and value.has_key("last_update"):
+                    value["last_update"]=time.time()
+                dic[unique_id_val]=value
+
     def dispatch(self,user_msg):
         """
             This method is called when action is not one of known and standard actions.
@@ -419,7 +474,8 @@ class Ras:
 class GeneralUpdateRas(Ras):
     """
         This class has an update method, that will be called for general_update_interval intervals,
-        "generalUpdate" is the only method that will be called periodicly
+        "generalUpdate" is the only method that will be called periodicly, it may return a PendingResult
+        when update is finished later, ex. by snmp engine
     """
     def __init__(self,ras_ip,ras_id,ras_description,ras_type,radius_secret,comment,ports,ippools,attributes):
         if not self.type_attrs.has_key("general_update_interval"):
@@ -429,15 +485,7 @@ class GeneralUpdateRas(Ras):
         self._registerEvent()
 
     def _registerEvent(self):
-        class GeneralUpdateEvent(periodic_events.PeriodicEvent):
-            def __init__(my_self):
-                periodic_events.PeriodicEvent.__init__(my_self,"%s general_update"%self.ras_ip,int(self.getAttribute("general_update_interval")),[],0)
-
-            def run(my_self):
-                self.generalUpdate()
-        
-        self.__general_update_event=GeneralUpdateEvent()
-        periodic_events.getManager().register(self.__general_update_event)
+        ras_main.getUpdateScheduler().register(self,"general_update",self.generalUpdate,int(self.getAttribute("general_update_interval")))
     
     def generalUpdate(self):
         return self.updateInOutBytes()
@@ -446,7 +494,7 @@ class GeneralUpdateRas(Ras):
         pass
 
     def _delEvent(self):
-        periodic_events.getManager().unRegister(self.__general_update_event)
+        ras_main.getUpdateScheduler().unRegister(self,"general_update")
 
     def unloaded(self):
         """
@@ -471,23 +519,13 @@ class UpdateUsersRas(GeneralUpdateRas):
 
     def _registerEvent(self):
         GeneralUpdateRas._registerEvent(self)
-        
-        class UpdateUserListEvent(periodic_events.PeriodicEvent):
-            def __init__(my_self):
-                periodic_events.PeriodicEvent.__init__(my_self,"%s update userlist"%self.getRasIP(),int(self.getAttribute("update_users_interval")),[],0)
-
-            def run(my_self):
-                self.updateUserList()
-
         if self.getAttribute("online_check"):
-            self.__update_userlist_event=UpdateUserListEvent()
-            periodic_events.getManager().register(self.__update_userlist_event)
+            ras_main.getUpdateScheduler().register(self,"update_userlist",self.updateUserList,int(self.getAttribute("update_users_interval")))
 
     def updateUserList(self):
         pass
     
     def _delEvent(self):
         GeneralUpdateRas._delEvent(self)
-        if self.getAttribute("online_check"):
-            periodic_events.getManager().unRegister(self.__update_userlist_event)
+        ras_main.getUpdateScheduler().unRegister(self,"update_userlist")
             
\ No newline at end of file
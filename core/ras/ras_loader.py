@@ -2,6 +2,7 @@ from core.db import db_main
 from core.ras import ras_main
 from core.ibs_exceptions import *
 from core.errors import errorText
+from core.lib.general import diffDics
 from radius_server.pyrad.server import RemoteHost
 
 class RasLoader:
@@ -10,6 +11,7 @@ class RasLoader:
         self.rases_id={}
         self.rases_description={}
         self.radius_remote_hosts={}
+        self.ras_infos={} #ras_id=>(ras_info,ras_attrs,ports,ippools) of loaded rases, to find changed rases on reload
 
     def __getitem__(self,key):
         return self.getRasByID(key)
@@ -92,8 +94,79 @@ class RasLoader:
         return map(method,self.rases_id.values())
 
     def loadAllRases(self):
-        ras_ids=self.__getAllActiveRasIDs()
-        map(self.loadRas,ras_ids)
+        infos=self.__getRasesInfos("active='t'")
+        for ras_id,info in infos.iteritems():
+            self.keepObj(self.__createRasObj(*info))
+            self.ras_infos[ras_id]=info
+
+    def reloadAllRases(self):
+        """
+            reload active rases from db, rases that their information hasn't been changed are left untouched.
+            Changed rases that handle reload are reloaded in place, so their online users are kept, other changed
+            rases are replaced with new objects.
+            return dic of "added","changed","removed" ras ids
+        """
+        infos=self.__getRasesInfos("active='t'")
+        (added,changed,removed)=diffDics(self.ras_infos,infos)
+
+        old_objs=[]
+        new_objs=[]
+        in_place=[]
+        for ras_id in removed:
+            old_objs.append(self.rases_id[ras_id])
+
+        for ras_id in changed:
+            ras_obj=self.rases_id[ras_id]
+            if ras_obj.handle_reload:
+                in_place.append(ras_obj)
+            else:
+                old_objs.append(ras_obj)
+                new_objs.append(self.__createRasObj(*infos[ras_id]))
+
+        for ras_id in added:
+            new_objs.append(self.__createRasObj(*infos[ras_id]))
+
+        self.__swapObjs(old_objs,new_objs)
+        ras_infos=self.ras_infos.copy()
+        for ras_id in removed:
+            del(ras_infos[ras_id])
+        for ras_id in changed+added:
+            ras_infos[ras_id]=infos[ras_id]
+        self.ras_infos=ras_infos
+
+        for ras_obj in old_objs:
+            ras_obj.unloaded()
+
+        for ras_obj in in_place:
+            ras_obj._reload()
+
+        return {"added":added,"changed":changed,"removed":removed}
+
+    def __swapObjs(self,old_objs,new_objs):
+        """
+            replace "old_objs" with "new_objs" in internal dics. New dics are built aside and replaced at once,
+            so lookups see either old or new rases. Radius remote hosts dic is shared with radius server and
+            is updated in place, new hosts are set before old ones are removed
+        """
+        rases_ip=self.rases_ip.copy()
+        rases_id=self.rases_id.copy()
+        rases_description=self.rases_description.copy()
+        for ras_obj in old_objs:
+            del(rases_ip[ras_obj.getRasIP()])
+            del(rases_id[ras_obj.getRasID()])
+            del(rases_description[ras_obj.getRasDesc()])
+
+        for ras_obj in new_objs:
+            rases_ip[ras_obj.getRasIP()]=ras_obj
+            rases_id[ras_obj.getRasID()]=ras_obj
+            rases_description[ras_obj.getRasDesc()]=ras_obj
+            self.updateRadiusRemoteHost(ras_obj.getRasIP(),ras_obj.getRadiusSecret())
+
+        self.rases_ip,self.rases_id,self.rases_description=rases_ip,rases_id,rases_description
+
+        for ras_obj in old_objs:
+            if not rases_ip.has_key(ras_obj.getRasIP()):
+                del(self.radius_remote_hosts[ras_obj.getRasIP()])
 
     def loadRas(self,ras_id):
         """
@@ -111,11 +184,15 @@ class RasLoader:
         return ras_obj
 
     def getRasInfo(self,ras_id):
-        ras_info=self.__getRasInfoDB(ras_id)
-        ras_attrs=self.__getRasAttrs(ras_id)
-        ports=self.__getRasPorts(ras_id)
-        ippools=self.__getRasIPpools(ras_id)
-        return (ras_info,ras_attrs,ports,ippools)
+        """
+            return (ras_info,ras_attrs,ports,ippools) of ras with id "ras_id" from db
+        """
+        infos=self.__getRasesInfos("ras_id=%s"%ras_id)
+        if not infos.has_key(ras_id):
+            raise GeneralException(errorText("RAS","INVALID_RAS_ID")%ras_id)
+
+        self.ras_infos[ras_id]=infos[ras_id]
+        return infos[ras_id]
 
     def unloadRas(self,ras_id):
         """
@@ -125,68 +202,42 @@ class RasLoader:
         ras_obj=self.getRasByID(ras_id)
         ras_obj.unloaded()
         self.unKeepObj(ras_obj)
+        if self.ras_infos.has_key(ras_id):
+            del(self.ras_infos[ras_id])
     
     def getRadiusRemoteHosts(self):
         return self.radius_remote_hosts
 
-    def __getAllActiveRasIDs(self):
-        """
-            return a list of all ras_id s from table "ras"
-        """
-        ras_ids=db_main.getHandle().get("ras","active='t'",0,-1,"",["ras_id"])
-        return [m["ras_id"] for m in ras_ids]
-            
-    def __getRasIPpools(self,ras_id):
-        """
-            return a list of ras ippool ids in format [pool_id1,pool_id2,..]
-        """
-        ras_ippools_db=self.__getRasIPpoolsDB(ras_id)
-        return [m["ippool_id"] for m in ras_ippools_db]
-        
-    def __getRasIPpoolsDB(self,ras_id):
-        """
-            return a list of ras ippool names from table ras_ippools
-        """
-        return db_main.getHandle().get("ras_ippools", "ras_id=%s"%ras_id, 0, -1, "serial asc")
+    def __getRasesInfos(self,condition):
+        """
+            return a dic of ras_id=>(ras_info,ras_attrs,ports,ippools) for rases matching "condition" on "ras" table
+            ras_info is a dic of ras basic info from table "ras"
+            ras_attrs is a dic of {attr_name:attr_value}
+            ports is a dic of {port_name:{"phone":phone_no,"type":type,"comment":comment}}
+            ippools is a list of ras ippool ids in format [pool_id1,pool_id2,..]
+            each table is read in one query, for all rases
+        """
+        infos={}
+        for ras_info in db_main.getHandle().get("ras",condition):
+            infos[ras_info["ras_id"]]=(ras_info,{},{},[])
 
-    def __getRasPorts(self,ras_id):
-        """
-            return a dic of ports of ras with id "ras_id" in format 
-            {port_name:{"phone":phone_no,"type":type,"comment":comment}
-        """
-        ports={}
-        db_ports=self.__getPortsDB(ras_id)
-        for _dic in db_ports:
-            ports[_dic["port_name"]]=_dic
-        return ports
+        if not infos:
+            return infos
 
-    def __getPortsDB(self,ras_id):
-        """
-            return a list of dics, that returned from db query from table "ras_ports"
-        """
-        return db_main.getHandle().get("ras_ports","ras_id=%s"%ras_id)
+        ras_ids_condition="ras_id in (select ras_id from ras where %s)"%condition
+        for _dic in db_main.getHandle().get("ras_attrs",ras_ids_condition):
+            if infos.has_key(_dic["ras_id"]):
+                infos[_dic["ras_id"]][1][_dic["attr_name"]]=_dic["attr_value"]
 
-    def __getRasInfoDB(self,ras_id):
-        """
-            return a dictionary of ras basic info from table "ras"
-        """
-        return db_main.getHandle().get("ras","ras_id=%s"%ras_id)[0]
+        for _dic in db_main.getHandle().get("ras_ports",ras_ids_condition):
+            if infos.has_key(_dic["ras_id"]):
+                infos[_dic["ras_id"]][2][_dic["port_name"]]=_dic
 
-    def __getRasAttrs(self,ras_id):
-        """
-            return ras attributes in a dic with format {attr_name:attr_value}
-        """
-        attrs={}
-        attrs_db=self.__getRasAttrsDB(ras_id)
-        for _dic in attrs_db:
-            attrs[_dic["attr_name"]]=_dic["attr_value"]
-        return attrs
+        for _dic in db_main.getHandle().get("ras_ippools",ras_ids_condition,0,-1,"ras_id,serial asc"):
+            if infos.has_key(_dic["ras_id"]):
+                infos[_dic["ras_id"]][3].append(_dic["ippool_id"])
 
-    def __getRasAttrsDB(self,ras_id):
-        """
-            return a dic of ras_attributes returned from "ras_attrs" table 
-        """
-        return db_main.getHandle().get("ras_attrs","ras_id=%s"%ras_id)
+        return infos
 
     def __createRasObj(self,ras_info,ras_attrs,ports,ippools):
         """
@@ -10,6 +10,12 @@ def init():
     ras_factory=RasFactory()
 
     loadPlugins(RAS_IMPLEMENTIONS)
+
+    from core.ras.update_scheduler import RasUpdateScheduler
+    from core.event import periodic_events
+    global update_scheduler
+    update_scheduler=RasUpdateScheduler()
+    periodic_events.getManager().register(update_scheduler)
     
     from core.ras.ras_actions import RasActions
     global ras_actions
@@ -39,4 +45,7 @@ def getActionManager():
 
 def getUserMsgDispatcher():
     return user_msg_dispatcher
+
+def getUpdateScheduler():
+    return update_scheduler
     
\ No newline at end of file
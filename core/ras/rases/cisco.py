@@ -133,7 +133,7 @@ class CiscoRas(GeneralUpdateRas, VoIPRas):
 ####################################    
     def updateInOutBytes(self):
         if int(self.getAttribute("cisco_update_inout_with_snmp")):
-            self.updateInOutBytesBySNMP()
+            return self.updateInOutBytesBySNMP()
 
 ####################################
     def isOnline(self,user_msg):
@@ -480,21 +480,40 @@ class CiscoRas(GeneralUpdateRas, VoIPRas):
         self.port_mapping_last_update=0
         
 ########################################
+    IN_BYTES_OID=".1.3.6.1.2.1.2.2.1.16"
+    OUT_BYTES_OID=".1.3.6.1.2.1.2.2.1.10"
+    PORT_MAPPING_OID=".1.3.6.1.2.1.2.2.1.2"
+
     def updateInOutBytesBySNMP(self):
+        """
+            submit inout walks to snmp engine, port mapping is walked too if it's expired
+            return PendingResult of walks
+        """
+        oids=[self.IN_BYTES_OID,self.OUT_BYTES_OID]
+        if self.port_mapping_last_update<=time.time()-60*60*5:#5 hours
+            oids.append(self.PORT_MAPPING_OID)
+
+        return self.snmp_client.walkAsync(oids,self.__inOutsWalked)
+
+    def __inOutsWalked(self,results):
+        """
+            called by snmp engine when inout walks are done
+        """
+        if results==None:
+            return
+
         try:
-            self.__updatePortMapping()
-            port_inout_bytes=self.__createPortInOutBytesDic()
+            if results.has_key(self.PORT_MAPPING_OID):
+                self.__updatePortMapping(results[self.PORT_MAPPING_OID])
+            port_inout_bytes=self.__createPortInOutBytesDic(results[self.IN_BYTES_OID],results[self.OUT_BYTES_OID])
             port_inout_bytes=self._calcRates(self.port_inout_bytes, port_inout_bytes)
             self.port_inout_bytes = port_inout_bytes
-        except SnmpException:
-            if self.DEBUG:
-                logException(LOG_DEBUG)
+        except:
+            logException(LOG_ERROR,"Cisco InOut update")
 
-    def __createPortInOutBytesDic(self):
-        in_bytes_oid=".1.3.6.1.2.1.2.2.1.16"
-        out_bytes_oid=".1.3.6.1.2.1.2.2.1.10"
-        snmp_in_bytes=self.snmp_client.walk(in_bytes_oid)
-        snmp_out_bytes=self.snmp_client.walk(out_bytes_oid)
+    def __createPortInOutBytesDic(self,snmp_in_bytes,snmp_out_bytes):
+        in_bytes_oid=self.IN_BYTES_OID
+        out_bytes_oid=self.OUT_BYTES_OID
 
         if snmp_in_bytes.has_key(in_bytes_oid):
             del(snmp_in_bytes[in_bytes_oid])
@@ -513,11 +532,7 @@ class CiscoRas(GeneralUpdateRas, VoIPRas):
         return inout_bytes
 
 ############################################
-    def __updatePortMapping(self):
-        if self.port_mapping_last_update>time.time()-60*60*5:#5 hours
-            return
-            
-        snmp_mapping=self.snmp_client.walk(".1.3.6.1.2.1.2.2.1.2")
+    def __updatePortMapping(self,snmp_mapping):
         if snmp_mapping:
             (self.port_no_to_desc_mapping,self.port_desc_to_no_mapping)=self.__createPortMappingDic(snmp_mapping)
             self.port_mapping_last_update=time.time()
@@ -14,6 +14,7 @@ class MikrotikRas(GeneralUpdateRas):
                 "mikrotik_snmp_community":"public", 
                 "mikrotik_snmp_timeout":10, 
                 "mikrotik_snmp_retries":3, 
+                "mikrotik_snmp_version":"1", 
                 "mikrotik_snmp_enabled":1, 
                 "mikrotik_ssh_wrapper":"%smikrotik/ssh_wrapper"%defs.IBS_ADDONS, 
                 "mikrotik_ssh_username":"admin", 
@@ -36,7 +37,7 @@ class MikrotikRas(GeneralUpdateRas):
                     int(self.getAttribute("mikrotik_snmp_timeout")), 
                     self.getAttribute("mikrotik_snmp_retries"), 
                     161, 
-                    "1")
+                    self.getAttribute("mikrotik_snmp_version"))
 
     def __createRSHClient(self):
         return RSHClient(self.getRasIP(), 
@@ -74,11 +75,12 @@ class MikrotikRas(GeneralUpdateRas):
         return user_msg["instance_info"]["attrs"]["nas_port_type"]
 
 ####################################    
-    def __getInOuts(self):
-        in_bytes_oid=".1.3.6.1.2.1.2.2.1.16" #IF-MIB::ifInOctets
-        out_bytes_oid=".1.3.6.1.2.1.2.2.1.10" #IF-MIB::ifOutOctets
-        snmp_in_bytes=self.snmp_client.walk(in_bytes_oid)
-        snmp_out_bytes=self.snmp_client.walk(out_bytes_oid)
+    IN_BYTES_OID=".1.3.6.1.2.1.2.2.1.16" #IF-MIB::ifInOctets
+    OUT_BYTES_OID=".1.3.6.1.2.1.2.2.1.10" #IF-MIB::ifOutOctets
+
+    def __createInOuts(self, snmp_in_bytes, snmp_out_bytes):
+        in_bytes_oid=self.IN_BYTES_OID
+        out_bytes_oid=self.OUT_BYTES_OID
 
         if snmp_in_bytes.has_key(in_bytes_oid):
             del(snmp_in_bytes[in_bytes_oid])
@@ -97,14 +99,23 @@ class MikrotikRas(GeneralUpdateRas):
 
     def updateInOutBytes(self):
         if int(self.getAttribute("mikrotik_snmp_enabled")):
-            try:
-                inouts=self.__getInOuts()
-            except:
-                logException(LOG_ERROR, "Mikrotik Ras")
-                return
+            return self.snmp_client.walkAsync([self.IN_BYTES_OID, self.OUT_BYTES_OID], self.__inOutsWalked)
+
+    def __inOutsWalked(self, results):
+        """
+            called by snmp engine when inout walks are done
+        """
+        if results == None:
+            return
+
+        try:
+            inouts=self.__createInOuts(results[self.IN_BYTES_OID], results[self.OUT_BYTES_OID])
+        except:
+            logException(LOG_ERROR, "Mikrotik Ras")
+            return
             
-            inouts=self._calcRates(self.inouts, inouts)
-            self.inouts=inouts
+        inouts=self._calcRates(self.inouts, inouts)
+        self.inouts=inouts
 ####################################
     def isOnline(self, user_msg):
         return self.onlines.has_key(user_msg["port"]) and self.onlines[user_msg["port"]]["last_update"] >= \
@@ -11,7 +11,8 @@ def init():
 class PortMasterRas(UpdateUsersRas):
     type_attrs={"portmaster_snmp_community":"public",
                 "portmaster_snmp_timeout":10,
-                "portmaster_snmp_retries":3}
+                "portmaster_snmp_retries":3,
+                "portmaster_snmp_version":"1"}
 
     def init(self):
 
@@ -25,7 +26,7 @@ class PortMasterRas(UpdateUsersRas):
                     int(self.getAttribute("portmaster_snmp_timeout")),
                     int(self.getAttribute("portmaster_snmp_retries")),
                     161,
-                    "1")
+                    self.getAttribute("portmaster_snmp_version"))
 
 ####################################
     def killUser(self,user_msg):
@@ -36,16 +37,24 @@ class PortMasterRas(UpdateUsersRas):
             logException(LOG_ERROR)
 
 ####################################
+    LISTUSERS_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.4"
+    INBYTES_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.17"
+    OUTBYTES_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.16"
+
     def updateUserList(self):
-        self.onlines = self.getOnlineUsers()
+        return self.snmp_client.walkAsync([self.LISTUSERS_OID], self.__userListWalked)
 
-    def getOnlineUsers(self):
+    def __userListWalked(self, results):
         """
-            return a dic of port=>username
+            called by snmp engine when user list walk is done
         """
-        LISTUSERS_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.4"
-        snmp_ret = self.snmp_client.walk(LISTUSERS_OID)
+        if results != None:
+            self.onlines = self.getOnlineUsers(results[self.LISTUSERS_OID])
 
+    def getOnlineUsers(self, snmp_ret):
+        """
+            return a dic of port=>username
+        """
         onlines={}
         for oid in snmp_ret:
             port = self.__getPortFromOid(oid)
@@ -55,21 +64,29 @@ class PortMasterRas(UpdateUsersRas):
                 
         return onlines
 
-    def __getPortFromOID(self, oid):
+    def __getPortFromOid(self, oid):
         return str(int(oid[oid.rfind(".")+1:])-1) #magic!
 ####################################    
     def updateInOutBytes(self):
-        inouts = self.__getInOutBySnmp()
-        inouts = self._calcRates(self.inouts, inouts)
-        self.inouts = inouts
+        return self.snmp_client.walkAsync([self.INBYTES_OID, self.OUTBYTES_OID], self.__inOutsWalked)
 
-    def __getInOutBySnmp(self):
-        INBYTES_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.17"
-        OUTBYTES_OID = ".1.3.6.1.4.1.307.3.2.1.1.1.16"
+    def __inOutsWalked(self, results):
+        """
+            called by snmp engine when inout walks are done
+        """
+        if results == None:
+            return
 
-        in_snmp_ret = self.snmp_client.walk(INBYTES_OID)
-        out_snmp_ret = self.snmp_client.walk(OUTBYTES_OID)
+        try:
+            inouts = self.__getInOutBySnmp(results[self.INBYTES_OID], results[self.OUTBYTES_OID])
+        except:
+            logException(LOG_ERROR, "PortMaster Ras")
+            return
+
+        inouts = self._calcRates(self.inouts, inouts)
+        self.inouts = inouts
 
+    def __getInOutBySnmp(self, in_snmp_ret, out_snmp_ret):
         inouts={}
         for oid in in_snmp_ret:
             inouts[self.__getPortFromOid(oid)] = {"in_bytes":in_snmp_ret[oid]}
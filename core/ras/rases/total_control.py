@@ -14,6 +14,7 @@ class TotalControlRas(GeneralUpdateRas):
     type_attrs={"tc_snmp_community":"public",
                 "tc_snmp_timeout":10,
                 "tc_snmp_retries":3,
+                "tc_snmp_version":"1",
                 "tc_inout_use_snmp":1,
                 "tc_update_accounting_interval":1}
 
@@ -33,7 +34,7 @@ class TotalControlRas(GeneralUpdateRas):
                     self.getAttribute("tc_snmp_timeout"),
                     self.getAttribute("tc_snmp_retries"),
                     161,
-                    1)
+                    self.getAttribute("tc_snmp_version"))
 
 ################################################## kill user
     def killUser(self,user_msg):
@@ -54,11 +55,12 @@ class TotalControlRas(GeneralUpdateRas):
 
 ###################################
 
-    def __getInOuts(self):
-        in_bytes_oid=".1.3.6.1.2.1.2.2.1.16" #IF-MIB::ifInOctets
-        out_bytes_oid=".1.3.6.1.2.1.2.2.1.10" #IF-MIB::ifOutOctets
-        snmp_in_bytes=self.snmp_client.walk(in_bytes_oid)
-        snmp_out_bytes=self.snmp_client.walk(out_bytes_oid)
+    IN_BYTES_OID=".1.3.6.1.2.1.2.2.1.16" #IF-MIB::ifInOctets
+    OUT_BYTES_OID=".1.3.6.1.2.1.2.2.1.10" #IF-MIB::ifOutOctets
+
+    def __createInOuts(self, snmp_in_bytes, snmp_out_bytes):
+        in_bytes_oid=self.IN_BYTES_OID
+        out_bytes_oid=self.OUT_BYTES_OID
 
         if snmp_in_bytes.has_key(in_bytes_oid):
             del(snmp_in_bytes[in_bytes_oid])
@@ -78,9 +80,18 @@ class TotalControlRas(GeneralUpdateRas):
     def updateInOutBytes(self):
         if not int(self.getAttribute("tc_inout_use_snmp")):
             return
+
+        return self.snmp_client.walkAsync([self.IN_BYTES_OID, self.OUT_BYTES_OID], self.__inOutsWalked)
+
+    def __inOutsWalked(self, results):
+        """
+            called by snmp engine when inout walks are done
+        """
+        if results == None:
+            return
         
         try:
-            inouts=self.__getInOuts()
+            inouts=self.__createInOuts(results[self.IN_BYTES_OID], results[self.OUT_BYTES_OID])
         except:
             logException(LOG_ERROR,"Total Control Ras")
             return
@@ -0,0 +1,197 @@
+from core.event import periodic_events
+from core.threadpool import thread_main
+from core.stats import stat_main
+from core.user import user_main
+from core.ibs_exceptions import *
+from core.lib.general import PendingResult
+from core import defs
+import threading
+import random
+import time
+
+class RasUpdateJob:
+    def __init__(self, ras_obj, name, method, interval):
+        """
+            ras_obj(Ras instance): ras this job belongs to
+            name(str): name of job, ex. "general_update"
+            method(callable): method that will be called periodically, if it returns a PendingResult
+                              run is finished when the result is done
+            interval(int): seconds between runs
+        """
+        self.ras_obj = ras_obj
+        self.name = name
+        self.method = method
+        self.interval = interval
+
+        self.next_run = time.time() + random.uniform(0, interval) #spread first runs over the interval
+        self.running = False
+        self.run_start = None #start time of current run
+        self.run_id = 0 #incremented on each run, so a late finish of a timed out run is ignored
+        self.pending = False #current run returned a PendingResult and waits for it
+        self.overrun = False #run was still in progress when job was due again
+        self.failures = 0 #consecutive failures, used for back off
+
+        self.lag_stat = "ras_%s_%s_lag"%(ras_obj.getRasIP(), name)
+        self.duration_stat = "ras_%s_%s_duration"%(ras_obj.getRasIP(), name)
+
+    def getKey(self):
+        return (self.ras_obj.getRasID(), self.name)
+
+    def scheduleNext(self, failed):
+        """
+            set next run time of job. Failed jobs are backed off exponentially
+        """
+        if failed:
+            self.failures += 1
+            delay = self.interval * min(2 ** self.failures, defs.RAS_UPDATE_MAX_BACKOFF)
+        else:
+            self.failures = 0
+            delay = self.interval
+
+        jitter = delay * defs.RAS_UPDATE_JITTER
+        self.next_run = max(self.next_run + delay, time.time()) + random.uniform(-jitter, jitter)
+
+class RasUpdateScheduler(periodic_events.PeriodicEvent):
+    """
+        Run periodic updates of all rases from one periodic event. Updates are spread over their interval
+        with jitter, so they don't all fire on the same boundary. When more updates are due at once, rases
+        with more online users run first. Updates that time out, fail or are still running when they're due again
+        are backed off.
+    """
+    def __init__(self):
+        periodic_events.PeriodicEvent.__init__(self, "Ras Update Scheduler", defs.RAS_UPDATE_SCHEDULER_TICK, [], 0)
+        self.jobs = {} #(ras_id, name) => RasUpdateJob
+        self.lock = threading.RLock()
+
+        stat_main.getStatKeeper().registerStat("ras_update_skipped", "int")
+        stat_main.getStatKeeper().registerStat("ras_update_backoffs", "int")
+
+    def register(self, ras_obj, name, method, interval):
+        """
+            register method of ras_obj to be called every "interval" seconds. A previous registration of ras_obj
+            with the same name is replaced
+        """
+        job = RasUpdateJob(ras_obj, name, method, interval)
+        self.lock.acquire()
+        try:
+            self.__removeJob(job.getKey())
+            self.jobs[job.getKey()] = job
+        finally:
+            self.lock.release()
+
+        stat_main.getStatKeeper().registerStat(job.lag_stat, "seconds")
+        stat_main.getStatKeeper().registerStat(job.duration_stat, "seconds")
+
+    def unRegister(self, ras_obj, name):
+        self.lock.acquire()
+        try:
+            self.__removeJob((ras_obj.getRasID(), name))
+        finally:
+            self.lock.release()
+
+    def __removeJob(self, key):
+        if key in self.jobs:
+            job = self.jobs.pop(key)
+            stat_main.getStatKeeper().unRegisterStat(job.lag_stat)
+            stat_main.getStatKeeper().unRegisterStat(job.duration_stat)
+
+    ##########################
+    def run(self):
+        now = time.time()
+        self.lock.acquire()
+        try:
+            due_jobs = filter(lambda job:job.next_run <= now, self.jobs.values())
+        finally:
+            self.lock.release()
+
+        if len(due_jobs) > 1:
+            onlines_count = user_main.getOnline().getOnlinesCountByRas()
+            due_jobs.sort(lambda job1, job2:cmp(onlines_count.get(job2.ras_obj.getRasID(), 0),
+                                                onlines_count.get(job1.ras_obj.getRasID(), 0)))
+
+        self.__timeOutPendingJobs(now)
+
+        for job in due_jobs:
+            if job.running: #previous run hasn't finished yet, it's backed off when it finishes
+                if not job.overrun:
+                    stat_main.getStatKeeper().inc("ras_update_skipped")
+                    job.overrun = True
+                continue
+
+            job.running = True
+            job.run_start = time.time()
+            job.run_id += 1
+            job.pending = False
+            thread_main.runThread(self.__runJob, [job, job.run_id, job.next_run], "event")
+
+    def __timeOutPendingJobs(self, now):
+        """
+            finish runs that wait for a PendingResult longer than their budget as failed, so a result
+            that is never done doesn't stop updates of ras
+        """
+        self.lock.acquire()
+        try:
+            timed_out = filter(lambda job:job.pending and now - job.run_start > job.interval * defs.RAS_UPDATE_BUDGET,
+                               self.jobs.values())
+        finally:
+            self.lock.release()
+
+        for job in timed_out: #logged as taking more than budget by __jobDone
+            self.__jobDone(job, job.run_id, True)
+
+    def __runJob(self, job, run_id, scheduled_time):
+        self.lock.acquire()
+        try:
+            if self.__isRegistered(job):
+                stat_main.getStatKeeper().setValue(job.lag_stat, job.run_start - scheduled_time)
+        finally:
+            self.lock.release()
+
+        try:
+            result = job.method()
+        except:
+            logException(LOG_ERROR, "Ras %s %s"%(job.ras_obj.getRasIP(), job.name))
+            self.__jobDone(job, run_id, True)
+            return
+
+        if isinstance(result, PendingResult):
+            job.pending = True
+            result.addDoneCallback(lambda failed:self.__jobDone(job, run_id, failed))
+        else:
+            self.__jobDone(job, run_id, False)
+
+    def __isRegistered(self, job):
+        """
+            return True if job hasn't been unregistered or replaced, should be called with lock held
+        """
+        return self.jobs.get(job.getKey()) is job
+
+    def __jobDone(self, job, run_id, failed):
+        """
+            called when a run of job is finished, this is the only place job is rescheduled
+            finish of a run that has been already finished (timed out) is ignored
+        """
+        self.lock.acquire()
+        try:
+            if not job.running or job.run_id != run_id:
+                return
+
+            job.running = False
+            job.pending = False
+            if not self.__isRegistered(job): #ras has been unregistered, its stats are removed
+                return
+
+            duration = time.time() - job.run_start
+            stat_main.getStatKeeper().setValue(job.duration_stat, duration)
+            if duration > job.interval * defs.RAS_UPDATE_BUDGET:
+                job.ras_obj.toLog("%s took %.2f seconds, more than its budget"%(job.name, duration), LOG_ERROR)
+                failed = True
+
+            if failed or job.overrun:
+                stat_main.getStatKeeper().inc("ras_update_backoffs")
+                job.scheduleNext(True)
+            else:
+                job.scheduleNext(False)
+            job.overrun = False
+        finally:
+            self.lock.release()
@@ -13,6 +13,7 @@ from core.errors import errorText
 from core.db import db_main
 from core.group import group_main
 import types
+import re
 
 class ConnectionLogSearchTable(SearchTable):
     def __init__(self):
@@ -41,80 +42,159 @@ class ConnectionSearchHelper(SearchHelper):
                                                      {"connection_log":ConnectionLogSearchTable(),
                                                     "connection_log_details":ConnectionLogDetailsSearchTable()})
 
-    def getConnectionLogs(self,_from,to,order_by,desc,date_type):
+    def getConnectionLogs(self,_from,to,order_by,desc,date_type,cursor=None):
+        """
+            cursor(str or None): if set, return connections after the row that cursor points to, instead of
+                                 skipping "_from" rows. Connections should be ordered by login_time
+            return (total_rows,total_credit_used,total_duration,total_in,total_out,total_rows_estimated,report)
+        """
+        if cursor!=None:
+            self.__parseCursor(cursor)
+            _from,to=0,to-_from
+
         if self.getTable("connection_log_details").getRootGroup().isEmpty():
-            return self._getConnectionLogsByDirectQuery(_from,to,order_by,desc,date_type)
+            return self._getConnectionLogsByDirectQuery(_from,to,order_by,desc,date_type,cursor)
         else:
-            return self._getConnectionLogsByTempTable(_from,to,order_by,desc,date_type)
+            return self._getConnectionLogsByTempTable(_from,to,order_by,desc,date_type,cursor)
 
 
-    def _getConnectionLogsByDirectQuery(self, _from,to,order_by,desc,date_type):
+    def _getConnectionLogsByDirectQuery(self, _from,to,order_by,desc,date_type,cursor):
         """
             get connection logs by directly query the table 
             this is faster than creating temp table, but possible if we have only
             conditions from connection_log table
         """
         conditions = self.getTable("connection_log").getRootGroup().getConditionalClause()
-        total_rows = self.__directQueryGetTotalResultsCount(conditions)
-        if total_rows==0:
-            return (0,0,"00:00:00",0,0,[])
-            
-        total_credit_used = self.__directQueryGetTotalCreditUsed(conditions)
-        total_duration = self.__directQueryGetTotalDuration(conditions)
-        total_in, total_out = self.__directQueryGetTotalInOuts(conditions)
+        if not conditions:
+            conditions = "true"
+
+        estimate = self.hasCondFor("estimate_total_rows") and not self.__totalsRequested()
+        if estimate:
+            total_rows = self.__directQueryEstimateResultsCount(conditions)
+            total_credit_used, total_duration, total_in, total_out = -1, -1, -1, -1
+        else:
+            (total_rows, total_credit_used, total_duration, total_in, total_out) = \
+                    self.__getTotals(db_main.getHandle(),
+                                     "connection_log where %s"%conditions,
+                                     "select connection_log_id from connection_log where %s"%conditions)
+            if total_rows==0:
+                return (0,0,"00:00:00",0,0,False,[])
 
-        connections=self.__directQueryGetConnections(conditions,_from,to,order_by,desc)
+        connections=self.__directQueryGetConnections(conditions,_from,to,order_by,desc,cursor)
         connection_details=self.__getConnectionDetails(db_main.getHandle(),connections)
             
-        return (total_rows, total_credit_used, total_duration, total_in, total_out, 
+        return (total_rows, total_credit_used, total_duration, total_in, total_out, estimate,
                 self.__createReportResult(connections,connection_details,date_type))
         
-    def __directQueryGetConnections(self,conditions,_from,to,order_by,desc):
+    def __directQueryGetConnections(self,conditions,_from,to,order_by,desc,cursor):
+        if cursor!=None:
+            conditions = "(%s) and %s"%(conditions, self.__cursorCondition(cursor,desc))
+
         return db_main.getHandle().get("connection_log",
                              conditions,
                              _from,
                              to,
-                             (order_by,desc),
+                             self.__orderBy(order_by,desc),
                              ["*",
                               "extract(epoch from logout_time-login_time) as duration_seconds"
                              ]
                             )
 
-    def __directQueryGetTotalResultsCount(self, conditions):
-        return db_main.getHandle().getCount("connection_log", conditions)
+    def __directQueryEstimateResultsCount(self, conditions):
+        """
+            return planner estimate of rows matching "conditions", it's based on table statistics and doesn't scan
+            the table, so it may be far from exact count
+        """
+        plan = db_main.getHandle().selectQuery("explain select connection_log_id from connection_log where %s"%conditions)
+        match = re.search(r"rows=(\d+)", plan[0]["QUERY PLAN"])
+        if match == None:
+            return -1
+        return long(match.group(1))
 
-    def __directQueryGetTotalCreditUsed(self, conditions):
-        if self.hasCondFor("show_total_credit_used"):
-            return db_main.getHandle().get("connection_log",conditions,0,-1,"",["sum(credit_used) as sum"])[0]["sum"]
-        return -1
+    #################################################### cursor pagination
+    cursor_pattern = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d+)?),(\d+)$")
 
-    def __directQueryGetTotalDuration(self, conditions):
-        if self.hasCondFor("show_total_duration"):
-            return db_main.getHandle().get("connection_log",conditions,0,-1,"",["extract(epoch from sum(logout_time-login_time)) as sum"])[0]["sum"]
-        return -1
+    def __cursorCondition(self, cursor, desc):
+        """
+            return condition that selects rows after "cursor" in (login_time,connection_log_id) order
+            login_time is compared alone too, so index of login_time can be used
+        """
+        (login_time, connection_log_id) = self.__parseCursor(cursor)
+        login_time = dbText(login_time)
+        if desc:
+            op = "<"
+        else:
+            op = ">"
 
-    def __directQueryGetTotalInOuts(self, conditions):
-        if self.hasCondFor("show_total_inouts"):
-            return self.__getTotalInOutsFromTable(db_main.getHandle(), "connection_log", conditions)
-        return -1, -1
+        return "connection_log.login_time %s= %s and (connection_log.login_time %s %s or connection_log.connection_log_id %s %s)"% \
+                (op, login_time, op, login_time, op, connection_log_id)
+
+    def __parseCursor(self, cursor):
+        """
+            return (login_time,connection_log_id) that "cursor" points to, raise a GeneralException if it's invalid
+        """
+        match = self.cursor_pattern.match(cursor)
+        if match == None:
+            raise GeneralException(errorText("REPORTS","INVALID_CURSOR")%cursor)
+
+        return (match.group(1), match.group(3))
+
+    def __orderBy(self, order_by, desc):
+        """
+            rows ordered by login_time are ordered by connection_log_id too, so rows with same login_time have
+            a fixed order, same as the order cursors use
+        """
+        if order_by != "login_time":
+            return (order_by, desc)
+
+        if desc:
+            return "connection_log.login_time desc,connection_log.connection_log_id desc"
+        return "connection_log.login_time asc,connection_log.connection_log_id asc"
+
+    def getNextCursor(self, report, page_size, order_by):
+        """
+            return cursor pointing to last row of "report", or an empty string if there's no more rows or
+            report is not ordered by login_time
+        """
+        if order_by != "login_time" or not report or len(report) < page_size:
+            return ""
+
+        return "%s,%s"%(report[-1]["login_time"], report[-1]["connection_log_id"])
 
     #################################################### shared functions
-    def __getTotalInOutsFromTable(self, db_handle, table_name, cond="true"):
+    def __totalsRequested(self):
+        return self.hasCondFor("show_total_credit_used") or self.hasCondFor("show_total_duration") or \
+               self.hasCondFor("show_total_inouts")
+
+    def __getTotals(self, db_handle, from_clause, ids_query):
         """
-            return a tuple of (total_in, total_out) by querying connection_log_ids from "table_name" using condition "cond"
+            return (total_rows, total_credit_used, total_duration, total_in, total_out) in one aggregate query.
+            totals that are not requested are -1
+            from_clause(str): tables and condition of connection_log rows, placed after "from"
+            ids_query(str): query that selects connection_log_id of rows, used to sum in/out bytes in details
         """
-        if not cond:
-            cond = "true"
-            
-        query = "select sum(value::bigint) as sum from connection_log_details where name='%s' and connection_log_id in (select %s.connection_log_id from %s where %s)"
-        total_in = db_handle.selectQuery(query%("bytes_in", table_name, table_name, cond))[0]["sum"]
-        total_out = db_handle.selectQuery(query%("bytes_out", table_name, table_name, cond))[0]["sum"]
-        
+        totals = ["count(*) as total_rows"]
+        if self.hasCondFor("show_total_credit_used"):
+            totals.append("sum(credit_used) as total_credit_used")
+
+        if self.hasCondFor("show_total_duration"):
+            totals.append("extract(epoch from sum(logout_time-login_time)) as total_duration")
+
+        query = "select * from (select %s from %s) as totals"%(",".join(totals), from_clause)
+        if self.hasCondFor("show_total_inouts"):
+            query += ",(select sum(case when name='bytes_in' then value::bigint else 0 end) as total_in, \
+                               sum(case when name='bytes_out' then value::bigint else 0 end) as total_out \
+                        from connection_log_details where name in ('bytes_in','bytes_out') and \
+                        connection_log_id in (%s)) as inouts"%ids_query
+
+        row = db_handle.selectQuery(query)[0]
+
+        total_in, total_out = row.get("total_in", -1), row.get("total_out", -1)
         if total_in == None or total_out == None:
             total_in = 0
             total_out = 0
 
-        return total_in, total_out
+        return (row["total_rows"], row.get("total_credit_used", -1), row.get("total_duration", -1), total_in, total_out)
         
     def __createReportResult(self,connections,connection_details,date_type):
         details_dic=self.__convertConnectionDetailsToDic(connection_details)
@@ -173,7 +253,7 @@ class ConnectionSearchHelper(SearchHelper):
         return details
 
     ##########################################################################
-    def _getConnectionLogsByTempTable(self, _from,to,order_by,desc,date_type):
+    def _getConnectionLogsByTempTable(self, _from,to,order_by,desc,date_type,cursor):
         """
             temp table creation is more expensive but required if we have conditions
             on multiple tables
@@ -181,14 +261,14 @@ class ConnectionSearchHelper(SearchHelper):
         db_handle=db_main.getHandle(True)
         try:
             self.__createTempTable(db_handle)
-            total_rows=self.__tempTableGetTotalResultsCount(db_handle)
+            (total_rows, total_credit_used, total_duration, total_in, total_out) = \
+                    self.__getTotals(db_handle,
+                                     "connection_log,connection_log_report where connection_log.connection_log_id=connection_log_report.connection_log_id",
+                                     "select connection_log_report.connection_log_id from connection_log_report")
             if total_rows==0:
-                return (0,0,"00:00:00",0,0,[])
+                return (0,0,"00:00:00",0,0,False,[])
                 
-            total_credit_used = self.__tempTableGetTotalCreditUsed(db_handle)
-            total_duration = self.__tempTableGetTotalDuration(db_handle)
-            total_in, total_out = self.__tempTableGetTotalInOuts(db_handle)
-            connections = self.__tempTableGetConnections(db_handle,_from,to,order_by,desc)
+            connections = self.__tempTableGetConnections(db_handle,_from,to,order_by,desc,cursor)
             connection_details = self.__getConnectionDetails(db_handle,connections)
         finally:
             try:
@@ -198,16 +278,20 @@ class ConnectionSearchHelper(SearchHelper):
                 
             db_handle.releaseHandle()
             
-        return (total_rows, total_credit_used, total_duration, total_in, total_out, 
+        return (total_rows, total_credit_used, total_duration, total_in, total_out, False,
                 self.__createReportResult(connections,connection_details,date_type))
 
 
-    def __tempTableGetConnections(self,db_handle,_from,to,order_by,desc):
+    def __tempTableGetConnections(self,db_handle,_from,to,order_by,desc,cursor):
+        conditions = "connection_log.connection_log_id in (select connection_log_report.connection_log_id from connection_log_report)"
+        if cursor!=None:
+            conditions += " and %s"%self.__cursorCondition(cursor,desc)
+
         return db_handle.get("connection_log",
-                             "connection_log.connection_log_id in (select connection_log_report.connection_log_id from connection_log_report)",
+                             conditions,
                              _from,
                              to,
-                             (order_by,desc),
+                             self.__orderBy(order_by,desc),
                              ["*",
                               "extract(epoch from logout_time-login_time) as duration_seconds"
                              ]
@@ -217,26 +301,6 @@ class ConnectionSearchHelper(SearchHelper):
         select_query=self.__createConnectionLogIDsQuery()
         self.createTempTableAsQuery(db_handle,"connection_log_report",select_query)
 
-    def __tempTableGetTotalResultsCount(self,db_handle):
-        return db_handle.getCount("connection_log_report","true")
-
-    def __tempTableGetTotalCreditUsed(self,db_handle):
-        if self.hasCondFor("show_total_credit_used"):
-            return db_handle.selectQuery("select sum(credit_used) as sum from connection_log,connection_log_report where \
-                                           connection_log.connection_log_id=connection_log_report.connection_log_id")[0]["sum"]
-        return -1
-
-    def __tempTableGetTotalDuration(self,db_handle):
-        if self.hasCondFor("show_total_duration"):
-            return db_handle.selectQuery("select extract(epoch from sum(logout_time-login_time)) as sum from connection_log,connection_log_report where \
-                                           connection_log.connection_log_id=connection_log_report.connection_log_id")[0]["sum"]
-        return -1
-
-    def __tempTableGetTotalInOuts(self,db_handle):
-        if self.hasCondFor("show_total_inouts"):
-            return self.__getTotalInOutsFromTable(db_handle, "connection_log_report", "true")
-        return -1, -1
-    
     def __createConnectionLogIDsQuery(self):
         return self.createGetIDQuery("select connection_log_id from connection_log")
 
@@ -546,26 +610,35 @@ class ConnectionSearcher(BaseConnectionLogSearcher):
         con_details_table.exactSearch(self.search_helper, "station_ip", "station_ip", MultiStr)
               
     #################################################
-    def getConnectionLog(self,_from,to,order_by,desc,date_type):
+    def getConnectionLog(self,_from,to,order_by,desc,date_type,cursor=None):
         """
             if total_credit or total_duration is smaller thatn 0, then it was not requested by caller, so we didn't
                 calculate em
+            cursor(str or None): next_cursor of previous page, to get next page without skipping "_from" rows.
+                                 order_by should be login_time
+            if "estimate_total_rows" is in conditions and no total is requested, total_rows is estimated from
+                table statistics, and total_rows_estimated is True
         """
         
-        self.__getConnectionLogCheckInput(_from,to,order_by,desc)
+        self.__getConnectionLogCheckInput(_from,to,order_by,desc,cursor)
         self.applyConditions()
-        (total_rows,total_credit,total_duration,total_in,total_out,report)=self.search_helper.getConnectionLogs(_from,to,order_by,desc,date_type)
+        (total_rows,total_credit,total_duration,total_in,total_out,total_rows_estimated,report)= \
+                            self.search_helper.getConnectionLogs(_from,to,order_by,desc,date_type,cursor)
         return {"total_rows":total_rows,
+                "total_rows_estimated":total_rows_estimated,
                 "total_credit":total_credit,
                 "total_duration":total_duration,
                 "total_in_bytes":float(total_in),
                 "total_out_bytes":float(total_out),
-                "report":report
+                "report":report,
+                "next_cursor":self.search_helper.getNextCursor(report,to-_from,order_by)
                }
 
-    def __getConnectionLogCheckInput(self,_from,to,order_by,desc):
+    def __getConnectionLogCheckInput(self,_from,to,order_by,desc,cursor):
         report_lib.checkFromTo(_from,to)
         self.__checkOrderBy(order_by)
+        if cursor!=None and order_by!="login_time":
+            raise GeneralException(errorText("REPORTS","CURSOR_NEEDS_LOGIN_TIME_ORDER"))
         
     def __checkOrderBy(self,order_by):
         if order_by not in ["user_id","credit_used","login_time","logout_time","successful","service","ras_id"]:
@@ -1,10 +1,21 @@
-from core.user import user_main
+from core.user import user_main, online_store
 from core.ras import ras_main
+from core.group import group_main
+from core.admin import admin_main
 from core.ibs_exceptions import *
 from core.errors import errorText
 from core.lib.sort import SortedList
 from core.lib.date import *
 
+NORMAL_SORT_BYS=["user_id","normal_username","login_time_epoch","duration_secs","ras_description",
+                 "ras_ip","owner_name","unique_id_val","current_credit","group_name",
+                 "attrs_remote_ip","in_bytes","out_bytes","in_rate",
+                 "out_rate","attrs_mac","attrs_station_ip","attrs_caller_id"]
+
+VOIP_SORT_BYS=["user_id","voip_username","login_time_epoch","duration_secs","ras_ip","ras_description",
+               "owner_name","unique_id_val","current_credit","called_number",
+               "prefix_name","group_name","attrs_caller_id","attrs_caller_ip","attrs_called_ip"]
+
 def getFormattedOnlineUsers(date_type, onlines_filter):
     """
         return a list of online user dics. format is (normal_list, voip_list)
@@ -24,23 +35,7 @@ def getFormattedOnlineUsers(date_type, onlines_filter):
                 if not onlines_filter.filter(user_obj, instance):
                     continue
                 
-                instance_info=user_obj.getInstanceInfo(instance)
-                report_dic={"user_id":user_obj.getUserID(),
-                         "service":user_obj.getType(),
-                         "ras_ip":ras_main.getLoader().getRasByID(instance_info["ras_id"]).getRasIP(),
-                         "ras_description":ras_main.getLoader().getRasByID(instance_info["ras_id"]).getRasDesc(),
-                         "unique_id":instance_info["unique_id"],
-                         "unique_id_val":instance_info["unique_id_val"],
-                         "login_time":AbsDateFromEpoch(user_obj.getTypeObj().getLoginTime(instance)).getDate(date_type),
-                         "login_time_epoch":user_obj.getTypeObj().getLoginTime(instance),
-                         "duration_secs":time.time()-user_obj.getTypeObj().getLoginTime(instance),
-                         "attrs":instance_info["attrs"],
-                         "owner_id":user_obj.getLoadedUser().getBasicUser().getOwnerObj().getAdminID(),
-                         "owner_name":user_obj.getLoadedUser().getBasicUser().getOwnerObj().getUsername(),
-                         "current_credit":user_obj.calcCurrentCredit(),
-                         "group_name":user_obj.getLoadedUser().getBasicUser().getGroupObj().getGroupName()
-                         }
-                report_dic.update(user_obj.getTypeObj().getOnlineReportDic(instance))
+                report_dic=_createReportDic(user_obj, instance, date_type)
 
                 if user_obj.getType() == "VoIP":
                     voip_onlines.append(report_dic)
@@ -52,6 +47,29 @@ def getFormattedOnlineUsers(date_type, onlines_filter):
 
     return (normal_onlines, voip_onlines)
 
+def _createReportDic(user_obj, instance, date_type):
+    """
+        return report dic of "instance" of user_obj
+    """
+    instance_info=user_obj.getInstanceInfo(instance)
+    report_dic={"user_id":user_obj.getUserID(),
+                "service":user_obj.getType(),
+                "ras_ip":ras_main.getLoader().getRasByID(instance_info["ras_id"]).getRasIP(),
+                "ras_description":ras_main.getLoader().getRasByID(instance_info["ras_id"]).getRasDesc(),
+                "unique_id":instance_info["unique_id"],
+                "unique_id_val":instance_info["unique_id_val"],
+                "login_time":AbsDateFromEpoch(user_obj.getTypeObj().getLoginTime(instance)).getDate(date_type),
+                "login_time_epoch":user_obj.getTypeObj().getLoginTime(instance),
+                "duration_secs":time.time()-user_obj.getTypeObj().getLoginTime(instance),
+                "attrs":instance_info["attrs"],
+                "owner_id":user_obj.getLoadedUser().getBasicUser().getOwnerObj().getAdminID(),
+                "owner_name":user_obj.getLoadedUser().getBasicUser().getOwnerObj().getUsername(),
+                "current_credit":user_obj.calcCurrentCredit(),
+                "group_name":user_obj.getLoadedUser().getBasicUser().getGroupObj().getGroupName()
+                }
+    report_dic.update(user_obj.getTypeObj().getOnlineReportDic(instance))
+    return report_dic
+
 def sortOnlineUsers(normal_onlines, voip_onlines, normal_sort_by, voip_sort_by):
     """
         sort online normal_onlines and voip_onlines, based on normal_sort_by and voip_sort_by
@@ -63,17 +81,8 @@ def sortOnlineUsers(normal_onlines, voip_onlines, normal_sort_by, voip_sort_by):
         if sort_by is invalid or empty, default "login_time_epoch" is used
         if sort_by starts with attrs it means we should sort by one of instance attributes
     """
-    normal_sort_by_list=["user_id","normal_username","login_time_epoch","duration_secs","ras_description",
-                         "ras_ip","owner_name","unique_id_val","current_credit","group_name",
-                         "attrs_remote_ip","in_bytes","out_bytes","in_rate",
-                         "out_rate","attrs_mac","attrs_station_ip","attrs_caller_id"]
-
-    voip_sort_by_list=["user_id","voip_username","login_time_epoch","duration_secs","ras_ip","ras_description",
-                       "owner_name","unique_id_val","current_credit","called_number",
-                       "prefix_name","group_name","attrs_caller_id","attrs_caller_ip","attrs_called_ip"]
-
-    return (_sortOnlines(normal_onlines, normal_sort_by[0], normal_sort_by[1], normal_sort_by_list),
-            _sortOnlines(voip_onlines, voip_sort_by[0], voip_sort_by[1], voip_sort_by_list))
+    return (_sortOnlines(normal_onlines, normal_sort_by[0], normal_sort_by[1], NORMAL_SORT_BYS),
+            _sortOnlines(voip_onlines, voip_sort_by[0], voip_sort_by[1], VOIP_SORT_BYS))
 
 def _sortOnlines(list, sort_by, desc, valid_sortbys):
     """
@@ -93,4 +102,126 @@ def _sortOnlines(list, sort_by, desc, valid_sortbys):
     else:
         sorted_list.sortByValueDicKey(sort_by, desc)
         
-    return sorted_list.getList()
\ No newline at end of file
+    return sorted_list.getList()
+
+def getOnlineUsersPage(service, sort_by, desc, conds, _from, to, date_type):
+    """
+        return (total_rows, list of online user dics) of "service" onlines that match conds, sorted by sort_by.
+        only rows _from to "to" are formatted, so in/out bytes and credit are calculated for them only
+        service(str): "Normal" or "VoIP"
+        sort_by(str): one of NORMAL_SORT_BYS or VOIP_SORT_BYS, default "login_time_epoch" is used if it's invalid
+        conds(dic): can contain "ras_ips", "username_starts_with", "group_names", "owner_names" and
+                    "owner_ids", all conditions should match
+    """
+    if service == "VoIP":
+        service_code, valid_sortbys = online_store.SERVICE_VOIP, VOIP_SORT_BYS
+    else:
+        service_code, valid_sortbys = online_store.SERVICE_NORMAL, NORMAL_SORT_BYS
+
+    if sort_by in ("","login_time"):
+        sort_by="login_time_epoch"
+    elif sort_by not in valid_sortbys:
+        toLog("getOnlineUsersPage: Invalid sort by %s %s"%(sort_by,valid_sortbys),LOG_DEBUG)
+        sort_by="login_time_epoch"
+
+    if sort_by in ("normal_username","voip_username"):
+        sort_by="username"
+    elif sort_by == "duration_secs":
+        sort_by, desc = "login_time_epoch", not desc
+
+    session_index=user_main.getOnline().getSessionIndex()
+    filters=_createIndexFilters(conds)
+    if session_index.isSortable(service_code, sort_by):
+        total_rows, global_unique_ids=session_index.getPage(service_code, sort_by, desc, filters, _from, to)
+    else:
+        global_unique_ids=session_index.filterSessions(service_code, filters)
+        total_rows=len(global_unique_ids)
+        global_unique_ids=_sortSessions(global_unique_ids, sort_by, desc)[_from:to]
+
+    report=[]
+    for (ras_id,unique_id) in global_unique_ids:
+        try:
+            user_obj, instance = _getUserAndInstance(ras_id, unique_id)
+            if instance == None: #logged out after sort
+                continue
+            report.append(_createReportDic(user_obj, instance, date_type))
+        except:
+            logException(LOG_DEBUG)
+
+    return (total_rows, report)
+
+def _createIndexFilters(conds):
+    """
+        convert report conditions to OnlineSessionIndex filters
+    """
+    filters={}
+    if conds.has_key("ras_ips"):
+        filters["ras_id"]=map(lambda ras_ip:ras_main.getLoader().getRasByIP(ras_ip).getRasID(), conds["ras_ips"])
+
+    if conds.has_key("group_names"):
+        filters["group_id"]=map(lambda group_name:group_main.getLoader().getGroupByName(group_name).getGroupID(),
+                                conds["group_names"])
+
+    if conds.has_key("owner_names"):
+        filters["owner_id"]=map(lambda owner_name:admin_main.getLoader().getAdminByName(owner_name).getAdminID(),
+                                conds["owner_names"])
+
+    if conds.has_key("owner_ids"):
+        if filters.has_key("owner_id"):
+            filters["owner_id"]=filter(lambda owner_id:owner_id in conds["owner_ids"], filters["owner_id"])
+        else:
+            filters["owner_id"]=conds["owner_ids"]
+
+    if conds.has_key("username_starts_with"):
+        filters["username_prefix"]=conds["username_starts_with"]
+
+    return filters
+
+def _getUserAndInstance(ras_id, unique_id):
+    """
+        return (user_obj, instance) of online session, instance is None if session is not online
+    """
+    user_obj=user_main.getOnline().getUserObjByUniqueID(ras_id, unique_id)
+    if user_obj == None:
+        return (None, None)
+    return (user_obj, user_obj.getInstanceFromUniqueID(ras_id, unique_id))
+
+def _sortSessions(global_unique_ids, sort_by, desc):
+    """
+        sort global unique ids of sessions by sort_by, that is not sortable by OnlineSessionIndex
+        in/out bytes and rates are taken from OnlineSessionStore, other values are read from sessions
+    """
+    if sort_by in ("in_bytes","out_bytes","in_rate","out_rate"):
+        keys, column = user_main.getOnline().getSessionStore().getColumns("keys", sort_by)
+        values=dict(zip(keys, column))
+        get_value=lambda global_unique_id:values.get(global_unique_id)
+    else:
+        credits={} #user_id=>credit, credit of each user is calculated once
+        get_value=lambda global_unique_id:_getSortValue(global_unique_id, sort_by, credits)
+
+    sort_list=map(lambda global_unique_id:(get_value(global_unique_id), global_unique_id), global_unique_ids)
+    sort_list.sort()
+    if desc:
+        sort_list.reverse()
+    return map(lambda x:x[1], sort_list)
+
+def _getSortValue(global_unique_id, sort_by, credits):
+    try:
+        user_obj, instance = _getUserAndInstance(*global_unique_id)
+        if instance == None:
+            return None
+
+        if sort_by == "login_time_epoch":
+            return user_obj.getTypeObj().getLoginTime(instance)
+        elif sort_by == "current_credit":
+            if not credits.has_key(user_obj.getUserID()):
+                credits[user_obj.getUserID()]=user_obj.calcCurrentCredit()
+            return credits[user_obj.getUserID()]
+
+        attrs=user_obj.getInstanceInfo(instance)["attrs"]
+        if sort_by.startswith("attrs_"):
+            return attrs.get(sort_by[6:])
+        return attrs.get(sort_by, "N/A") #called_number and prefix_name of voip onlines
+    except:
+        logException(LOG_DEBUG)
+        return None
@@ -5,12 +5,14 @@ from core.errors import errorText
 from core.report import online,connection,credit,audit_log,admin_deposit_change_log
 from core.lib.date import RelativeDate
 from core.lib import report_lib
+from core.lib.general import to_str
 from core.report import report_main, onlines_filter
 
 class ReportHandler(handler.Handler):
     def __init__(self):
         handler.Handler.__init__(self,"report")
-        self.registerHandlerMethod("getOnlineUsers")
+        self.registerHandlerMethod("getOnlineUsers",cache_ttl=3)
+        self.registerHandlerMethod("getOnlineUsersPage",cache_ttl=3)
 
         self.registerHandlerMethod("getConnections")
         self.registerHandlerMethod("getDurations")
@@ -57,6 +59,31 @@ class ReportHandler(handler.Handler):
             voip_onlines=filter(lambda online_dic:online_dic["owner_id"]==requester.getAdminID(),voip_onlines)
 
         return (normal_onlines, voip_onlines)
+
+    def getOnlineUsersPage(self,request):
+        """
+            return online users of one service, filtered and sorted on server, only rows _from to "to" are returned
+            return value is (total_rows, list of online user dics)
+        """
+        request.needAuthType(request.ADMIN)
+        request.checkArgs("service", "sort_by", "desc", "conds", "from", "to")
+        requester=request.getAuthNameObj()
+        if requester.hasPerm("SEE ONLINE USERS"):
+            admin_perm_obj=requester.getPerms()["SEE ONLINE USERS"]
+        elif requester.isGod():
+            admin_perm_obj=None
+        else:
+            raise GeneralException(errorText("GENERAL","ACCESS_DENIED"))
+
+        report_lib.checkFromTo(request["from"], request["to"])
+        conds=report_lib.fixConditionsDic(request["conds"])
+        if conds.has_key("owner_ids"):
+            del(conds["owner_ids"])
+        if admin_perm_obj!=None and admin_perm_obj.isRestricted():
+            conds["owner_ids"]=[requester.getAdminID()]
+
+        return online.getOnlineUsersPage(request["service"], request["sort_by"], request["desc"], conds,
+                                         request["from"], request["to"], request.getDateType())
         
     #############################################
     def getConnections(self,request):
@@ -74,7 +101,12 @@ class ReportHandler(handler.Handler):
         
         searcher=connection.ConnectionSearcher(conds,requester,role)
         
-        connections = searcher.getConnectionLog(request["from"],request["to"],request["sort_by"],request["desc"],request.getDateType())
+        if request.has_key("cursor") and request["cursor"]:
+            cursor=to_str(request["cursor"],"cursor")
+        else:
+            cursor=None
+
+        connections = searcher.getConnectionLog(request["from"],request["to"],request["sort_by"],request["desc"],request.getDateType(),cursor)
         
         if role == "user":
             connections = self.__filterConnectionsForUser(connections)
@@ -1,5 +1,7 @@
-from core.ibs_exceptions import toLog, LOG_DEBUG
+from core.ibs_exceptions import toLog, logException, LOG_DEBUG, LOG_ERROR
 import os
+import StringIO
+import subprocess
 from core import defs
 
 class ScriptLauncher:
@@ -11,6 +13,13 @@ class ScriptLauncher:
     """
     
     DEBUG=False
+
+    def __init__(self, daemon=None):
+        """
+            daemon(LauncherDaemon instance or None): if set, scripts are run by launcher daemon helper
+                                                     instead of a shell and script_wrapper per call
+        """
+        self.daemon=daemon
     
     def system(self, script, args, timeout=20):
         """
@@ -18,14 +27,76 @@ class ScriptLauncher:
             args(list of str): A List of arguments.
             WARNING: Do now pass multiple arguments as a single string
         """
+        result=self.__launchWithDaemon("system", script, args, timeout)
+        if result!=None:
+            return result["exit_code"] << 8 #same as os.system
+
         return self.__launchWithScriptWrapper(os.system, script, args, timeout, ">/dev/null 2>/dev/null")
     
     def popen(self, script, args, timeout=20):
+        result=self.__launchWithDaemon("popen", script, args, timeout)
+        if result!=None:
+            return StringIO.StringIO(result["output"])
+
         return self.__launchWithScriptWrapper(os.popen, script, args, timeout, "2>&1")
 
     def popen3(self, script, args, timeout=20):
+        result=self.__launchWithDaemon("popen3", script, args, timeout)
+        if result!=None:
+            return StringIO.StringIO(), StringIO.StringIO(result["output"]), StringIO.StringIO(result["error"])
+
         return self.__launchWithScriptWrapper(os.popen3, script, args, timeout)
 
+    def launch(self, script, args, callback, timeout=20, mode="system"):
+        """
+            run "script" asynchronously, callback will be called with a result dictionary containing
+            exit_code, output, error and timed_out keys.
+            Launcher daemon should be enabled, otherwise script is run synchronously in the caller thread
+        """
+        if self.daemon!=None:
+            try:
+                return self.daemon.launch(mode, self.__getArgv(script, args), timeout, callback)
+            except:
+                logException(LOG_ERROR, "Script Launcher")
+
+        if mode=="system":
+            result={"exit_code":self.system(script, args, timeout) >> 8, "output":"", "error":""}
+        elif mode=="popen":
+            result=self.__launchWithScriptWrapper(self.__runChild, script, args, timeout, "2>&1")
+        else:
+            result=self.__launchWithScriptWrapper(self.__runChild, script, args, timeout)
+        result["timed_out"]=False
+        callback(result)
+
+    def __runChild(self, cmd):
+        """
+            run cmd in a shell and wait for it, return result dictionary with its exit code and outputs
+        """
+        proc=subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=True)
+        output, error = proc.communicate()
+        return {"exit_code":proc.returncode, "output":output, "error":error}
+
+    def __launchWithDaemon(self, mode, script, args, timeout):
+        """
+            run script with launcher daemon and return result dictionary
+            return None if daemon is disabled or job couldn't be sent, so caller falls back to script wrapper
+        """
+        if self.daemon==None:
+            return None
+
+        if self.DEBUG:
+            toLog("Script Launcher Daemon is running %s %s"%(script, args), LOG_DEBUG)
+
+        try:
+            return self.daemon.run(mode, self.__getArgv(script, args), timeout)
+        except:
+            logException(LOG_ERROR, "Script Launcher")
+            return None
+
+    def __getArgv(self, script, args):
+        #script may contain extra arguments. ex. ssh cache tc
+        return script.split() + map(str, args)
+
     def __launchWithScriptWrapper(self, method, script, args, timeout, shell_pipes=""):
         #script may contain extra arguments. ex. ssh cache tc
         sp = script.split()
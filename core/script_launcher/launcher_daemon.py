@@ -0,0 +1,151 @@
+import subprocess
+import threading
+import cPickle
+import sys
+
+from core.ibs_exceptions import *
+from core.stats import stat_main
+from core import defs
+from core import main
+
+class LauncherDaemonException(Exception):
+    pass
+
+class LauncherDaemon:
+    """
+        Client of addons/script_wrapper/launcher_daemon.py helper process.
+        Jobs are written to helper stdin and results are read back by a reader thread, that calls
+        job callbacks. Helper spawns targets directly with argv and enforces timeouts itself.
+    """
+    def __init__(self,jobs):
+        """
+            jobs(int): number of jobs helper runs concurrently
+        """
+        self.jobs=jobs
+        self.proc=None
+        self.pending={} #job_id=>callback
+        self.last_job_id=0
+        self.lock=threading.RLock()
+
+    def start(self):
+        self.proc=subprocess.Popen([sys.executable,"%s/script_wrapper/launcher_daemon.py"%defs.IBS_ADDONS,"-j",str(self.jobs)],
+                                   stdin=subprocess.PIPE,stdout=subprocess.PIPE,close_fds=True)
+        #reader lives as long as helper, so it runs in its own thread instead of taking a slot of thread wrappers
+        thread=threading.Thread(target=self.__readResults,args=(self.proc,),name="launcher daemon reader")
+        thread.setDaemon(True)
+        thread.start()
+
+    def stop(self):
+        self.lock.acquire()
+        try:
+            proc,self.proc=self.proc,None
+        finally:
+            self.lock.release()
+
+        if proc!=None:
+            proc.stdin.close()
+
+    ##############################
+    def launch(self,mode,argv,timeout,callback):
+        """
+            launch argv asynchronously, callback will be called with result dictionary
+            mode(str): "system", "popen" or "popen3"
+            argv(list of str): program and its arguments
+            timeout(int): seconds before helper kills the program
+            callback(callable): called from reader thread with result dic containing
+                                exit_code, output, error and timed_out keys
+            return id of launched job
+        """
+        self.lock.acquire()
+        try:
+            if self.proc==None:
+                raise LauncherDaemonException("Launcher daemon is not running")
+
+            self.last_job_id+=1
+            job_id=self.last_job_id
+            self.pending[job_id]=callback
+            data=cPickle.dumps({"id":job_id,"argv":argv,"timeout":timeout,"mode":mode},2)
+            try:
+                self.proc.stdin.write("%d\n%s"%(len(data),data))
+                self.proc.stdin.flush()
+            except IOError,e:
+                del(self.pending[job_id])
+                raise LauncherDaemonException("Can't send job to launcher daemon: %s"%e)
+        finally:
+            self.lock.release()
+
+        stat_main.getStatKeeper().inc("script_launcher_launches")
+        return job_id
+
+    def run(self,mode,argv,timeout):
+        """
+            launch argv and wait for its result, return result dictionary
+        """
+        event=threading.Event()
+        result={}
+        def callback(_result):
+            result.update(_result)
+            event.set()
+
+        job_id=self.launch(mode,argv,timeout,callback)
+        event.wait(timeout+5)
+        if not event.isSet():
+            self.lock.acquire()
+            try:
+                self.pending.pop(job_id,None)
+            finally:
+                self.lock.release()
+            toLog("Launcher daemon didn't answer in time for %s"%argv[0],LOG_ERROR)
+            return {"id":job_id,"exit_code":255,"output":"","error":"","timed_out":True}
+        return result
+
+    ##############################
+    def __readResults(self,proc):
+        while True:
+            try:
+                length_line=proc.stdout.readline()
+                if not length_line:
+                    break
+                result=cPickle.loads(proc.stdout.read(int(length_line)))
+            except:
+                logException(LOG_ERROR,"Launcher Daemon Reader")
+                break
+
+            self.lock.acquire()
+            try:
+                callback=self.pending.pop(result["id"],None)
+            finally:
+                self.lock.release()
+
+            if result["timed_out"]:
+                stat_main.getStatKeeper().inc("script_launcher_timeouts")
+
+            self.__callCallback(callback,result)
+
+        self.__helperExited(proc)
+
+    def __callCallback(self,callback,result):
+        if callback!=None:
+            try:
+                callback(result)
+            except:
+                logException(LOG_ERROR,"Launcher Daemon Callback")
+
+    def __helperExited(self,proc):
+        """
+            fail pending jobs of exited helper and restart it, unless we're stopped
+        """
+        proc.wait()
+        self.lock.acquire()
+        try:
+            pending,self.pending=self.pending,{}
+            restart=self.proc==proc and not main.isShuttingDown()
+            if restart:
+                toLog("Launcher daemon exited with code %s, restarting"%proc.returncode,LOG_ERROR)
+                self.start()
+        finally:
+            self.lock.release()
+
+        for job_id in pending:
+            self.__callCallback(pending[job_id],
+                                {"id":job_id,"exit_code":254,"output":"","error":"launcher daemon exited","timed_out":False})
@@ -1,9 +1,50 @@
 from core.script_launcher.launcher import ScriptLauncher
+from core.stats import stat_main
+from core.event import periodic_events
+from core.ibs_exceptions import *
+from core import defs
+import time
+
+launcher_daemon = None
 
 def init():
-    global script_launcher
-    script_launcher = ScriptLauncher()
+    global script_launcher, launcher_daemon
+    launcher_daemon = None
+
+    if defs.SCRIPT_LAUNCHER_DAEMON:
+        stat_main.getStatKeeper().registerStat("script_launcher_launches", "int")
+        stat_main.getStatKeeper().registerStat("script_launcher_launches_per_second", "int")
+        stat_main.getStatKeeper().registerStat("script_launcher_timeouts", "int")
+
+        from core.script_launcher.launcher_daemon import LauncherDaemon
+        try:
+            launcher_daemon = LauncherDaemon(defs.SCRIPT_LAUNCHER_DAEMON_JOBS)
+            launcher_daemon.start()
+        except:
+            logException(LOG_ERROR, "Can't start launcher daemon, using script wrapper")
+            launcher_daemon = None
+        else:
+            periodic_events.getManager().register(UpdateLaunchRate())
 
+    script_launcher = ScriptLauncher(launcher_daemon)
+
+def shutdown():
+    if launcher_daemon != None:
+        launcher_daemon.stop()
 
 def getLauncher():
     return script_launcher
+
+class UpdateLaunchRate(periodic_events.PeriodicEvent):
+    def __init__(self):
+        periodic_events.PeriodicEvent.__init__(self, "Script Launcher Update Launch Rate", 10, [], 0)
+        self.last_launches = 0
+        self.last_time = time.time()
+
+    def run(self):
+        now = time.time()
+        launches = stat_main.getStatKeeper().getValue("script_launcher_launches")
+        stat_main.getStatKeeper().setValue("script_launcher_launches_per_second",
+                                           int(round((launches - self.last_launches) / max(now - self.last_time, 1))))
+        self.last_launches = launches
+        self.last_time = now
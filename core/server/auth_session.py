@@ -0,0 +1,69 @@
+from core.ibs_exceptions import *
+from core.errors import errorText
+from core import defs
+import hashlib
+import base64
+import hmac
+import time
+import os
+
+def init():
+    global session_tokens
+    session_tokens=SessionTokens()
+
+def getSessionTokens():
+    return session_tokens
+
+def constantTimeEquals(a,b):
+    """
+        compare two strings, in a time that doesn't depend on position of first difference
+    """
+    if hasattr(hmac,"compare_digest"):
+        return hmac.compare_digest(a,b)
+
+    if len(a)!=len(b):
+        return False
+    result=0
+    for x,y in zip(a,b):
+        result|=ord(x)^ord(y)
+    return result==0
+
+class SessionTokens:
+    """
+        Create and verify session tokens of server requests. A token is signed with HMAC of auth type, name,
+        expiration time, client remote address and stored password of requester, so it's only valid from the
+        same address and until password changes. Tokens are signed with a random key, created on each start
+    """
+    def __init__(self):
+        self.key=os.urandom(32)
+
+    def createToken(self,auth_type,auth_name,remote_addr,stored_password):
+        """
+            return (token,expiration epoch) of a new session token
+            stored_password(str): password of requester as stored in ibs, md5 crypted or plain text
+        """
+        expire=long(time.time()+defs.SERVER_SESSION_TTL)
+        payload="\n".join((auth_type,auth_name,str(expire)))
+        return ("%s.%s"%(base64.urlsafe_b64encode(payload),self.__sign(payload,remote_addr,stored_password)),expire)
+
+    def checkToken(self,token,auth_type,auth_name,remote_addr,stored_password):
+        """
+            raise a LoginException if token is not a valid token of auth_type and auth_name from remote_addr
+        """
+        try:
+            encoded_payload,signature=str(token).split(".",1)
+            payload=base64.urlsafe_b64decode(encoded_payload)
+            token_auth_type,token_auth_name,expire=payload.split("\n")
+            expire=long(expire)
+        except (ValueError,TypeError,AttributeError):
+            raise LoginException(errorText("GENERAL","INVALID_SESSION"))
+
+        valid=constantTimeEquals(signature,self.__sign(payload,remote_addr,stored_password))
+        if not valid or token_auth_type!=auth_type or token_auth_name!=auth_name:
+            raise LoginException(errorText("GENERAL","INVALID_SESSION"))
+
+        if expire<time.time():
+            raise LoginException(errorText("GENERAL","SESSION_EXPIRED"))
+
+    def __sign(self,payload,remote_addr,stored_password):
+        return hmac.new(self.key,"\n".join((payload,remote_addr,stored_password)),hashlib.sha256).hexdigest()
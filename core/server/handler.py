@@ -11,6 +11,7 @@ class Handler: #ABSTRACT
     def __init__(self,handler_name):
         self.__handler_name=handler_name
         self.__handler_methods=[]
+        self.__cache_ttls={} #method_name=>seconds responses are cached
      
     def getHandlerName(self):
         """
@@ -27,10 +28,21 @@ class Handler: #ABSTRACT
         return self.__handler_methods
 
 
-    def registerHandlerMethod(self,method_name):
+    def registerHandlerMethod(self,method_name,cache_ttl=0):
         """
             register a new method into this handler
+            cache_ttl(int): if not zero, responses of method are cached for cache_ttl seconds and
+                            shared between same requests of a requester. Only read only methods
+                            that can return a few seconds old results should set it
         """
         if method_name in self.__handler_methods:
             raise HandlerException("Duplicate registration of method %s"%method_name)
         self.__handler_methods.append(method_name)
+        if cache_ttl:
+            self.__cache_ttls[method_name]=cache_ttl
+
+    def getCacheTTL(self,method_name):
+        """
+            return seconds that responses of method_name are cached, or zero if they are not cached
+        """
+        return self.__cache_ttls.get(method_name,0)
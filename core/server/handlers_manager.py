@@ -1,6 +1,7 @@
 from core.ibs_exceptions import *
 from core.errors import errorText
 from core.lib.general import *
+from core import defs
 
 
 def init():
@@ -12,10 +13,11 @@ def getManager():
 
 class HandlersManager:
     def __init__(self):
-        from core.server import request,response
+        from core.server import request,response,response_cache
         self.__handler_instances={}
         self.request=request
         self.response=response
+        self.response_cache=response_cache.ResponseCache()
 
     def handlerRegistered(self, name):
         """
@@ -45,19 +47,42 @@ class HandlersManager:
             self.__checkMethod(handler_obj,method)
             request_obj=self.__createRequestObj(handler_obj,method,params,client_address)
             self.__checkAuthentication(request_obj)
-            ret_val=self.__run(request_obj)
-            return self.__returnResponse(ret_val)
+            return self.__runAndReturn(request_obj)
+        except:
+            self.__returnError(self.__getErrorText("dispatch"))
+
+    def dispatchSubRequest(self,request_obj,method_name,params):
+        """
+            run "method_name" with "params" on behalf of requester of request_obj, that is already authenticated
+            return return value of method, or a fault dic with faultCode and faultString if it failed
+        """
+        try:
+            handler_name,method=self.__parseMethodName(method_name)
+            handler_obj=self.__getHandlerObj(handler_name)
+            self.__checkMethod(handler_obj,method)
+            if handler_obj==request_obj.handler_obj and method==request_obj.method:
+                raise HandlerException("Nested call of --%s--"%method_name)
+            return self.__runAndReturn(request_obj.createSubRequest(handler_obj,method,params))
+        except:
+            return {"faultCode":1,"faultString":self.__getErrorText("dispatchSubRequest")}
+
+    def __getErrorText(self,log_context):
+        """
+            return error text of exception being handled, that should be returned to client
+        """
+        try:
+            raise
         except (GeneralException,LoginException,PermissionException),e:
-            self.__returnError(e.__str__())
+            return e.__str__()
         except DBException,e:
-            self.__returnError(e.__str__().split("\n")[0])
+            return e.__str__().split("\n")[0]
         except Exception,e:
-            logException(LOG_ERROR,"dispatch")
-            self.__returnError(e.__str__())
+            logException(LOG_ERROR,log_context)
+            return e.__str__()
         except:
-            logException(LOG_ERROR,"dispatch")
-            self.__returnError(errorText("GENERAL","INTERNAL_ERROR"))
-        
+            logException(LOG_ERROR,log_context)
+            return errorText("GENERAL","INTERNAL_ERROR")
+
 
     def __checkMethod(self,handler_obj,method):
         """
@@ -100,6 +125,20 @@ class HandlersManager:
         """
         request_obj.authenticate()
 
+    def __runAndReturn(self,request_obj):
+        """
+            run request handler and return its response, response is taken from cache if handler method
+            registered with a cache ttl
+        """
+        cache_ttl=request_obj.handler_obj.getCacheTTL(request_obj.method)
+        if cache_ttl and defs.SERVER_RESPONSE_CACHE:
+            key=self.response_cache.createKey(request_obj)
+            if key!=None:
+                return self.response_cache.getResponse(key,cache_ttl,
+                                                       lambda:self.__returnResponse(self.__run(request_obj)))
+
+        return self.__returnResponse(self.__run(request_obj))
+
     def __run(self,request_obj):
         """
             run request handler
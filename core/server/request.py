@@ -3,7 +3,9 @@ from core.lib.general import *
 from core.lib.password_lib import Password
 from core.errors import errorText
 from core.server.response import Response
+from core.server import auth_session
 import types
+import copy
 from core.admin import admin_main
 from core.user import user_main
 
@@ -58,6 +60,23 @@ class Request:
         self.authenticated=1
 
 
+    def createSubRequest(self,handler_obj,method,params):
+        """
+            return a request to call "method" of handler_obj with "params", on behalf of requester of this
+            request. Used to run calls of a multicall without authenticating each of them
+            params(dic): arguments of call, authentication arguments are ignored
+        """
+        sub_request=copy.copy(self)
+        sub_request.handler_obj=handler_obj
+        sub_request.method=method
+        sub_request.params=params.copy()
+        for key in ("auth_name","auth_pass","auth_session","auth_type","auth_remoteaddr"):
+            if sub_request.params.has_key(key):
+                del(sub_request.params[key])
+        if self.params.has_key("auth_remoteaddr"):
+            sub_request.params["auth_remoteaddr"]=self.params["auth_remoteaddr"]
+        return sub_request
+
     def getResponse(self):
         """
             return a response obj
@@ -144,23 +163,65 @@ class Request:
             check for auth_type auth_name and auth_pass in params
         """
         self.auth_name=self.params["auth_name"]
-        self.auth_pass=Password(self.params["auth_pass"])
         self.auth_type=self.params["auth_type"]
-        del(self.params["auth_name"],self.params["auth_pass"],self.params["auth_type"])
+        del(self.params["auth_name"],self.params["auth_type"])
+        if self.params.has_key("auth_session"): #session token, returned by login.createSession, instead of password
+            self.auth_session=self.params["auth_session"]
+            self.auth_pass=None
+            del(self.params["auth_session"])
+        else:
+            self.auth_session=None
+            self.auth_pass=Password(self.params["auth_pass"])
+            del(self.params["auth_pass"])
 
     def __checkAdminAuth(self):
         """
             check authentication for admins
         """
         admin_obj=admin_main.getLoader().getAdminByName(self.auth_name)
-        admin_obj.checkServerAuth(self.auth_pass,self.getRemoteAddr())
+        if self.auth_session!=None:
+            self.__checkSession(admin_obj.getPassword().getPassword())
+            admin_obj.checkServerSessionAuth(self.getRemoteAddr())
+        else:
+            admin_obj.checkServerAuth(self.auth_pass,self.getRemoteAddr())
         self.auth_name_obj=admin_obj
     
     def __checkNormalUserAuth(self):
-        self.auth_name_obj=user_main.getServerAuth().checkAuth(self.auth_name,self.auth_pass,self.auth_type)
+        self.__checkUserAuth()
 
     def __checkVoipUserAuth(self):
-        self.auth_name_obj=user_main.getServerAuth().checkAuth(self.auth_name,self.auth_pass,self.auth_type)
+        self.__checkUserAuth()
+
+    def __checkUserAuth(self):
+        if self.auth_session!=None:
+            loaded_user,user_password=user_main.getServerAuth().getUserAndPassword(self.auth_name,self.auth_type)
+            self.__checkSession(user_password)
+            self.auth_name_obj=loaded_user
+        else:
+            self.auth_name_obj=user_main.getServerAuth().checkAuth(self.auth_name,self.auth_pass,self.auth_type)
+
+    def __checkSession(self,stored_password):
+        """
+            check session token of request, raise a LoginException if it's invalid
+            stored_password(str): password of requester as stored in ibs
+        """
+        auth_session.getSessionTokens().checkToken(self.auth_session,self.auth_type,self.auth_name,
+                                                   self.getRemoteAddr(),stored_password)
+
+    def createSession(self):
+        """
+            create a session token for requester of this request, that can be used instead of password in next
+            requests from the same remote address. return (token,expiration epoch)
+        """
+        if self.auth_type==self.ADMIN:
+            stored_password=self.auth_name_obj.getPassword().getPassword()
+        elif self.auth_type in (self.NORMAL_USER,self.VOIP_USER):
+            stored_password=user_main.getServerAuth().getUserAndPassword(self.auth_name,self.auth_type)[1]
+        else:
+            self.raiseAccessDenied()
+
+        return auth_session.getSessionTokens().createToken(self.auth_type,self.auth_name,
+                                                           self.getRemoteAddr(),stored_password)
 
     def __checkMailAuth(self):
         pass
@@ -0,0 +1,135 @@
+from core.ibs_exceptions import *
+from core.stats import stat_main
+from core import defs
+import threading
+import types
+import sys
+import time
+
+class Flight:
+    """
+        a computation of a cache key in progress, requests with same key wait for it
+    """
+    def __init__(self):
+        self.event=threading.Event()
+        self.value=None
+        self.exc_info=None
+
+class ResponseCache:
+    """
+        Short lived cache of handler responses, for handler methods that registered with a cache ttl.
+        Responses are keyed by method, normalized params and requester, and concurrent requests
+        with same key share one computation. Errors are not cached
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.entries={} #key=>(expire_time,response)
+        self.flights={} #key=>Flight
+
+    def getResponse(self,key,ttl,compute_method):
+        """
+            return cached response of key, or call compute_method and cache its return value for "ttl" seconds
+            if another request is computing key, wait for it and return its response
+        """
+        self.lock.acquire()
+        try:
+            try:
+                expire_time,response=self.entries[key]
+                if expire_time>time.time():
+                    stat_main.getStatKeeper().inc("server_cache_hits")
+                    return response
+                del(self.entries[key])
+            except KeyError:
+                pass
+
+            try:
+                flight=self.flights[key]
+                leader=False
+            except KeyError:
+                flight=self.flights[key]=Flight()
+                leader=True
+        finally:
+            self.lock.release()
+
+        if leader:
+            stat_main.getStatKeeper().inc("server_cache_misses")
+            return self.__compute(key,ttl,flight,compute_method)
+
+        stat_main.getStatKeeper().inc("server_cache_shared")
+        flight.event.wait()
+        if flight.exc_info!=None:
+            raise flight.exc_info[0],flight.exc_info[1],flight.exc_info[2]
+        return flight.value
+
+    def __compute(self,key,ttl,flight,compute_method):
+        try:
+            try:
+                flight.value=compute_method()
+            except:
+                flight.exc_info=sys.exc_info()
+                raise
+
+            self.lock.acquire()
+            try:
+                if len(self.entries)>=defs.SERVER_RESPONSE_CACHE_SIZE:
+                    self.__removeExpired()
+                self.entries[key]=(time.time()+ttl,flight.value)
+            finally:
+                self.lock.release()
+
+            return flight.value
+        finally:
+            self.lock.acquire()
+            try:
+                del(self.flights[key])
+            finally:
+                self.lock.release()
+            flight.event.set()
+
+    def __removeExpired(self):
+        """
+            remove expired entries, or all entries if none was expired
+            should be called with lock held
+        """
+        now=time.time()
+        for key,(expire_time,response) in self.entries.items():
+            if expire_time<=now:
+                del(self.entries[key])
+
+        if len(self.entries)>=defs.SERVER_RESPONSE_CACHE_SIZE:
+            self.entries={}
+
+    ######################################
+    def createKey(self,request_obj):
+        """
+            return cache key of request, requests with same key get same response, or None if params
+            are not hashable. key contains requester, so permission checks of handler are done once per
+            requester and ttl
+        """
+        params=request_obj.params.copy()
+        if params.has_key("auth_remoteaddr"):
+            del(params["auth_remoteaddr"])
+
+        key=(request_obj.handler_obj.getHandlerName(),
+             request_obj.method,
+             request_obj.auth_type,
+             request_obj.auth_name,
+             self.__normalize(params))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def __normalize(self,value):
+        """
+            return a hashable value equal for equal params, dics are converted to sorted tuple of items
+            and lists to tuples
+        """
+        if type(value)==types.DictType:
+            items=map(lambda (key,val):(key,self.__normalize(val)),value.iteritems())
+            items.sort()
+            return tuple(items)
+        elif type(value) in (types.ListType,types.TupleType):
+            return tuple(map(self.__normalize,value))
+        return value
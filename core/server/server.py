@@ -1,13 +1,15 @@
-from core.server import handlers_manager,xmlrpcserver
+from core.server import handlers_manager,xmlrpcserver,auth_session
 from core.threadpool import thread_main
 from core.stats import stat_main
 from core import defs
-import xmlrpclib
 
 def init():
     global server, server_started
     server_started = False
     handlers_manager.init()
+    auth_session.init()
+    from core.server.system_handler import SystemHandler
+    handlers_manager.getManager().registerHandler(SystemHandler())
     server=xmlrpcserver.XMLRPCServer((defs.IBS_SERVER_IP,defs.IBS_SERVER_PORT))
     
 def startServer():
@@ -15,6 +17,9 @@ def startServer():
     stat_main.getStatKeeper().registerStat("server_avg_response_time", "seconds")    
     stat_main.getStatKeeper().registerStat("server_max_response_time", "seconds")
     stat_main.getStatKeeper().registerStat("server_total_requests", "int")
+    stat_main.getStatKeeper().registerStat("server_cache_hits", "int")
+    stat_main.getStatKeeper().registerStat("server_cache_misses", "int")
+    stat_main.getStatKeeper().registerStat("server_cache_shared", "int")
 
     global server_started
     server_started = True
@@ -25,8 +30,4 @@ def shutdown():
     if not server_started:
         return
         
-    try:
-        server=xmlrpclib.ServerProxy("http://%s:%s"%(defs.IBS_SERVER_IP,defs.IBS_SERVER_PORT))
-        getattr(server,"exit")()
-    except:
-        pass
+    server.stop()
@@ -0,0 +1,73 @@
+from core.server import handler,handlers_manager
+from core.ibs_exceptions import *
+from core.errors import errorText
+from core.lib.general import *
+from core.db import db_main
+
+class SystemHandler(handler.Handler):
+    #methods that can run in an atomic multicall. Their changes are only in database and user/admin objects
+    #that are reloaded when transaction ends
+    ATOMIC_METHODS=("user.updateUserAttrs","user.changeCredit")
+
+    def __init__(self):
+        handler.Handler.__init__(self,"system")
+        self.registerHandlerMethod("multicall")
+
+    def multicall(self,request):
+        """
+            run multiple calls, requester is authenticated once for all of them
+            return list of return values of calls, failed calls have a dic with faultCode and faultString
+            instead of return value
+
+            calls(list): list of dics in format {"methodName":method name, "params":dic of call arguments}
+                         authentication arguments of calls are ignored
+            atomic(bool): optional, if true all calls run in one database transaction, and calls stop on first
+                          failed call and transaction is rolled back, so all calls fail together. Only methods in
+                          ATOMIC_METHODS are allowed
+        """
+        request.checkArgs("calls")
+        calls=requestDicToList(request["calls"])
+        atomic=request.has_key("atomic") and request["atomic"]
+        for call in calls:
+            if type(call)!=types.DictType or not call.has_key("methodName") or not call.has_key("params"):
+                request.raiseIncompleteRequest("methodName/params")
+            if atomic and call["methodName"] not in self.ATOMIC_METHODS:
+                raise GeneralException(errorText("GENERAL","INVALID_ATOMIC_METHOD")%call["methodName"])
+
+        if atomic:
+            return self.__atomicCalls(request,calls)
+
+        return map(lambda call:self.__call(request,call),calls)
+
+    def __call(self,request,call):
+        return handlers_manager.getManager().dispatchSubRequest(request,call["methodName"],call["params"])
+
+    def __isFault(self,result):
+        return type(result)==types.DictType and result.has_key("faultCode") and result.has_key("faultString")
+
+    def __atomicCalls(self,request,calls):
+        if not calls:
+            return []
+
+        results=[]
+        db_main.beginTransaction()
+        try:
+            for call in calls:
+                results.append(self.__call(request,call))
+                if self.__isFault(results[-1]):
+                    break
+        except:
+            db_main.endTransaction(False)
+            raise
+
+        if self.__isFault(results[-1]):
+            db_main.endTransaction(False)
+            fault={"faultCode":1,"faultString":errorText("GENERAL","TRANSACTION_ROLLED_BACK")}
+        else:
+            try:
+                db_main.endTransaction(True)
+                return results
+            except DBException,e:
+                fault={"faultCode":1,"faultString":e.__str__().split("\n")[0]}
+
+        return map(lambda result:(fault,result)[self.__isFault(result)],results)+[fault]*(len(calls)-len(results))
@@ -15,9 +15,12 @@ Marshaller.dispatch[Decimal] = dump_decimal
 # Based on code written by Fredrik Lundh.
 
 import xmlrpclib
-import SocketServer
-import BaseHTTPServer
+import socket
+import select
+import errno
+import threading
 import sys
+import os
 import time
 
 from core import main
@@ -28,27 +31,25 @@ from core.ibs_exceptions import *
 from core.lib.general import *
 from core import defs
 
-class XMLRPCRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+class XMLRPCRequestHandler:
     """XML-RPC request handler class.
 
-    Handles all HTTP POST requests and attempts to decode them as
-    XML-RPC requests.
-
+    Decodes bodies of HTTP POST requests as XML-RPC requests.
     XML-RPC requests are dispatched to the _dispatch method.
+    A handler is created for each request, and runs in a server thread.
     """
 
-    DEBUG=False
+    def __init__(self, client_address):
+        self.client_address=client_address
 
-    def do_POST(self):
-        """Handles the HTTP POST request.
+    def handlePOST(self, data):
+        """Handles body of an HTTP POST request.
 
-        Attempts to interpret all HTTP POST requests as XML-RPC calls,
-        which are forwarded to the _dispatch method for handling.
+        Interprets "data" as an XML-RPC call, which is forwarded to the _dispatch
+        method for handling. Returns (http status code, response body)
         """
 
         try:
-            # get arguments
-            data = self.rfile.read(int(self.headers["content-length"]))
             params, method = xmlrpclib.loads(data)
 
             # generate response
@@ -66,19 +67,10 @@ class XMLRPCRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
         except:
             logException(LOG_ERROR,"XMLRPCServer")
             # internal error, report as HTTP server error
-            self.send_response(500)
-            self.end_headers()
-        else:
-            # got a valid XML RPC response
-            self.send_response(200)
-            self.send_header("Content-type", "text/xml")
-            self.send_header("Content-length", str(len(response)))
-            self.end_headers()
-            self.wfile.write(response)
+            return (500, "")
 
-            # shut down the connection
-            self.wfile.flush()
-            self.connection.shutdown(1)
+        # got a valid XML RPC response
+        return (200, response)
 
     def _dispatch(self, method, params):
         """Dispatches the XML-RPC method.
@@ -105,6 +97,7 @@ class XMLRPCRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
 
         stat_main.getStatKeeper().avg("server_avg_response_time", "server_total_requests", duration)
         stat_main.getStatKeeper().max("server_max_response_time", duration)
+        stat_main.getStatKeeper().observe("server_response_time", duration)
 
         if defs.LOG_SERVER_REQUESTS:
             apply(self.log_message,[format+ " duration: %s"]+args+[duration])
@@ -124,46 +117,418 @@ class XMLRPCRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
         
         return param
 
-    def log_request(self, code='-', size='-'):
-        """Selectively log an accepted request."""
-
-        if self.DEBUG and defs.LOG_SERVER_REQUESTS:
-            BaseHTTPServer.BaseHTTPRequestHandler.log_request(self, code, size)
-            
     def log_message(self, format, *args):
         toLog("%s - - [%s] %s\n" %
-                         (self.address_string(),
-                          self.log_date_time_string(),
+                         (self.client_address[0],
+                          time.strftime("%d/%b/%Y %H:%M:%S"),
                           format%args),LOG_SERVER)
 
-        
 
-class IBSServer(SocketServer.ThreadingMixIn,SocketServer.TCPServer): #overide process request method
-        allow_reuse_address=True
-        
-        def process_request(self,request,client_address):
-            if not main.isShuttingDown() and not main.noLoginSet():
-                thread_main.runThread(self.process_request_thread,[request,client_address],"server")
-#           else:
-#               raise IBSException("Ignore server request while we're shutting down")
+HTTP_REASONS={200:"OK",
+              400:"Bad Request",
+              411:"Length Required",
+              413:"Request Entity Too Large",
+              500:"Internal Server Error",
+              501:"Not Implemented"}
+
+def formatHTTPResponse(code, body, keep_alive):
+    """
+        return an HTTP/1.1 response with status "code" and "body" as string
+    """
+    headers=["HTTP/1.1 %s %s"%(code,HTTP_REASONS[code]),
+             "Server: IBSng",
+             "Content-type: text/xml",
+             "Content-length: %s"%len(body)]
+    if keep_alive:
+        headers.append("Connection: keep-alive")
+    else:
+        headers.append("Connection: close")
+    return "\r\n".join(headers)+"\r\n\r\n"+body
+
+class HTTPConnection:
+    """
+        A client connection of XMLRPCServer, keeps read and write buffers and parsed requests.
+        Requests of a connection are dispatched one at a time, so responses of pipelined requests
+        are written in order of requests
+    """
+    def __init__(self, sock, client_address):
+        self.sock=sock
+        self.client_address=client_address
+        self.in_buffer=""
+        self.out_buffer=""
+        self.requests=[] #parsed requests waiting for dispatch, list of (error_code,body,keep_alive)
+        self.busy=False #a request of connection is being processed by a server thread
+        self.last_request=False #a request without keep alive or an invalid request is parsed, rest of input is ignored
+        self.continue_sent=False #100 Continue is sent for current request
+        self.close_after_write=False
+        self.closed=False
+        self.last_activity=time.time()
+
+    def isIdle(self):
+        return not self.busy and not self.requests and not self.out_buffer
+
+    def parseRequests(self):
+        """
+            parse complete requests in in_buffer and add them to requests
+            invalid requests are added with an error code, and end the connection
+        """
+        while not self.last_request:
+            header_end=self.in_buffer.find("\r\n\r\n")
+            if header_end<0:
+                if len(self.in_buffer)>defs.SERVER_MAX_HEADER_SIZE:
+                    self.__addRequest(400,"",False)
+                return
+
+            lines=self.in_buffer[:header_end].split("\r\n")
+            try:
+                command,path,version=lines[0].split()
+            except ValueError:
+                self.__addRequest(400,"",False)
+                return
+
+            headers={}
+            for line in lines[1:]:
+                name,sep,value=line.partition(":")
+                headers[name.strip().lower()]=value.strip()
+
+            if command!="POST":
+                self.__addRequest(501,"",False)
+                return
+
+            try:
+                length=int(headers["content-length"])
+            except (KeyError,ValueError):
+                self.__addRequest(411,"",False)
+                return
+
+            if length<0 or length>defs.SERVER_MAX_REQUEST_SIZE:
+                self.__addRequest(413,"",False)
+                return
+
+            body_start=header_end+4
+            if len(self.in_buffer)<body_start+length:
+                if headers.get("expect","").lower()=="100-continue" and not self.continue_sent and \
+                   not self.busy and not self.requests: #request is next to dispatch
+                    self.out_buffer+="HTTP/1.1 100 Continue\r\n\r\n"
+                    self.continue_sent=True
+                return
+
+            body=self.in_buffer[body_start:body_start+length]
+            self.in_buffer=self.in_buffer[body_start+length:]
+            self.continue_sent=False
+
+            connection=headers.get("connection","").lower()
+            if version=="HTTP/1.1":
+                keep_alive=connection!="close"
+            else:
+                keep_alive=connection=="keep-alive"
+            self.__addRequest(None,body,keep_alive)
+
+    def __addRequest(self, error_code, body, keep_alive):
+        self.requests.append((error_code,body,keep_alive))
+        if error_code!=None or not keep_alive:
+            self.last_request=True
+            self.in_buffer=""
+
+POLL_READ=1
+POLL_WRITE=2
+POLL_ERROR=4
 
-        def serve_forever(self):
-            while not main.isShuttingDown():
-                self.handle_request()
+class EPoller:
+    """
+        wrapper of select.epoll, events are combination of POLL_* flags
+    """
+    def __init__(self):
+        self.epoll=select.epoll()
 
-        def handle_error(self,request,client_address):
-            logException(LOG_ERROR,"IBSServer handle_error")
+    def __toEPoll(self, events):
+        epoll_events=0
+        if events & POLL_READ:
+            epoll_events|=select.EPOLLIN
+        if events & POLL_WRITE:
+            epoll_events|=select.EPOLLOUT
+        return epoll_events
 
+    def register(self, fd, events):
+        self.epoll.register(fd,self.__toEPoll(events))
 
-class XMLRPCServer(IBSServer):
-    """Simple XML-RPC server.
+    def modify(self, fd, events):
+        self.epoll.modify(fd,self.__toEPoll(events))
 
-    Simple XML-RPC server that allows functions and a single instance
-    to be installed to handle requests.
+    def unregister(self, fd):
+        self.epoll.unregister(fd)
+
+    def poll(self, timeout):
+        """
+            return list of (fd,events)
+        """
+        results=[]
+        for fd,epoll_events in self.epoll.poll(timeout):
+            events=0
+            if epoll_events & (select.EPOLLIN|select.EPOLLPRI):
+                events|=POLL_READ
+            if epoll_events & select.EPOLLOUT:
+                events|=POLL_WRITE
+            if epoll_events & (select.EPOLLERR|select.EPOLLHUP):
+                events|=POLL_ERROR
+            results.append((fd,events))
+        return results
+
+class SelectPoller:
+    """
+        poller with same interface as EPoller, for systems without epoll
     """
+    def __init__(self):
+        self.fds={} #fd=>events
 
-    def __init__(self, addr, requestHandler=XMLRPCRequestHandler):
-        self.funcs = {}
-        self.instance = None
-        SocketServer.TCPServer.__init__(self, addr, requestHandler)
+    def register(self, fd, events):
+        self.fds[fd]=events
 
+    modify=register
+
+    def unregister(self, fd):
+        del(self.fds[fd])
+
+    def poll(self, timeout):
+        readers=filter(lambda fd:self.fds[fd] & POLL_READ,self.fds)
+        writers=filter(lambda fd:self.fds[fd] & POLL_WRITE,self.fds)
+        readables,writables,errors=select.select(readers,writers,[],timeout)
+        events={}
+        for fd in readables:
+            events[fd]=POLL_READ
+        for fd in writables:
+            events[fd]=events.get(fd,0) | POLL_WRITE
+        return events.items()
+
+def createPoller():
+    if hasattr(select,"epoll"):
+        return EPoller()
+    return SelectPoller()
+
+
+class XMLRPCServer:
+    """Event driven XML-RPC server.
+
+    One thread accepts connections, reads and parses HTTP requests and writes responses, using
+    non-blocking sockets. Parsed requests are dispatched to "server" threads, so slow clients
+    don't hold server threads. Connections are kept alive between requests as HTTP/1.1 says,
+    and pipelined requests are answered in order.
+    """
+
+    def __init__(self, addr):
+        self.socket=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET,socket.SO_REUSEADDR,1)
+        self.socket.bind(addr)
+        self.socket.listen(128)
+        self.socket.setblocking(0)
+        self.server_address=self.socket.getsockname()
+
+        self.connections={} #fd=>HTTPConnection
+        self.poller=createPoller()
+        self.wakeup_read,self.wakeup_write=os.pipe()
+        self.lock=threading.Lock()
+        self.finished=[] #list of (connection,response,keep_alive) of processed requests
+        self.stopped=False
+
+    def stop(self):
+        """
+            stop serve_forever loop, it closes all connections and listening socket
+        """
+        self.stopped=True
+        self.__wakeup()
+
+    def __wakeup(self):
+        try:
+            os.write(self.wakeup_write,"x")
+        except OSError:
+            pass
+
+    ################################
+    def serve_forever(self):
+        self.poller.register(self.socket.fileno(),POLL_READ)
+        self.poller.register(self.wakeup_read,POLL_READ)
+        last_idle_check=time.time()
+        try:
+            while not main.isShuttingDown() and not self.stopped:
+                try:
+                    self.__handleEvents(self.poller.poll(1))
+                    self.__writeFinished()
+
+                    if time.time()-last_idle_check>=1:
+                        self.__closeIdleConnections()
+                        last_idle_check=time.time()
+                except:
+                    logException(LOG_ERROR,"XMLRPCServer")
+        finally:
+            for connection in self.connections.values():
+                self.__close(connection)
+            self.socket.close()
+
+    def __handleEvents(self, events):
+        for fd,event in events:
+            if fd==self.socket.fileno():
+                self.__accept()
+            elif fd==self.wakeup_read:
+                os.read(self.wakeup_read,4096)
+            elif self.connections.has_key(fd):
+                connection=self.connections[fd]
+                if event & POLL_READ:
+                    self.__read(connection)
+                if event & POLL_WRITE and not connection.closed:
+                    self.__write(connection)
+                if event & POLL_ERROR and not event & POLL_READ and not connection.closed:
+                    self.__close(connection)
+
+    def __accept(self):
+        while True:
+            try:
+                sock,client_address=self.socket.accept()
+            except socket.error,e:
+                if e.args[0] in (errno.EAGAIN,errno.EWOULDBLOCK,errno.EINTR,errno.ECONNABORTED):
+                    return
+                raise
+
+            if main.isShuttingDown() or main.noLoginSet():
+                sock.close()
+                continue
+
+            sock.setblocking(0)
+            sock.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+            connection=HTTPConnection(sock,client_address)
+            self.connections[sock.fileno()]=connection
+            self.poller.register(sock.fileno(),POLL_READ)
+
+    def __read(self, connection):
+        try:
+            data=connection.sock.recv(65536)
+        except socket.error,e:
+            if e.args[0] in (errno.EAGAIN,errno.EWOULDBLOCK,errno.EINTR):
+                return
+            self.__close(connection)
+            return
+
+        if not data: #client closed connection, responses of running requests are dropped
+            self.__close(connection)
+            return
+
+        connection.last_activity=time.time()
+        if not connection.last_request:
+            connection.in_buffer+=data
+            connection.parseRequests()
+        self.__dispatchNext(connection)
+        self.__write(connection)
+
+    def __dispatchNext(self, connection):
+        """
+            dispatch next parsed request of connection to a server thread, if no request is being processed
+        """
+        if connection.busy or not connection.requests:
+            return
+
+        error_code,body,keep_alive=connection.requests.pop(0)
+        if error_code!=None:
+            connection.out_buffer+=formatHTTPResponse(error_code,"",False)
+            connection.close_after_write=True
+            return
+
+        if main.isShuttingDown() or main.noLoginSet():
+            self.__close(connection)
+            return
+
+        connection.busy=True
+        thread_main.runThread(self.__processRequest,[connection,body,keep_alive],"server")
+
+    def __processRequest(self, connection, body, keep_alive):
+        """
+            run in server threads, process request and pass response to server loop
+            response is sent here if possible, and rest of it is passed to server loop
+        """
+        try:
+            code,response=XMLRPCRequestHandler(connection.client_address).handlePOST(body)
+            if code!=200:
+                keep_alive=False
+        except:
+            logException(LOG_ERROR,"XMLRPCServer")
+            code,response,keep_alive=500,"",False
+
+        response=formatHTTPResponse(code,response,keep_alive)
+        if not connection.out_buffer: #server loop doesn't write while we're busy, send without waiting for it
+            try:
+                response=response[connection.sock.send(response):]
+            except socket.error:
+                pass
+
+        self.lock.acquire()
+        try:
+            self.finished.append((connection,response,keep_alive))
+        finally:
+            self.lock.release()
+        self.__wakeup()
+
+    def __writeFinished(self):
+        """
+            add responses of processed requests to their connections
+        """
+        self.lock.acquire()
+        try:
+            finished,self.finished=self.finished,[]
+        finally:
+            self.lock.release()
+
+        for connection,response,keep_alive in finished:
+            if connection.closed:
+                continue
+
+            connection.busy=False
+            connection.out_buffer+=response
+            if not keep_alive:
+                connection.close_after_write=True
+                connection.requests=[]
+            else:
+                connection.parseRequests() #for 100 Continue of next request
+            self.__dispatchNext(connection)
+            self.__write(connection)
+
+    def __write(self, connection):
+        """
+            send as much of out_buffer as socket accepts, and wait for writability if something remained
+        """
+        if connection.out_buffer:
+            try:
+                sent=connection.sock.send(connection.out_buffer)
+                connection.out_buffer=connection.out_buffer[sent:]
+                connection.last_activity=time.time()
+            except socket.error,e:
+                if e.args[0] not in (errno.EAGAIN,errno.EWOULDBLOCK,errno.EINTR):
+                    self.__close(connection)
+                    return
+
+        if connection.out_buffer:
+            self.poller.modify(connection.sock.fileno(),POLL_READ|POLL_WRITE)
+        elif connection.close_after_write and not connection.busy:
+            self.__close(connection)
+        else:
+            self.poller.modify(connection.sock.fileno(),POLL_READ)
+
+    def __close(self, connection):
+        if connection.closed:
+            return
+        connection.closed=True
+        fd=connection.sock.fileno()
+        del(self.connections[fd])
+        try:
+            self.poller.unregister(fd)
+        except (IOError,OSError,KeyError):
+            pass
+        connection.sock.close()
+
+    def __closeIdleConnections(self):
+        """
+            close connections that were idle for SERVER_KEEPALIVE_TIMEOUT seconds, also clients that
+            didn't complete their requests in that time
+        """
+        now=time.time()
+        for connection in self.connections.values():
+            if not connection.busy and not connection.out_buffer and \
+               now-connection.last_activity>defs.SERVER_KEEPALIVE_TIMEOUT:
+                self.__close(connection)
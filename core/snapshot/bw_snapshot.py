@@ -4,9 +4,12 @@ from core.ras import ras_main
 from core.lib.time_lib import *
 from core.lib.general import *
 from core.snapshot import snapshot_defs,snapshot_main,onlines_loop
+from core.user.online_store import SERVICE_NORMAL
 import time
 
 class BWSnapShotOnlinesLoopClient(onlines_loop.OnlinesLoopClient):
+    refresh_counters = True
+
     def __init__(self):
         onlines_loop.OnlinesLoopClient.__init__(self, defs.SNAPSHOT_BW_INTERVAL)
         self.__resetValues()
@@ -14,20 +17,21 @@ class BWSnapShotOnlinesLoopClient(onlines_loop.OnlinesLoopClient):
     def __resetValues(self):
         self.onlines_bw = {}
 
-    def processInstance(self, user_obj, instance):
-    
-        if user_obj.getUserAttrs().hasAttr("save_bw_usage") and user_obj.isNormalUser():
-            _in,out,in_rate,out_rate = user_obj.getTypeObj().getInOutBytes(instance)
-
-            if in_rate > 0 or out_rate > 0:
-            
-                user_id = user_obj.getUserID()
-                
+    def processOnlines(self, session_store):
+        columns = session_store.getColumns("user_id", "service", "in_rate", "out_rate")
+        for user_id, service, in_rate, out_rate in zip(*columns):
+            if service == SERVICE_NORMAL and (in_rate > 0 or out_rate > 0):
                 if self.onlines_bw.has_key(user_id):
                     self.onlines_bw[user_id][0] += in_rate
                     self.onlines_bw[user_id][1] += out_rate
                 else:
                     self.onlines_bw[user_id] = [in_rate, out_rate]
+
+        #only users with save_bw_usage attribute are saved, check it once per user with bandwidth usage
+        for user_id in self.onlines_bw.keys():
+            user_obj = user_main.getOnline().getUserObj(user_id)
+            if user_obj == None or not user_obj.getUserAttrs().hasAttr("save_bw_usage"):
+                del(self.onlines_bw[user_id])
             
     def loopEnd(self):
         self.insertToTableQuery("internet_bw_snapshot", self.onlines_bw).runQuery()     
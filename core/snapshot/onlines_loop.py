@@ -13,7 +13,7 @@ class OnlinesLoop:
     def registerClient(self, client_obj):
         """
             Register a client object
-            client_obj processInstance in runned each run_interval for each instance of each user
+            client_obj processOnlines is runned each run_interval with session store of online users
         """
         if not isinstance(client_obj, OnlinesLoopClient):
             raise IBSError("Onlines Loop Registered client is invalid") 
@@ -71,12 +71,13 @@ class OnlinesLoop:
     def __doLoop(self, loop_clients):
         """
             actually run the loop on online users
+            counters of sessions are refreshed once for all clients that need them
         """
-        onlines = user_main.getOnline().getOnlineUsers()
-        for user_obj in onlines.itervalues():
-            for instance in xrange(1,user_obj.instances+1):
-                self.__runMethod(loop_clients, "processInstance", user_obj, instance)
-        
+        session_store = user_main.getOnline().getSessionStore()
+        if filter(lambda client:client.refresh_counters, loop_clients):
+            session_store.refresh()
+
+        self.__runMethod(loop_clients, "processOnlines", session_store)
         self.__runMethod(loop_clients, "loopEnd")
 
     def __runMethod(self, loop_clients, method_name, *args):
@@ -88,6 +89,8 @@ class OnlinesLoop:
         
 
 class OnlinesLoopClient:
+    refresh_counters = False #set to True if client uses in/out bytes and rates of session store
+
     def __init__(self, run_interval):
         self.__run_interval = run_interval
         self.__last_run = 0
@@ -102,6 +105,19 @@ class OnlinesLoopClient:
         return self.__last_run
     
     ######################## these functions should be overriden by children
+    def processOnlines(self, session_store):
+        """
+            process all online sessions, using columns of session_store(OnlineSessionStore instance)
+            default implementation calls processInstance for each instance of each online user
+        """
+        onlines = user_main.getOnline().getOnlineUsers()
+        for user_obj in onlines.itervalues():
+            for instance in xrange(1,user_obj.instances+1):
+                try:
+                    self.processInstance(user_obj, instance)
+                except:
+                    logException(LOG_ERROR, "Snapshots OnlinesLoop")
+
     def processInstance(self, user_obj, instance):
         """
             process "instance" of "user_obj"
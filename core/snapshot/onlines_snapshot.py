@@ -4,6 +4,7 @@ from core.ras import ras_main
 from core.lib.time_lib import *
 from core.lib.general import *
 from core.snapshot import snapshot_defs, snapshot_main, onlines_loop
+from core.user.online_store import SERVICE_NORMAL, SERVICE_VOIP
 import time
 
 class OnlinesSnapShotOnlinesLoopClient(onlines_loop.OnlinesLoopClient):
@@ -42,13 +43,9 @@ class OnlinesSnapShotOnlinesLoopClient(onlines_loop.OnlinesLoopClient):
                                                 "value":val_dic[ras_id]})
         return query
 
-    def processInstance(self, user_obj, instance):
-        ras_id, unique_id_val = user_obj.getGlobalUniqueID(instance)
-
-        if user_obj.isNormalUser():
-            self.internet_onlines[ras_id] += 1
-        else:
-            self.voip_onlines[ras_id] += 1
+    def processOnlines(self, session_store):
+        self.internet_onlines.update(session_store.countByRas(SERVICE_NORMAL))
+        self.voip_onlines.update(session_store.countByRas(SERVICE_VOIP))
 
     def __getRasIDsDic(self):
         """
@@ -2,6 +2,7 @@ from core.snapshot.realtime_snapshot import SnapShot
 from core.snapshot.onlines_loop import OnlinesLoopClient
 from core.snapshot import snapshot_main, snapshot_defs
 from core.user import user_main
+from core.user.online_store import SERVICE_NORMAL
 from core.ibs_exceptions import *
 
 def init():
@@ -12,6 +13,8 @@ def init():
 
 
 class InternetBWSnapShot(SnapShot, OnlinesLoopClient):
+    refresh_counters = True
+
     def __init__(self):
         SnapShot.__init__(self, "internet_bw", snapshot_defs.ONLINES_SNAPSHOT_COUNT)
         # we should obey onlines interval instead of bw
@@ -24,11 +27,8 @@ class InternetBWSnapShot(SnapShot, OnlinesLoopClient):
         self.out_sum = 0
     
 
-    def processInstance(self, user_obj, instance):
-        if user_obj.isNormalUser():
-            _in,out,in_rate,out_rate = user_obj.getTypeObj().getInOutBytes(instance)
-            self.in_sum += in_rate
-            self.out_sum += out_rate
+    def processOnlines(self, session_store):
+        self.in_sum, self.out_sum = session_store.sumColumns(("in_rate", "out_rate"), SERVICE_NORMAL)
 
     def loopEnd(self):
         self.add((self.in_sum,self.out_sum))
@@ -1,6 +1,7 @@
 from core.snapshot.realtime_snapshot import SnapShot
 from core.snapshot.onlines_loop import OnlinesLoopClient
 from core.snapshot import snapshot_main, snapshot_defs
+from core.user.online_store import SERVICE_VOIP
 from core import defs
 
 def init():
@@ -19,9 +20,8 @@ class VoIPOnlinesSnapShot(SnapShot, OnlinesLoopClient):
     def __resetValues(self):
         self.count = 0
     
-    def processInstance(self, user_obj, instance):
-        if user_obj.isVoIPUser():
-            self.count += 1
+    def processOnlines(self, session_store):
+        self.count = session_store.getCount(SERVICE_VOIP)
 
     def loopEnd(self):
         self.add(self.count)
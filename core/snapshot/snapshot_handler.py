@@ -12,10 +12,10 @@ import time
 class SnapShotHandler(handler.Handler):
     def __init__(self):
         handler.Handler.__init__(self,"snapshot")
-        self.registerHandlerMethod("getRealTimeSnapShot")
-        self.registerHandlerMethod("getBWSnapShotForUser")
-        self.registerHandlerMethod("getOnlinesSnapShot")
-        self.registerHandlerMethod("getBWSnapShot")
+        self.registerHandlerMethod("getRealTimeSnapShot",cache_ttl=5)
+        self.registerHandlerMethod("getBWSnapShotForUser",cache_ttl=5)
+        self.registerHandlerMethod("getOnlinesSnapShot",cache_ttl=10)
+        self.registerHandlerMethod("getBWSnapShot",cache_ttl=10)
 
     ############################################
     def getRealTimeSnapShot(self, request):
@@ -0,0 +1,144 @@
+import threading
+import bisect
+import time
+
+def createLogLinearBounds(min_exp,max_exp):
+    """
+        return sorted list of bucket upper bounds, each power of ten between 10^min_exp and 10^max_exp is
+        divided into 9 linear buckets
+    """
+    bounds=[]
+    for exp in range(min_exp,max_exp+1):
+        for mantissa in range(1,10):
+            bounds.append(float("%se%s"%(mantissa,exp)))
+    return bounds
+
+LATENCY_BOUNDS=createLogLinearBounds(-5,2) #10 microseconds to 900 seconds
+
+class Histogram:
+    """
+        Histogram of observed values in log linear buckets. Each thread counts in it's own shard, so observe
+        doesn't need a lock. Shards are merged when histogram is read.
+        Snapshots of counts are kept to report percentiles and rates of a sliding window
+    """
+    WINDOW_SNAPSHOTS=7
+
+    def __init__(self,name,bounds=LATENCY_BOUNDS):
+        self.name=name
+        self.bounds=bounds
+        self.shards=[] #list of shards of all threads, each shard is [bucket counts...,sum]
+        self.shards_lock=threading.Lock()
+        self.local=threading.local()
+        self.snapshots=[] #[(time,counts,sum)], oldest first
+
+    def observe(self,value):
+        try:
+            shard=self.local.shard
+        except AttributeError:
+            shard=self.__createShard()
+
+        shard[bisect.bisect_left(self.bounds,value)]+=1
+        shard[-1]+=value
+
+    def __createShard(self):
+        shard=[0]*(len(self.bounds)+1)+[0.0] #last bucket is +Inf
+        self.shards_lock.acquire()
+        try:
+            self.shards.append(shard)
+        finally:
+            self.shards_lock.release()
+        self.local.shard=shard
+        return shard
+
+    def getCounts(self):
+        """
+            return (bucket counts,sum) of all observations. bucket counts are not cumulative, and last bucket
+            is for values greater than last bound
+        """
+        counts=[0]*(len(self.bounds)+1)
+        _sum=0.0
+        for shard in self.shards[:]:
+            shard=shard[:]
+            for i in xrange(len(counts)):
+                counts[i]+=shard[i]
+            _sum+=shard[-1]
+        return (counts,_sum)
+
+    def snapshot(self):
+        """
+            keep current counts, for calculating sliding window values. Should be called periodically
+        """
+        counts,_sum=self.getCounts()
+        self.snapshots.append((time.time(),counts,_sum))
+        del(self.snapshots[:-self.WINDOW_SNAPSHOTS])
+
+    def getWindow(self):
+        """
+            return (duration,bucket counts,sum) of observations since oldest snapshot
+        """
+        counts,_sum=self.getCounts()
+        snapshots=self.snapshots[:]
+        if not snapshots:
+            return (0,counts,_sum)
+
+        snapshot_time,old_counts,old_sum=snapshots[0]
+        return (time.time()-snapshot_time,map(lambda new,old:new-old,counts,old_counts),_sum-old_sum)
+
+    def percentile(self,counts,fraction):
+        """
+            return estimated value of "fraction" percentile of counts, by interpolation in bucket
+            fraction(float): between 0 and 1
+        """
+        total=sum(counts)
+        if total==0:
+            return 0.0
+
+        rank=fraction*total
+        cumulative=0
+        for i in xrange(len(counts)):
+            if counts[i] and cumulative+counts[i]>=rank:
+                if i==len(self.bounds):
+                    return self.bounds[-1]
+                lower=(0.0,self.bounds[i-1])[i>0]
+                return lower+(self.bounds[i]-lower)*(rank-cumulative)/counts[i]
+            cumulative+=counts[i]
+        return self.bounds[-1]
+
+    def getWindowStats(self):
+        """
+            return dic of percentiles and rate per second in sliding window
+        """
+        duration,counts,_sum=self.getWindow()
+        count=sum(counts)
+        return {"p50":self.percentile(counts,0.5),
+                "p95":self.percentile(counts,0.95),
+                "p99":self.percentile(counts,0.99),
+                "rate":count/max(duration,1)}
+
+###################################
+histograms={}
+histograms_lock=threading.Lock()
+
+def getHistogram(name):
+    """
+        return histogram with "name", histogram is created if it doesn't exist. Histograms don't need stat keeper
+        so they can be used before it's initialized
+    """
+    try:
+        return histograms[name]
+    except KeyError:
+        histograms_lock.acquire()
+        try:
+            if not histograms.has_key(name):
+                histograms[name]=Histogram(name)
+            return histograms[name]
+        finally:
+            histograms_lock.release()
+
+def getHistograms():
+    """
+        return list of all histograms, sorted by name
+    """
+    names=histograms.keys()
+    names.sort()
+    return map(lambda name:histograms[name],names)
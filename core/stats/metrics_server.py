@@ -0,0 +1,88 @@
+from core.ibs_exceptions import *
+from core.stats import stat_main,histogram
+import BaseHTTPServer
+import threading
+import re
+
+def formatMetrics():
+    """
+        return statistics and histograms in prometheus text format
+    """
+    lines=[]
+    stats=stat_main.getStatKeeper().getPlainStats()
+    names=stats.keys()
+    names.sort()
+    for name in names:
+        value=stats[name][0]
+        try:
+            value=float(value)
+        except (ValueError,TypeError):
+            continue #string statistics
+        metric_name=metricName(name)
+        lines.append("# TYPE %s untyped"%metric_name)
+        lines.append("%s %s"%(metric_name,formatValue(value)))
+
+    for hist in histogram.getHistograms():
+        lines+=formatHistogram(hist)
+
+    return "\n".join(lines)+"\n"
+
+def formatHistogram(hist):
+    metric_name=metricName(hist.name)
+    counts,_sum=hist.getCounts()
+    lines=["# TYPE %s histogram"%metric_name]
+    cumulative=0
+    for i in xrange(len(hist.bounds)):
+        cumulative+=counts[i]
+        lines.append('%s_bucket{le="%s"} %s'%(metric_name,formatValue(hist.bounds[i]),cumulative))
+    cumulative+=counts[-1]
+    lines.append('%s_bucket{le="+Inf"} %s'%(metric_name,cumulative))
+    lines.append("%s_sum %s"%(metric_name,formatValue(_sum)))
+    lines.append("%s_count %s"%(metric_name,cumulative))
+    return lines
+
+def metricName(name):
+    return "ibs_%s"%re.sub("[^a-zA-Z0-9_]","_",name)
+
+def formatValue(value):
+    return repr(float(value))
+
+class MetricsRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0]!="/metrics":
+            self.send_error(404)
+            return
+
+        try:
+            body=formatMetrics()
+        except:
+            logException(LOG_ERROR,"MetricsRequestHandler")
+            self.send_error(500)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type","text/plain; version=0.0.4")
+        self.send_header("Content-Length",str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsServer:
+    """
+        http server of /metrics, runs in it's own thread, out of thread pool, so scraping doesn't wait for
+        or delay radius and server threads
+    """
+    def __init__(self,address):
+        self.http_server=BaseHTTPServer.HTTPServer(address,MetricsRequestHandler)
+        self.server_address=self.http_server.server_address
+
+    def start(self):
+        thread=threading.Thread(target=self.http_server.serve_forever,name="metrics server")
+        thread.setDaemon(True)
+        thread.start()
+
+    def stop(self):
+        self.http_server.shutdown()
+        self.http_server.server_close()
@@ -6,7 +6,7 @@ from core.lib.sort import SortedDic
 class StatHandler(handler.Handler):
     def __init__(self):
         handler.Handler.__init__(self,"stat")
-        self.registerHandlerMethod("getStatistics")
+        self.registerHandlerMethod("getStatistics",cache_ttl=2)
 
     def getStatistics(self, request):
         request.needAuthType(request.ADMIN)
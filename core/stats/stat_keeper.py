@@ -3,7 +3,8 @@ import time
 import resource
 import os
 
-from core import main
+from core import main, ibs_exceptions
+from core.stats import histogram
 
 class StatKeeper:
     def __init__(self):
@@ -19,6 +20,17 @@ class StatKeeper:
         """
         self.__stats[stat_name] = [initial_value, _type]
 
+    def unRegisterStat(self, stat_name):
+        """
+            remove stat_name, useful for stats of objects that can be unloaded
+        """
+        self.__lock.acquire()
+        try:
+            if self.__stats.has_key(stat_name):
+                del(self.__stats[stat_name])
+        finally:
+            self.__lock.release()
+
     def inc(self, stat_name, amount = 1):
         """
             increment amount of state_name by amount
@@ -32,6 +44,12 @@ class StatKeeper:
     def getValue(self, stat_name):
         return self.__stats[stat_name][0]
 
+    def setValue(self, stat_name, value):
+        """
+            set value of stat_name, useful for stats that are calculated periodically
+        """
+        self.__stats[stat_name][0] = value
+
     def max(self, stat_name, value):
         """
             set stat_name value as maximum of "value" and current value
@@ -56,12 +74,30 @@ class StatKeeper:
         finally:
             self.__lock.release()
 
+    def observe(self, histogram_name, value):
+        """
+            add value to histogram with name histogram_name
+        """
+        histogram.getHistogram(histogram_name).observe(value)
+
     def getStats(self):
         """
-            Get a dictionary of statistics.
+            Get a dictionary of statistics, including percentiles and rates of histograms in last minute
+        """
+        stats = self.getPlainStats()
+        for hist in histogram.getHistograms():
+            window_stats = hist.getWindowStats()
+            for key in ("p50", "p95", "p99"):
+                stats["%s_%s"%(hist.name, key)] = [window_stats[key], "seconds"]
+            stats["%s_rate"%hist.name] = ["%.2f/s"%window_stats["rate"], "string"]
+        return stats
+
+    def getPlainStats(self):
+        """
+            Get a copy of dictionary of statistics, without histograms
         """
         self.__updateStats()
-        return self.__stats
+        return self.__stats.copy()
 
     def __updateStats(self):
         """
@@ -69,6 +105,14 @@ class StatKeeper:
             uptime and some usages are magically added here
         """
         self.__stats["uptime"] = [time.time() - main.getStartTime(), "seconds"]
+        self.__stats["log_dropped_records"] = [ibs_exceptions.getDroppedLogRecords(), "int"]
+        if not self.__stats.has_key("memory_usage"):
+            self.updateSystemStats()
+
+    def updateSystemStats(self):
+        """
+            update statistics read from /proc, called periodically so reading statistics doesn't read files
+        """
         self.__stats["memory_usage"] = [self.__getMemUsage(), "bytes"]
         self.__stats["load_avg"] = [self.__getLoadAvg(), "string"]
         
@@ -1,4 +1,7 @@
 from core.server import handlers_manager
+from core.event import periodic_events
+from core.stats import histogram
+from core import defs
 
 def init():
     from core.stats.stat_handler import StatHandler
@@ -8,5 +11,25 @@ def init():
     global stat_keeper
     stat_keeper = StatKeeper()
 
+    periodic_events.getManager().register(UpdateStats())
+
+    if defs.METRICS_SERVER_ENABLED:
+        from core.stats.metrics_server import MetricsServer
+        global metrics_server
+        metrics_server = MetricsServer((defs.METRICS_SERVER_IP, defs.METRICS_SERVER_PORT))
+        metrics_server.start()
+
 def getStatKeeper():
     return stat_keeper
+
+class UpdateStats(periodic_events.PeriodicEvent):
+    """
+        update system statistics and take snapshots of histograms for their sliding window
+    """
+    def __init__(self):
+        periodic_events.PeriodicEvent.__init__(self, "Update Statistics", 10, [], 0)
+
+    def run(self):
+        getStatKeeper().updateSystemStats()
+        for hist in histogram.getHistograms():
+            hist.snapshot()
@@ -0,0 +1,155 @@
+from core.ibs_exceptions import *
+from core.stats import histogram
+from core import defs
+import threading
+import ctypes
+import ctypes.util
+import time
+
+########################## monotonic clock
+class timespec(ctypes.Structure):
+    _fields_=[("tv_sec",ctypes.c_long),("tv_nsec",ctypes.c_long)]
+
+CLOCK_MONOTONIC=1
+
+def _loadClockGetTime():
+    try:
+        librt=ctypes.CDLL(ctypes.util.find_library("rt") or "librt.so.1",use_errno=True)
+        clock_gettime=librt.clock_gettime
+        clock_gettime.argtypes=[ctypes.c_int,ctypes.POINTER(timespec)]
+        if clock_gettime(CLOCK_MONOTONIC,ctypes.byref(timespec()))!=0:
+            return None
+        return clock_gettime
+    except (OSError,AttributeError):
+        return None
+
+clock_gettime=_loadClockGetTime()
+
+def monotonicTime():
+    """
+        return seconds from an unspecified point, that is not affected by system time changes. Falls back to
+        time.time if clock_gettime is not available
+    """
+    if clock_gettime==None:
+        return time.time()
+
+    t=timespec()
+    clock_gettime(CLOCK_MONOTONIC,ctypes.byref(t))
+    return t.tv_sec+t.tv_nsec*1e-9
+
+######################### traces
+class Trace:
+    """
+        timeline of stages (spans) of a request. Spans can be nested, spans that are not ended, because of an
+        exception, are ended with the trace
+    """
+    def __init__(self,name,start):
+        self.name=name
+        self.start=start
+        self.end=None
+        self.description=""
+        self.spans=[] #[name,start,end,depth]
+        self.open_spans=[]
+
+    def setDescription(self,description):
+        """
+            description(str): description of request, written to slow request log
+        """
+        self.description=description
+
+    def beginSpan(self,name):
+        span=[name,monotonicTime(),None,len(self.open_spans)]
+        self.spans.append(span)
+        self.open_spans.append(span)
+        return span
+
+    def endSpan(self,span):
+        span[2]=monotonicTime()
+        for i in xrange(len(self.open_spans)-1,-1,-1):
+            if self.open_spans[i] is span: #spans opened after this span and not ended, are closed too
+                del(self.open_spans[i:])
+                break
+
+    def addSpan(self,name,start,end):
+        """
+            add an already finished span
+        """
+        self.spans.append([name,start,end,len(self.open_spans)])
+
+    def finish(self):
+        self.end=monotonicTime()
+        for span in self.open_spans:
+            span[2]=None
+        self.open_spans=[]
+
+    def getDuration(self):
+        return self.end-self.start
+
+    def getStageDurations(self):
+        """
+            return dic of span name=>total duration of spans with that name. Spans that are not ended are ignored
+        """
+        durations={}
+        for name,start,end,depth in self.spans:
+            if end!=None:
+                durations[name]=durations.get(name,0)+end-start
+        return durations
+
+    def __str__(self):
+        lines=["%s request took %.6f seconds %s"%(self.name,self.getDuration(),self.description)]
+        for name,start,end,depth in self.spans:
+            if end==None:
+                duration="not ended"
+            else:
+                duration="%.6f"%(end-start)
+            lines.append("%s+%.6f %s %s"%("    "*(depth+1),start-self.start,name,duration))
+        return "\n".join(lines)
+
+local=threading.local()
+
+def startTrace(name,start=None):
+    """
+        start trace of a request in current thread
+        name(str): name of request type, used as prefix of stage histograms
+        start(float): monotonic time that request started, current time if None
+    """
+    if start==None:
+        start=monotonicTime()
+    local.trace=Trace(name,start)
+    return local.trace
+
+def getTrace():
+    """
+        return trace of current thread, or None if thread is not traced
+    """
+    return getattr(local,"trace",None)
+
+def beginSpan(name):
+    """
+        begin a stage of current trace, return span that should be passed to endSpan.
+        Does nothing if current thread is not traced
+    """
+    trace=getTrace()
+    if trace==None:
+        return None
+    return trace.beginSpan(name)
+
+def endSpan(span):
+    if span!=None:
+        getTrace().endSpan(span)
+
+def endTrace():
+    """
+        end trace of current thread, add duration of stages to histograms, and log timeline of trace if it's slow
+    """
+    trace=getTrace()
+    if trace==None:
+        return
+    local.trace=None
+
+    trace.finish()
+    for name,duration in trace.getStageDurations().iteritems():
+        histogram.getHistogram("%s_stage_%s"%(trace.name,name)).observe(duration)
+
+    if defs.SLOW_REQUEST_TIME and trace.getDuration()>=defs.SLOW_REQUEST_TIME:
+        toLog(trace,LOG_SLOW)
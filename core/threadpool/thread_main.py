@@ -7,12 +7,13 @@ def init():
     init_wrappers()
 
 def init_wrappers():
-    global main_twrapper,server_twrapper,event_twrapper,radius_twrapper
+    global main_twrapper,server_twrapper,event_twrapper,radius_twrapper,snmp_twrapper
     
     main_twrapper=twrapper.ThreadPoolWrapper(defs.MAX_OTHER_THREADS,"main")
     server_twrapper=twrapper.ThreadPoolWrapper(defs.MAX_SERVER_THREADS,"server")
     event_twrapper=twrapper.ThreadPoolWrapper(defs.MAX_EVENT_THREADS,"event")
     radius_twrapper=twrapper.ThreadPoolWrapper(defs.MAX_RADIUS_THREADS,"radius")
+    snmp_twrapper=twrapper.ThreadPoolWrapper(defs.MAX_SNMP_THREADS,"snmp")
 
     from core import main
     main.registerPostInitMethod(postInit)
@@ -26,7 +27,7 @@ def shutdown(seconds):
     threadpool.getThreadPool().shutdown(seconds)
 
 def getTWrappers():
-    return [main_twrapper, server_twrapper, event_twrapper, radius_twrapper]
+    return [main_twrapper, server_twrapper, event_twrapper, radius_twrapper, snmp_twrapper]
     
 def runThread(method,args,wrapper_name="main"):
     if wrapper_name=="server":
@@ -35,6 +36,8 @@ def runThread(method,args,wrapper_name="main"):
         event_twrapper.runThread(method,args)
     elif wrapper_name=="radius":
         radius_twrapper.runThread(method,args)
+    elif wrapper_name=="snmp":
+        snmp_twrapper.runThread(method,args)
     else:
         main_twrapper.runThread(method,args)
 
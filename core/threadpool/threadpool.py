@@ -170,6 +170,22 @@ class ThreadPool:
     def __delFromInUse(self,thread):
         del(self.__in_use[thread])
 
+    def getInUseThreads(self):
+        """
+            return dic of thread=>name of wrapper that thread is running a job for
+        """
+        self.tlock.acquire()
+        try:
+            in_use={}
+            for thread,(event,method,args_list,wrapper,start_time) in self.__in_use.iteritems():
+                if wrapper==None:
+                    in_use[thread]="None"
+                else:
+                    in_use[thread]=wrapper.getName()
+            return in_use
+        finally:
+            self.tlock.release()
+
     ########################################
 
     def shutdown(self, secs=10): 
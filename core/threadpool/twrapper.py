@@ -1,6 +1,7 @@
 import threading
 from core.threadpool import threadpool
 from core.ibs_exceptions import *
+from core.stats import histogram
 import time, copy
 
 
@@ -24,6 +25,7 @@ class ThreadPoolWrapper:
         self.__usage_limit=usage_limit #thread usage limit
         self.__name=name
         self.__queue=[]# [[method, arg, queue_time]]
+        self.__queue_wait_histogram=histogram.getHistogram("thread_%s_queue_wait"%name)
 
     def getName(self):
         return self.__name
@@ -45,6 +47,7 @@ class ThreadPoolWrapper:
             else:
                 self.__runInThreadPool(method,args)     
                 self.__usage += 1
+                self.__queue_wait_histogram.observe(0)
         finally:
             self.__tlock.release()
 
@@ -53,7 +56,7 @@ class ThreadPoolWrapper:
             toLog("ThreadWrapper %s: Queued job %s %s"%(self.getName(), method, args), LOG_DEBUG)
             threadpool.getThreadPool().logThreads()
     
-        self.__queue.append([method,args, long(time.time())])
+        self.__queue.append([method,args, time.time()])
     
     def threadReleased(self):
         """
@@ -63,6 +66,7 @@ class ThreadPoolWrapper:
         try:
             if len(self.__queue)>0:
                 (method,args,queue_time)=self.__queue.pop(0)
+                self.__queue_wait_histogram.observe(time.time()-queue_time)
                 self.__runInThreadPool(method,args)
             else:
                 self.__usage -= 1
@@ -1,4 +1,8 @@
 from core.group import group_main
+from core.ibs_exceptions import *
+from core.errors import errorText
+from core.lib.general import internStr,internAttrs
+
 class AttributeHandler:
     def __init__(self,attr_updater_name):
         """
@@ -78,8 +82,10 @@ class UserAttributes:
             attributes(dic): set of user attributes in format {attr_name:attr_value}
             group_id(int): Group ID, that will be asked, if we don't have an attribute
         """
-        self.attributes=attributes
+        self.attributes=internAttrs(attributes)
         self.group_id=group_id
+        self.merged_attrs=None #snapshot of group attributes overridden by user attributes
+        self.group_version=None #version of group loader that merged_attrs built from
 
     def __getitem__(self,key):
         return self.getAttr(key)
@@ -90,11 +96,26 @@ class UserAttributes:
         """
         return group_main.getLoader().getGroupByID(self.group_id)
     
+    def __getMergedAttrs(self):
+        """
+            return merged attributes of user and group. Snapshot is rebuilt when it's invalidated by setAttr, or
+            when any group has been loaded/unloaded after it's been built.
+            Snapshot is never changed after creation, so readers in other threads always see a complete dic
+        """
+        merged_attrs=self.merged_attrs
+        group_version=group_main.getLoader().version #attribute instead of method, it's checked on every access
+        if merged_attrs==None or self.group_version!=group_version:
+            merged_attrs=self.__getGroupObj().getAttrs().copy()
+            merged_attrs.update(self.attributes)
+            self.merged_attrs=merged_attrs
+            self.group_version=group_version
+        return merged_attrs
+
     def getAttr(self,attr_name):
-        if self.userHasAttr(attr_name):
-            return self.attributes[attr_name]
-        
-        return self.__getGroupObj().getAttr(attr_name) 
+        try:
+            return self.__getMergedAttrs()[attr_name]
+        except KeyError:
+            raise GeneralException(errorText("GENERAL","ATTR_NOT_FOUND")%attr_name)
 
     def setAttr(self,attr_name,attr_value):
         """
@@ -102,14 +123,14 @@ class UserAttributes:
             use this with caution, this may lead to database inconsistency
         """
         assert(not self.attributes.has_key(attr_name))
-        self.attributes[attr_name]=attr_value
-            
+        self.attributes[internStr(attr_name)]=internStr(attr_value)
+        self.merged_attrs=None
 
     def userHasAttr(self,attr_name):
         return self.attributes.has_key(attr_name)
         
     def hasAttr(self,attr_name):
-        return self.userHasAttr(attr_name) or self.__getGroupObj().hasAttr(attr_name)
+        return self.__getMergedAttrs().has_key(attr_name)
     
     def getAllAttrs(self):
         return self.attributes
@@ -1,17 +1,27 @@
-from core.user import user_main,normal_user,loading_user,user
+from core.user import user_main,normal_user,loading_user,user,online_store,online_index,online_journal
 from core.event import event,periodic_events
 from core.ibs_exceptions import *
 from core.errors import errorText
 from core.ras.msgs import RasMsg
 from core.ras import ras_main
 from core.log_console.console_main import getLogConsole
+from core.threadpool import thread_main
+from core.stats import trace
+from core import main
+import threading
 import copy
 
 class OnlineUsers:
     def __init__(self):
         self.user_onlines={}#user_id=>user_obj
         self.ras_onlines={}#(ras_id,unique_id)=>user_obj
+        self.session_store=online_store.OnlineSessionStore() #columns of ras_onlines sessions
+        self.session_index=online_index.OnlineSessionIndex() #sorted and hash indexes of ras_onlines sessions
         self.loading_user=loading_user.LoadingUser()
+        if defs.ONLINE_SESSIONS_PERSIST:
+            self.journal=online_journal.OnlineJournal(defs.ONLINE_SESSIONS_FILE)
+        else:
+            self.journal=None
 
     def __loadUserObj(self,loaded_user,obj_type):
         return user.User(loaded_user,obj_type)
@@ -21,9 +31,16 @@ class OnlineUsers:
         global_unique_id = user_obj.getGlobalUniqueID(user_obj.instances)
         self.user_onlines[user_obj.getUserID()]=user_obj
         self.ras_onlines[global_unique_id]=user_obj
+        self.session_store.addSession(user_obj,user_obj.instances)
+        self.session_index.addSession(user_obj,user_obj.instances)
+        self.__journalSession(user_obj,user_obj.instances)
 
     def __removeFromRasOnlines(self,global_unique_id):
         del(self.ras_onlines[global_unique_id])
+        self.session_store.removeSession(global_unique_id)
+        self.session_index.removeSession(global_unique_id)
+        if self.journal!=None:
+            self.journal.removeSession(global_unique_id)
     
     def __removeFromUserOnlines(self,user_obj):
         del(self.user_onlines[user_obj.getUserID()])
@@ -60,9 +77,24 @@ class OnlineUsers:
     def getOnlineUsersByRas(self):
         return copy.copy(self.ras_onlines)
 
+    def getSessionStore(self):
+        return self.session_store
+
+    def getSessionIndex(self):
+        return self.session_index
+
     def getOnlinesCount(self):
         return len(self.ras_onlines)
 
+    def getOnlinesCountByRas(self):
+        """
+            return a dic of ras_id=>number of onlines on ras
+        """
+        counts={}
+        for ras_id,unique_id in self.ras_onlines.keys():
+            counts[ras_id]=counts.get(ras_id,0)+1
+        return counts
+
 ############################################
     def isUserOnline(self,user_id):
         """
@@ -108,6 +140,7 @@ class OnlineUsers:
                 toLog("Reload User called while user is not online for user_id: %s"%user_id,LOG_ERROR)
             else:
                 user_obj._reload()
+                self.session_index.reindexUser(user_obj)
                 if user_obj.accountingStarted(None):
                     self.recalcNextUserEvent(user_obj.getUserID(),True) 
         finally:                                                    
@@ -122,12 +155,144 @@ class OnlineUsers:
         self.loading_user.loadingStart(user_obj.getUserID())
         try:
             recalc_event=user_obj.update(ras_msg)
+            instance=user_obj.getInstanceFromRasMsg(ras_msg)
+            if instance!=None:
+                self.__journalSession(user_obj,instance)
             if recalc_event:
                 self.recalcNextUserEvent(user_obj.getUserID(),user_obj.instances>1 or (user_obj.instances==1 and not ras_msg.hasAttr("start_accounting")))
         finally:
             self.loading_user.loadingEnd(user_obj.getUserID())
 
     
+############################################
+    def __journalSession(self,user_obj,instance,refresh=False):
+        """
+            write state of "instance" of user_obj to journal of online sessions
+            refresh(bool): only keep state to be written on next compaction of journal
+        """
+        if self.journal==None:
+            return
+
+        try:
+            state=user_obj.getSessionState(instance)
+            state["ras"]=ras_main.getLoader().getRasByID(state["ras_id"]).getSessionState(state["unique_id_val"])
+            if refresh:
+                self.journal.refreshSession(user_obj.getGlobalUniqueID(instance),state)
+            else:
+                self.journal.setSession(user_obj.getGlobalUniqueID(instance),state)
+        except:
+            logException(LOG_ERROR,"OnlineUsers: Can't write session of user %s to journal"%user_obj.getUserID())
+
+    def snapshotSessions(self):
+        """
+            refresh state of all online sessions in journal, and compact the journal
+        """
+        if self.journal==None:
+            return
+
+        for user_id in self.user_onlines.keys():
+            self.loading_user.loadingStart(user_id)
+            try:
+                user_obj=self.getUserObj(user_id)
+                if user_obj!=None:
+                    for instance in xrange(1,user_obj.instances+1):
+                        self.__journalSession(user_obj,instance,True)
+            finally:
+                self.loading_user.loadingEnd(user_id)
+
+        try:
+            self.journal.compact()
+        except:
+            logException(LOG_ERROR,"OnlineUsers: Can't compact online sessions journal")
+
+    def restoreOnlines(self):
+        """
+            restore online sessions saved in journal before restart. Should be called while starting, before
+            radius server receives requests. Restored sessions are checked on rases in background after start
+        """
+        if self.journal==None:
+            return
+
+        try:
+            sessions=self.journal.load().values()
+        except:
+            logException(LOG_ERROR,"OnlineUsers: Can't load online sessions journal")
+            sessions=[]
+
+        sessions.sort(lambda state1,state2:cmp(state1["login_time"],state2["login_time"])) #keep order of instances
+        restored=0
+        for state in sessions:
+            try:
+                self.__restoreSession(state)
+                restored+=1
+            except:
+                logException(LOG_ERROR,"OnlineUsers: Can't restore session of user %s on ras %s"%(state["user_id"],state["ras_id"]))
+
+        toLog("OnlineUsers: Restored %s of %s online sessions"%(restored,len(sessions)),LOG_DEBUG)
+
+        try:
+            self.journal.compact()
+        except:
+            logException(LOG_ERROR,"OnlineUsers: Can't write online sessions journal, online sessions won't be persisted")
+            self.journal=None
+            return
+
+        periodic_events.getManager().register(online_journal.OnlineSnapshotPeriodicEvent())
+        periodic_events.getManager().register(online_journal.OnlineJournalFlushPeriodicEvent(self.journal))
+        if restored:
+            main.registerPostInitMethod(self.__checkRestoredOnlines)
+
+    def __restoreSession(self,state):
+        """
+            login instance of user again, with state saved in journal
+        """
+        ras_obj=ras_main.getLoader().getRasByID(state["ras_id"])
+        ras_obj.restoreSessionState(state["unique_id_val"],state["ras"])
+
+        ras_msg=RasMsg(None,None,ras_obj)
+        for attr_name,value in state["attrs"].iteritems():
+            ras_msg[attr_name]=value
+        ras_msg["unique_id"]=state["unique_id"]
+        ras_msg[state["unique_id"]]=state["unique_id_val"]
+        ras_msg["ip_assignment"]=False
+        ras_msg["restored_session"]=True
+        if state["start_accounting"]!=None:
+            ras_msg["start_accounting"]=True
+
+        loaded_user=user_main.getUserPool().getUserByID(state["user_id"],True)
+        self.loading_user.loadingStart(loaded_user.getUserID())
+        try:
+            user_obj=None
+            try:
+                user_obj=self.getUserObj(loaded_user.getUserID())
+                if user_obj==None:
+                    user_obj=self.__loadUserObj(loaded_user,state["type"])
+                elif user_obj.getType()!=state["type"]:
+                    raise GeneralException(errorText("USER_LOGIN","CANT_USE_MORE_THAN_ONE_SERVICE"))
+
+                user_obj.login(ras_msg)
+                try:
+                    user_obj.restoreSession(user_obj.instances,state)
+                except:
+                    ras_msg["no_commit"]=True
+                    ras_msg["no_connection_log"]=True
+                    user_obj.logout(user_obj.instances,ras_msg)
+                    raise
+
+                self.__authSuccessfull(user_obj,ras_msg)
+            except:
+                if user_obj==None or user_obj.instances==0:
+                    loaded_user.setOnlineFlag(False)
+                raise
+        finally:
+            self.loading_user.loadingEnd(loaded_user.getUserID())
+
+    def __checkRestoredOnlines(self):
+        """
+            check restored sessions on rases, sessions that are no longer online on ras are cleared by online check
+        """
+        thread_main.runThread(self.checkOnlines,[],"event")
+
 ############################################
     def recalcNextUserEvent(self,user_id,remove_prev_event=False):
         """
@@ -173,6 +338,8 @@ class OnlineUsers:
         """
             check ibs current list of online users, by asking ras to say if user is online or not
         """
+        online_results=self.__checkRasesOnline(self.__createIsOnlineMsgs())
+
         for user_id in self.user_onlines.keys():
             self.loading_user.loadingStart(user_id)
             try:
@@ -181,7 +348,7 @@ class OnlineUsers:
                 except KeyError:
                     pass
                 else:
-                    self.__checkStaleOnlines(user_obj)
+                    self.__checkStaleOnlines(user_obj, online_results)
                     self.__negCreditCheck(user_obj)
                     self.__killedCheck(user_obj)
 
@@ -189,13 +356,91 @@ class OnlineUsers:
                 logException(LOG_ERROR)
             self.loading_user.loadingEnd(user_id)
 
-    def __checkStaleOnlines(self, user_obj):
+    def __createIsOnlineMsgs(self):
+        """
+            create IS_ONLINE messages of all online instances
+            return a dic of ras_id=>list of user_msgs
+        """
+        ras_msgs={}
+        for user_id in self.user_onlines.keys():
+            self.loading_user.loadingStart(user_id)
+            try:
+                try:
+                    user_obj=self.user_onlines[user_id]
+                except KeyError:
+                    pass
+                else:
+                    for instance in xrange(1,user_obj.instances+1):
+                        user_msg=user_obj.createUserMsg(instance,"IS_ONLINE")
+                        ras_msgs.setdefault(user_msg["ras_id"],[]).append(user_msg)
+            except:
+                logException(LOG_ERROR)
+            self.loading_user.loadingEnd(user_id)
+
+        return ras_msgs
+
+    def __checkRasesOnline(self, ras_msgs):
+        """
+            ask each ras about its onlines in "ras_msgs", rases are asked in parallel
+            return a dic of (ras_id,unique_id_val)=>bool. Instances of rases that failed or didn't answer
+            in CHECK_ONLINE_INTERVAL are not in the dic
+        """
+        online_results={}
+        lock=threading.Lock()
+        all_done=threading.Event()
+        pending=[len(ras_msgs)]
+
+        def checkRas(ras_id, user_msgs):
+            try:
+                try:
+                    ras_results=ras_main.getLoader().getRasByID(ras_id)._isOnlineBatch(user_msgs)
+                    lock.acquire()
+                    try:
+                        for user_msg, is_online in zip(user_msgs, ras_results):
+                            online_results[(ras_id, user_msg.getUniqueIDValue())]=is_online
+                    finally:
+                        lock.release()
+                except:
+                    logException(LOG_ERROR, "Check Online of ras %s"%ras_id)
+            finally:
+                lock.acquire()
+                try:
+                    pending[0]-=1
+                    if pending[0]==0:
+                        all_done.set()
+                finally:
+                    lock.release()
+
+        if not ras_msgs:
+            return online_results
+
+        for ras_id in ras_msgs:
+            thread_main.runThread(checkRas, [ras_id, ras_msgs[ras_id]], "main")
+
+        all_done.wait(defs.CHECK_ONLINE_INTERVAL)
+        if not all_done.isSet():
+            toLog("Check Online: %s rases didn't answer in %s seconds"%(pending[0], defs.CHECK_ONLINE_INTERVAL), LOG_ERROR)
+
+        lock.acquire()
+        try:
+            return copy.copy(online_results)
+        finally:
+            lock.release()
+
+    def __checkStaleOnlines(self, user_obj, online_results):
+        """
+            online_results(dic): result of __checkRasesOnline. Instances that are not in online_results
+                                 (ex. logged in after check) are not touched
+        """
         instance = user_obj.instances
         while instance > 0:
             instance_info=user_obj.getInstanceInfo(instance)
-            user_msg=user_obj.createUserMsg(instance,"IS_ONLINE")
+            global_unique_id=user_obj.getGlobalUniqueID(instance)
+
+            if not online_results.has_key(global_unique_id):
+                pass
 
-            if user_msg.send():
+            elif online_results[global_unique_id]:
                 instance_info["check_online_fails"] = 0
             else:
                 instance_info["check_online_fails"] += 1
@@ -374,7 +619,9 @@ class OnlineUsers:
     def internetAuthenticate(self,ras_msg):
         self.__checkDuplicateOnline(ras_msg)
 
+        span=trace.beginSpan("user_pool")
         loaded_user=user_main.getUserPool().getUserByNormalUsername(ras_msg["username"],True)
+        trace.endSpan(span)
         self.loading_user.loadingStart(loaded_user.getUserID())
         try:
             user_obj=None
@@ -382,12 +629,18 @@ class OnlineUsers:
                 user_obj=self.getUserObj(loaded_user.getUserID())
 
                 if user_obj==None:
+                    span=trace.beginSpan("load_user")
                     user_obj=self.__loadUserObj(loaded_user,"Normal")
+                    trace.endSpan(span)
                 elif not user_obj.isNormalUser():
                     raise GeneralException(errorText("USER_LOGIN","CANT_USE_MORE_THAN_ONE_SERVICE"))
                     
+                span=trace.beginSpan("login")
                 user_obj.login(ras_msg)
+                trace.endSpan(span)
+                span=trace.beginSpan("add_online")
                 self.__authSuccessfull(user_obj,ras_msg)
+                trace.endSpan(span)
             except:
                 if user_obj==None or user_obj.instances==0:
                     loaded_user.setOnlineFlag(False)
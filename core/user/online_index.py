@@ -0,0 +1,224 @@
+from core.user.online_store import SERVICE_NORMAL,SERVICE_VOIP
+from core.ras import ras_main
+from core.ibs_exceptions import *
+import threading
+import bisect
+
+class OnlineSessionIndex:
+    """
+        Secondary indexes of online sessions, parallel to OnlineUsers.ras_onlines, used by paginated online
+        reports. Values that don't change while session is online are kept in sorted lists of
+        (value,global_unique_id) per service, and ras, group and owner of sessions are kept in hash indexes,
+        so a report window can be found without walking all online users.
+        Owner and group names are taken when session is added or user is reindexed
+    """
+    SORTED_FIELDS={SERVICE_NORMAL:("user_id","username","login_time_epoch","ras_ip","ras_description",
+                                   "unique_id_val","owner_name","group_name"),
+                   SERVICE_VOIP:("user_id","username","ras_ip","ras_description",
+                                 "unique_id_val","owner_name","group_name")} #voip login time changes on call start
+
+    HASH_FIELDS=("ras_id","group_id","owner_id")
+
+    def __init__(self):
+        self.lock=threading.RLock()
+        self.sessions={} #global unique id=>(service,values dic)
+        self.sorted_indexes={} #(service,field)=>sorted list of (value,global_unique_id)
+        for service,fields in self.SORTED_FIELDS.iteritems():
+            for field in fields:
+                self.sorted_indexes[(service,field)]=[]
+        self.hash_indexes={} #(service,field)=>{value=>{global_unique_id=>True}}
+        for service in self.SORTED_FIELDS:
+            for field in self.HASH_FIELDS:
+                self.hash_indexes[(service,field)]={}
+
+    def addSession(self,user_obj,instance):
+        """
+            index "instance" of user_obj, an existing session with same global unique id is replaced
+        """
+        global_unique_id=user_obj.getGlobalUniqueID(instance)
+        try:
+            service,values=self.__getValues(user_obj,instance)
+        except:
+            logException(LOG_ERROR,"OnlineSessionIndex.addSession")
+            self.removeSession(global_unique_id)
+            return
+
+        self.lock.acquire()
+        try:
+            self.__removeSession(global_unique_id)
+            self.sessions[global_unique_id]=(service,values)
+            for field in self.SORTED_FIELDS[service]:
+                bisect.insort(self.sorted_indexes[(service,field)],(values[field],global_unique_id))
+            for field in self.HASH_FIELDS:
+                self.hash_indexes[(service,field)].setdefault(values[field],{})[global_unique_id]=True
+        finally:
+            self.lock.release()
+
+    def removeSession(self,global_unique_id):
+        self.lock.acquire()
+        try:
+            self.__removeSession(global_unique_id)
+        finally:
+            self.lock.release()
+
+    def reindexUser(self,user_obj):
+        """
+            index all instances of user_obj again, should be called after user reload, as owner and
+            group of user may have changed
+        """
+        for instance in xrange(1,user_obj.instances+1):
+            self.addSession(user_obj,instance)
+
+    def __removeSession(self,global_unique_id):
+        """
+            should be called with lock held
+        """
+        if not self.sessions.has_key(global_unique_id):
+            return
+
+        service,values=self.sessions.pop(global_unique_id)
+        for field in self.SORTED_FIELDS[service]:
+            index=self.sorted_indexes[(service,field)]
+            del(index[bisect.bisect_left(index,(values[field],global_unique_id))])
+        for field in self.HASH_FIELDS:
+            hash_index=self.hash_indexes[(service,field)]
+            del(hash_index[values[field]][global_unique_id])
+            if not hash_index[values[field]]:
+                del(hash_index[values[field]])
+
+    def __getValues(self,user_obj,instance):
+        """
+            return (service,values dic) of instance, values are same as getFormattedOnlineUsers report dic
+        """
+        instance_info=user_obj.getInstanceInfo(instance)
+        basic_user=user_obj.getLoadedUser().getBasicUser()
+        ras_obj=ras_main.getLoader().getRasByID(instance_info["ras_id"])
+        owner_obj=basic_user.getOwnerObj()
+
+        if user_obj.isNormalUser():
+            service=SERVICE_NORMAL
+            if instance_info["attrs"].has_key("username"):
+                username=instance_info["attrs"]["username"]
+            elif user_obj.getUserAttrs().hasAttr("normal_username"):
+                username=user_obj.getUserAttrs()["normal_username"]
+            else:
+                username="_PLAN_"
+        else:
+            service=SERVICE_VOIP
+            username=user_obj.getUserAttrs()["voip_username"]
+
+        return (service,{"user_id":user_obj.getUserID(),
+                         "username":username,
+                         "login_time_epoch":instance_info["login_time"],
+                         "ras_id":instance_info["ras_id"],
+                         "ras_ip":ras_obj.getRasIP(),
+                         "ras_description":ras_obj.getRasDesc(),
+                         "unique_id_val":instance_info["unique_id_val"],
+                         "owner_id":owner_obj.getAdminID(),
+                         "owner_name":owner_obj.getUsername(),
+                         "group_id":basic_user.getGroupID(),
+                         "group_name":basic_user.getGroupObj().getGroupName()})
+
+    ######################################
+    def isSortable(self,service,field):
+        """
+            return True if sessions of "service" can be sorted by "field" using index
+        """
+        return field in self.SORTED_FIELDS[service]
+
+    def filterSessions(self,service,filters):
+        """
+            return list of global unique ids of "service" sessions that pass all filters
+            filters(dic): can contain "ras_id", "group_id" and "owner_id" keys with lists of accepted
+                          ids, and "username_prefix" with list of accepted username prefixes.
+                          A session passes a filter if it matches any of its values
+        """
+        self.lock.acquire()
+        try:
+            matches=self.__filterSessions(service,filters)
+            if matches==None:
+                return map(lambda x:x[1],self.sorted_indexes[(service,"user_id")])
+            return matches.keys()
+        finally:
+            self.lock.release()
+
+    def getPage(self,service,field,desc,filters,_from,to):
+        """
+            return (total_rows,list of global unique ids) of "service" sessions that pass filters, sorted by "field"
+            list contains rows _from to "to" of sorted sessions
+            field(str): should be sortable, see isSortable
+            filters(dic): see filterSessions
+        """
+        self.lock.acquire()
+        try:
+            index=self.sorted_indexes[(service,field)]
+            matches=self.__filterSessions(service,filters)
+            if matches==None:
+                total_rows=len(index)
+                if _from>=total_rows:
+                    return (total_rows,[])
+                if desc:
+                    window=index[max(0,total_rows-to):total_rows-_from]
+                    window.reverse()
+                else:
+                    window=index[_from:to]
+                return (total_rows,map(lambda x:x[1],window))
+
+            total_rows=len(matches)
+            if total_rows*8<len(index): #few matches, sort them instead of walking the index
+                sessions=self.sessions
+                window=map(lambda global_unique_id:(sessions[global_unique_id][1][field],global_unique_id),matches)
+                window.sort()
+                if desc:
+                    window.reverse()
+                return (total_rows,map(lambda x:x[1],window[_from:to]))
+
+            window=[]
+            if desc:
+                index=reversed(index)
+            for value,global_unique_id in index:
+                if matches.has_key(global_unique_id):
+                    window.append(global_unique_id)
+                    if len(window)>=to:
+                        break
+            return (total_rows,window[_from:to])
+        finally:
+            self.lock.release()
+
+    def __filterSessions(self,service,filters):
+        """
+            return dic of global unique ids that pass filters, or None if there's no filter
+            should be called with lock held
+        """
+        matches=None
+        for field in self.HASH_FIELDS:
+            if not filters.has_key(field):
+                continue
+            hash_index=self.hash_indexes[(service,field)]
+            field_matches={}
+            for value in filters[field]:
+                field_matches.update(hash_index.get(value,{}))
+            matches=self.__intersect(matches,field_matches)
+
+        if filters.has_key("username_prefix"):
+            index=self.sorted_indexes[(service,"username")]
+            field_matches={}
+            for prefix in filters["username_prefix"]:
+                i=bisect.bisect_left(index,(prefix,))
+                while i<len(index) and index[i][0].startswith(prefix):
+                    field_matches[index[i][1]]=True
+                    i+=1
+            matches=self.__intersect(matches,field_matches)
+
+        return matches
+
+    def __intersect(self,matches,field_matches):
+        if matches==None:
+            return field_matches
+        if len(field_matches)<len(matches):
+            matches,field_matches=field_matches,matches
+        intersection={}
+        for global_unique_id in matches:
+            if field_matches.has_key(global_unique_id):
+                intersection[global_unique_id]=True
+        return intersection
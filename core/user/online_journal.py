@@ -0,0 +1,189 @@
+from core.ibs_exceptions import *
+from core.event import periodic_events
+from core import defs
+import threading
+import cPickle
+import struct
+import zlib
+import time
+import os
+
+class OnlineJournal:
+    """
+        keeps state of online sessions in a local file, so they can be restored after a restart.
+        File is an append only journal of records, each record is length, crc32 and a pickled
+        ("set",global_unique_id,state) or ("remove",global_unique_id) tuple. Journal is compacted periodically
+        by writing all current sessions to a temporary file and renaming it over the journal.
+        Appended records are buffered and written every ONLINE_SESSIONS_FLUSH_INTERVAL seconds, so a crash
+        loses at most records of last interval. Reading stops at first incomplete or corrupted record
+    """
+    HEADER=struct.Struct(">II") #length,crc32
+
+    def __init__(self,file_name):
+        self.file_name=file_name
+        self.lock=threading.Lock()
+        self.write_lock=threading.Lock() #keeps order of writes to file, acquired before lock
+        self.sessions={} #global_unique_id=>encoded "set" record of last state of session
+        self.pending=[] #encoded records not written to file yet
+        self.fd=None
+
+    def load(self):
+        """
+            read sessions from journal file, return dic of global_unique_id=>state
+            return an empty dic if journal doesn't exist or is older than ONLINE_SESSIONS_MAX_AGE
+        """
+        try:
+            journal_age=time.time()-os.stat(self.file_name).st_mtime
+        except OSError:
+            return {}
+
+        if journal_age>defs.ONLINE_SESSIONS_MAX_AGE:
+            toLog("OnlineJournal: Ignoring online sessions journal, it's %d seconds old"%journal_age,LOG_ERROR)
+            return {}
+
+        sessions={}
+        fd=open(self.file_name,"rb")
+        try:
+            for record in self.__readRecords(fd):
+                if record[0]=="set":
+                    sessions[record[1]]=record[2]
+                elif sessions.has_key(record[1]):
+                    del(sessions[record[1]])
+        finally:
+            fd.close()
+
+        return sessions
+
+    def __readRecords(self,fd):
+        while True:
+            header=fd.read(self.HEADER.size)
+            if len(header)<self.HEADER.size:
+                return
+
+            length,crc=self.HEADER.unpack(header)
+            data=fd.read(length)
+            if len(data)<length or zlib.crc32(data)&0xffffffff!=crc:
+                toLog("OnlineJournal: Incomplete record at offset %s of journal, ignoring rest of it"%(fd.tell()-len(data)-self.HEADER.size),LOG_ERROR)
+                return
+
+            try:
+                yield cPickle.loads(data)
+            except:
+                logException(LOG_ERROR,"OnlineJournal: Can't load record")
+
+    def __createRecord(self,record):
+        data=cPickle.dumps(record,cPickle.HIGHEST_PROTOCOL)
+        return self.HEADER.pack(len(data),zlib.crc32(data)&0xffffffff)+data
+
+    def __append(self,record):
+        """
+            queue encoded record to be written to journal on next flush, should be called with lock held
+        """
+        if self.fd==None: #not opened yet
+            return
+
+        self.pending.append(record)
+
+    def flush(self):
+        """
+            write queued records to journal file
+        """
+        self.write_lock.acquire()
+        try:
+            self.lock.acquire()
+            try:
+                pending,self.pending=self.pending,[]
+            finally:
+                self.lock.release()
+
+            if not pending or self.fd==None:
+                return
+
+            try:
+                self.fd.write("".join(pending))
+                self.fd.flush()
+            except:
+                logException(LOG_ERROR,"OnlineJournal: Can't write to journal")
+        finally:
+            self.write_lock.release()
+
+    ##################################
+    def setSession(self,global_unique_id,state):
+        """
+            write new state of session to journal
+        """
+        record=self.__createRecord(("set",global_unique_id,state))
+        self.lock.acquire()
+        try:
+            self.sessions[global_unique_id]=record
+            self.__append(record)
+        finally:
+            self.lock.release()
+
+    def refreshSession(self,global_unique_id,state):
+        """
+            keep new state of session, to be written on next compaction
+        """
+        record=self.__createRecord(("set",global_unique_id,state))
+        self.lock.acquire()
+        try:
+            if self.sessions.has_key(global_unique_id):
+                self.sessions[global_unique_id]=record
+        finally:
+            self.lock.release()
+
+    def removeSession(self,global_unique_id):
+        self.lock.acquire()
+        try:
+            if self.sessions.has_key(global_unique_id):
+                del(self.sessions[global_unique_id])
+                self.__append(self.__createRecord(("remove",global_unique_id)))
+        finally:
+            self.lock.release()
+
+    ##################################
+    def compact(self):
+        """
+            rewrite journal with current state of sessions, and open it for appending
+        """
+        self.write_lock.acquire()
+        self.lock.acquire()
+        try:
+            self.pending=[] #state of sessions is written completely
+            dir_name=os.path.dirname(self.file_name)
+            if dir_name and not os.path.isdir(dir_name):
+                os.makedirs(dir_name)
+
+            tmp_file_name="%s.tmp"%self.file_name
+            tmp_fd=open(tmp_file_name,"wb")
+            try:
+                tmp_fd.write("".join(self.sessions.itervalues()))
+                tmp_fd.flush()
+                os.fsync(tmp_fd.fileno())
+            finally:
+                tmp_fd.close()
+
+            os.rename(tmp_file_name,self.file_name)
+
+            if self.fd!=None:
+                self.fd.close()
+            self.fd=open(self.file_name,"ab")
+        finally:
+            self.lock.release()
+            self.write_lock.release()
+
+class OnlineSnapshotPeriodicEvent(periodic_events.PeriodicEvent):
+    def __init__(self):
+        periodic_events.PeriodicEvent.__init__(self,"Online Sessions Snapshot",defs.ONLINE_SESSIONS_SNAPSHOT_INTERVAL,[],0)
+
+    def run(self):
+        from core.user import user_main
+        user_main.getOnline().snapshotSessions()
+
+class OnlineJournalFlushPeriodicEvent(periodic_events.PeriodicEvent):
+    def __init__(self,journal):
+        periodic_events.PeriodicEvent.__init__(self,"Online Sessions Journal Flush",defs.ONLINE_SESSIONS_FLUSH_INTERVAL,[],0)
+        self.journal=journal
+
+    def run(self):
+        self.journal.flush()
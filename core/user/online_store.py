@@ -0,0 +1,210 @@
+from core.ibs_exceptions import *
+import threading
+import itertools
+import array
+
+SERVICE_NORMAL=1
+SERVICE_VOIP=2
+
+class OnlineSessionStore:
+    """
+        Columnar store of online sessions, parallel to OnlineUsers.ras_onlines.
+        Each online instance has a row, and each column is an array with one value per row. Rows are kept
+        dense by moving the last row into place of removed rows, so loops and reports can compute sums and
+        groupings with passes over columns, instead of walking user objects and their instance infos.
+        Counters and credit are snapshots, updated by refresh
+    """
+    COLUMNS=(("ras_id","l"),
+             ("user_id","l"),
+             ("service","b"),
+             ("login_time","d"),
+             ("in_bytes","d"),
+             ("out_bytes","d"),
+             ("in_rate","d"),
+             ("out_rate","d"),
+             ("credit","d"))
+
+    def __init__(self):
+        self.lock=threading.RLock()
+        self.columns={}
+        for name,type_code in self.COLUMNS:
+            self.columns[name]=array.array(type_code)
+        self.keys=[] #global unique id of rows
+        self.user_objs=[] #user object of rows
+        self.rows={} #global unique id=>row
+
+    def addSession(self,user_obj,instance):
+        """
+            add a row for "instance" of user_obj, an existing row with same global unique id is replaced
+        """
+        global_unique_id=user_obj.getGlobalUniqueID(instance)
+        if user_obj.isNormalUser():
+            service=SERVICE_NORMAL
+        else:
+            service=SERVICE_VOIP
+
+        values={"ras_id":global_unique_id[0],
+                "user_id":user_obj.getUserID(),
+                "service":service,
+                "login_time":user_obj.getInstanceInfo(instance)["login_time"],
+                "in_bytes":0,
+                "out_bytes":0,
+                "in_rate":0,
+                "out_rate":0,
+                "credit":0}
+
+        self.lock.acquire()
+        try:
+            self.__removeRow(global_unique_id)
+            self.rows[global_unique_id]=len(self.keys)
+            self.keys.append(global_unique_id)
+            self.user_objs.append(user_obj)
+            for name,type_code in self.COLUMNS:
+                self.columns[name].append(values[name])
+        finally:
+            self.lock.release()
+
+    def removeSession(self,global_unique_id):
+        self.lock.acquire()
+        try:
+            self.__removeRow(global_unique_id)
+        finally:
+            self.lock.release()
+
+    def __removeRow(self,global_unique_id):
+        """
+            remove row of global_unique_id by moving last row into its place
+            should be called with lock held
+        """
+        if not self.rows.has_key(global_unique_id):
+            return
+
+        row=self.rows.pop(global_unique_id)
+        last_row=len(self.keys)-1
+        if row!=last_row:
+            self.keys[row]=self.keys[last_row]
+            self.user_objs[row]=self.user_objs[last_row]
+            self.rows[self.keys[row]]=row
+            for column in self.columns.itervalues():
+                column[row]=column[last_row]
+
+        self.keys.pop()
+        self.user_objs.pop()
+        for column in self.columns.itervalues():
+            column.pop()
+
+    ######################################
+    def refresh(self,counters=True,credit=False):
+        """
+            update counters (in/out bytes and rates) of internet sessions from their rases, and/or credit
+            snapshot of users. Rases are asked without holding store lock, and rows that logged out meanwhile
+            are ignored
+        """
+        self.lock.acquire()
+        try:
+            rows=zip(self.keys,self.user_objs,self.columns["service"])
+        finally:
+            self.lock.release()
+
+        if counters:
+            self.__setValues(("in_bytes","out_bytes","in_rate","out_rate"),self.__getCounters(rows))
+        if credit:
+            self.__setValues(("credit",),self.__getCredits(rows))
+
+    def __getCounters(self,rows):
+        """
+            return list of (global_unique_id,(in_bytes,out_bytes,in_rate,out_rate)) of internet sessions in rows
+        """
+        counters=[]
+        for global_unique_id,user_obj,service in rows:
+            if service!=SERVICE_NORMAL:
+                continue
+            try:
+                instance=user_obj.getInstanceFromUniqueID(global_unique_id[0],global_unique_id[1])
+                if instance!=None:
+                    counters.append((global_unique_id,user_obj.getTypeObj().getInOutBytes(instance)))
+            except:
+                logException(LOG_DEBUG,"OnlineSessionStore.refresh")
+        return counters
+
+    def __getCredits(self,rows):
+        """
+            return list of (global_unique_id,(credit,)) of sessions in rows, credit of each user is calculated once
+        """
+        credits={} #user_id=>credit
+        session_credits=[]
+        for global_unique_id,user_obj,service in rows:
+            try:
+                if not credits.has_key(user_obj.getUserID()):
+                    credits[user_obj.getUserID()]=user_obj.calcCurrentCredit()
+                session_credits.append((global_unique_id,(credits[user_obj.getUserID()],)))
+            except:
+                logException(LOG_DEBUG,"OnlineSessionStore.refresh")
+        return session_credits
+
+    def __setValues(self,names,values):
+        """
+            set columns with "names" to values, values is a list of (global_unique_id,tuple of values)
+        """
+        columns=map(lambda name:self.columns[name],names)
+        self.lock.acquire()
+        try:
+            rows=self.rows
+            for global_unique_id,row_values in values:
+                if not rows.has_key(global_unique_id):
+                    continue
+                row=rows[global_unique_id]
+                for column,value in zip(columns,row_values):
+                    column[row]=value
+        finally:
+            self.lock.release()
+
+    ######################################
+    def getColumns(self,*names):
+        """
+            return a tuple of copies of columns with "names", taken at once so rows are consistent
+            "keys" can be used as name of global unique id column
+        """
+        self.lock.acquire()
+        try:
+            columns=[]
+            for name in names:
+                if name=="keys":
+                    columns.append(list(self.keys))
+                else:
+                    columns.append(self.columns[name][:])
+            return tuple(columns)
+        finally:
+            self.lock.release()
+
+    def getCount(self,service=None):
+        """
+            return number of sessions, only sessions of "service" if it's not None
+        """
+        if service==None:
+            return len(self.keys)
+        return list(self.getColumns("service")[0]).count(service)
+
+    def countByRas(self,service=None):
+        """
+            return a dic of ras_id=>number of sessions, only sessions of "service" if it's not None
+        """
+        ras_ids,services=self.getColumns("ras_id","service")
+        if service!=None:
+            ras_ids=itertools.compress(ras_ids,map(lambda x:x==service,services))
+
+        counts={}
+        for ras_id in ras_ids:
+            counts[ras_id]=counts.get(ras_id,0)+1
+        return counts
+
+    def sumColumns(self,names,service=None):
+        """
+            return a list of sums of columns with "names", only sessions of "service" if it's not None
+        """
+        columns=self.getColumns("service",*names)
+        if service==None:
+            return map(sum,columns[1:])
+
+        mask=map(lambda x:x==service,columns[0])
+        return map(lambda column:sum(itertools.compress(column,mask)),columns[1:])
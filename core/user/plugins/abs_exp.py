@@ -14,8 +14,10 @@ def init():
     user_main.getAttributeManager().registerHandler(AbsExpDateAttrHandler(),["abs_exp_date"],["abs_exp_date"],["abs_exp_date"])
 
 class AbsExpDate(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="abs_exp_date"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"abs_exp_date")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -13,8 +13,10 @@ def init():
     user_main.getAttributeManager().registerHandler(AssignIPAttrHandler(),["assign_ip"],["assign_ip"],[])
 
 class AssignIPUserPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="assign_ip"
+
     def __init__(self, user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self, user_obj, "assign_ip")
+        user_plugin.AttrCheckUserPlugin.__init__(self, user_obj)
         if self.hasAttr():
             self.__initIPContainer()
 
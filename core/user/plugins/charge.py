@@ -77,6 +77,48 @@ class ChargeUserPlugin(user_plugin.UserPlugin):
             self.charge_obj.logout(self.user_obj,instance,self.user_obj.getInstanceInfo(instance)["no_commit"])
             self.charge_initialized-=1
 
+    def saveSession(self,instance):
+        if instance>self.charge_initialized or not hasattr(self.user_obj,"charge_info"):
+            return None
+
+        charge_info=self.user_obj.charge_info
+        _index=instance-1
+        state={"accounting_started":charge_info.accounting_started[_index],
+               "rule_start":charge_info.rule_start[_index],
+               "credit_prev_usage_instance":charge_info.credit_prev_usage_instance[_index],
+               "effective_rule_id":None}
+
+        if charge_info.effective_rules[_index]!=None:
+            state["effective_rule_id"]=charge_info.effective_rules[_index].getRuleID()
+
+        for attr_name in ("rule_start_inout","prefix_id","remaining_free_seconds"):
+            if hasattr(charge_info,attr_name):
+                state[attr_name]=getattr(charge_info,attr_name)[_index]
+
+        return state
+
+    def restoreSession(self,instance,state):
+        """
+            restore charge state of instance. Effective rule before restart is restored if it still exists,
+            so its usage is calculated from its start, and it's changed to current rule on next checkLimits.
+            If it has been deleted, its usage is calculated with current rule
+        """
+        if instance>self.charge_initialized or not state["accounting_started"]:
+            return
+
+        charge_info=self.user_obj.charge_info
+        _index=instance-1
+        charge_info.accounting_started[_index]=state["accounting_started"]
+        charge_info.credit_prev_usage_instance[_index]=state["credit_prev_usage_instance"]
+        charge_info.rule_start[_index]=state["rule_start"]
+        for attr_name in ("rule_start_inout","prefix_id","remaining_free_seconds"):
+            if state.has_key(attr_name):
+                getattr(charge_info,attr_name)[_index]=state[attr_name]
+
+        rules=self.charge_obj.getRules()
+        if rules.has_key(state["effective_rule_id"]):
+            charge_info.effective_rules[_index]=rules[state["effective_rule_id"]]
+
     def canStayOnline(self):
         if self.charge_initialized:
             return self.charge_obj.checkLimits(self.user_obj)
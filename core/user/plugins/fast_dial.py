@@ -27,9 +27,11 @@ class FastDialUserPlugin(user_plugin.AttrCheckUserPlugin):
     """
         catch called numbers with defs.FASTDIAL_PREFIX and convert them to fast dial entry
     """
+    has_attr_name="fast_dial"
+
     #TODO: FIX IN B BRANCH!
     def __init__(self, user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"fast_dial")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -9,8 +9,10 @@ def init():
     user_main.getAttributeManager().registerHandler(IdleTimeoutAttrHandler(),["idle_timeout"],["idle_timeout"],[])
 
 class IdleTimeoutUserPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="idle_timeout"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"idle_timeout")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -103,6 +103,35 @@ class IPpoolUserPlugin(user_plugin.UserPlugin):
             self.__updateInstanceInfo(instance,ras_msg["ippool_id"],ras_msg["ippool_assigned_ip"])
 
 
+    def saveSession(self,instance):
+        instance_info=self.user_obj.getInstanceInfo(instance)
+        if instance_info.has_key("ippool_id"):
+            return (instance_info["ippool_id"],instance_info["attrs"]["ippool_assigned_ip"])
+
+    def restoreSession(self,instance,state):
+        """
+            mark ip assigned to instance before restart as used again
+        """
+        ippool_id,ip=state
+        try:
+            ippool_obj=ippool_main.getLoader().getIPpoolByID(ippool_id)
+        except GeneralException: #ippool deleted
+            ippool_obj=None
+
+        if ippool_obj==None or not ippool_obj.hasIP(ip):
+            attrs=self.user_obj.getInstanceInfo(instance)["attrs"]
+            for attr_name in ("ippool","ippool_assigned_ip"):
+                if attrs.has_key(attr_name):
+                    del(attrs[attr_name])
+            return
+
+        try:
+            ippool_obj.useIP(ip)
+        except IPpoolFullException:
+            raise LoginException(errorText("USER_LOGIN", "REMOTE_IP_CONFLICT"))
+
+        self.__updateInstanceInfo(instance,ippool_id,ip)
+
     def __updateInstanceInfo(self,instance,ippool_id,ip):
         instance_info=self.user_obj.getInstanceInfo(instance)
         instance_info["ippool_id"]=ippool_id
@@ -18,8 +18,10 @@ def init():
     user_main.getAttributeManager().registerHandler(LimitCallerIDAttrHandler(),["limit_caller_id"],["limit_caller_id"],[])
 
 class LimitCallerIDPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="limit_caller_id"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"limit_caller_id")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
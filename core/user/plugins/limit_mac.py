@@ -16,8 +16,10 @@ def init():
     user_main.getAttributeManager().registerHandler(LimitMacAttrHandler(),["limit_mac"],["limit_mac"],[])
 
 class LimitMacPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="limit_mac"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"limit_mac")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -16,8 +16,10 @@ def init():
     user_main.getAttributeManager().registerHandler(LimitStationIPAttrHandler(),["limit_station_ip"],["limit_station_ip"],[])
 
 class LimitStationIPPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="limit_station_ip"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"limit_station_ip")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -198,7 +198,15 @@ class BasePeriodicAccounting(user_plugin.AttrCheckUserPlugin):
         if ras_msg.hasAttr("start_accounting"):
             instance = self.user_obj.getInstanceFromRasMsg(ras_msg)
             self.instance_start_value[instance-1] = self._getStartValue(instance)
-    
+
+    def s_saveSession(self, instance):
+        if len(self.instance_start_value) >= instance:
+            return self.instance_start_value[instance-1]
+
+    def s_restoreSession(self, instance, start_value):
+        if len(self.instance_start_value) >= instance:
+            self.instance_start_value[instance-1] = start_value
+
     ################################
     def _setStartValues(self):
         for instance in xrange(1,self.user_obj.instances+1):
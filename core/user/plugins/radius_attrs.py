@@ -14,8 +14,10 @@ def init():
     user_main.getAttributeManager().registerHandler(RadiusAttrsAttrHandler(),["radius_attrs"],["radius_attrs"],["radius_attrs"])
 
 class RadiusAttrsUserPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="radius_attrs"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"radius_attrs")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -9,8 +9,10 @@ def init():
     user_main.getAttributeManager().registerHandler(SessionTimeoutAttrHandler(),["session_timeout"],["session_timeout"],[])
 
 class SessionTimeoutUserPlugin(user_plugin.AttrCheckUserPlugin):
+    has_attr_name="session_timeout"
+
     def __init__(self,user_obj):
-        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj,"session_timeout")
+        user_plugin.AttrCheckUserPlugin.__init__(self,user_obj)
         self.__initValues()
 
     def __initValues(self):
@@ -1,6 +1,7 @@
 from core.ibs_exceptions import *
 from core.errors import errorText
 from core.user import user_main
+from core.lib import password_lib
 
 class UserServerAuth:
     def checkAuth(self,username,password,auth_type):
@@ -10,6 +11,16 @@ class UserServerAuth:
             password(Password Instance):
             auth_type(string): requested authentication type. Can be either "NORMAL_USER" or "VOIP_USER"
         """
+        loaded_user,user_password=self.getUserAndPassword(username,auth_type)
+        self.__checkUserPassword(user_password,password)
+
+        return loaded_user
+
+    def getUserAndPassword(self,username,auth_type):
+        """
+            return (loaded_user,password) of user with "username", password is string of password as stored
+            in user attributes, for "auth_type"
+        """
         if auth_type == "NORMAL_USER":
             loaded_user = user_main.getUserPool().getUserByNormalUsername(username)
             pass_attr_name = "normal_password"
@@ -17,13 +28,9 @@ class UserServerAuth:
         elif auth_type == "VOIP_USER":
             loaded_user = user_main.getUserPool().getUserByVoIPUsername(username)
             pass_attr_name = "voip_password"
-        
-        self.__checkUserPassword(loaded_user,pass_attr_name,password)
 
-        return loaded_user
+        return (loaded_user,loaded_user.getUserAttrs()[pass_attr_name])
         
-    def __checkUserPassword(self,loaded_user,attr_name,password):
-        if not password == loaded_user.getUserAttrs()[attr_name]:
+    def __checkUserPassword(self,user_password,password):
+        if not password_lib.checkPassword(user_password,password):
             raise GeneralException(errorText("USER_LOGIN","WRONG_PASSWORD"))
-
-    
\ No newline at end of file
@@ -24,7 +24,8 @@ class User:
                       "h323_authorization",
                       "single_session_h323",
                       "try_single_session_h323",                      
-                      "calc_remaining_time"]
+                      "calc_remaining_time",
+                      "restored_session"]
 
     def __init__(self, loaded_user, _type):
         """
@@ -184,7 +185,8 @@ class User:
         instance_info["successful_auth"]=False
 
         try:
-            self.__checkNoLoginFlag()
+            if not ras_msg.hasAttr("restored_session"): #sessions are restored while starting, before logins are allowed
+                self.__checkNoLoginFlag()
             user_main.getUserPluginManager().callHooks("USER_LOGIN",self,[ras_msg])
         except Exception,e:
             if isinstance(e,IBSError):
@@ -197,6 +199,33 @@ class User:
 
         instance_info["successful_auth"]=True
 
+    def getSessionState(self,instance):
+        """
+            return picklable dic of state of "instance", that can be passed to restoreSession after a restart
+        """
+        instance_info=self.getInstanceInfo(instance)
+        return {"user_id":self.getUserID(),
+                "type":self.getType(),
+                "ras_id":instance_info["ras_id"],
+                "unique_id":instance_info["unique_id"],
+                "unique_id_val":instance_info["unique_id_val"],
+                "attrs":instance_info["attrs"].copy(),
+                "login_time":instance_info["login_time"],
+                "start_accounting":instance_info.get("start_accounting"),
+                "plugins":user_main.getUserPluginManager().saveSession(self,instance)}
+
+    def restoreSession(self,instance,state):
+        """
+            restore state of "instance", that has been logged in again with attributes of state
+            state(dic): state returned by getSessionState before restart
+        """
+        instance_info=self.getInstanceInfo(instance)
+        instance_info["login_time"]=state["login_time"]
+        if state["start_accounting"]!=None:
+            instance_info["start_accounting"]=state["start_accounting"]
+
+        user_main.getUserPluginManager().restoreSession(self,instance,state["plugins"])
+
     def __checkNoLoginFlag(self):
         """
             check if main no_login flag is set
@@ -239,7 +268,7 @@ class User:
             saves all changed user info from memory into DB
             commit is called before logout of each instance
         """
-        query=reduce(operator.add,filter(lambda x:x!=None,user_main.getUserPluginManager().callHooks("USER_COMMIT",self)))
+        query=reduce(operator.add,filter(lambda x:x!=None,user_main.getUserPluginManager().callHooks("USER_COMMIT",self)),"")
         query+=self.__commitCreditQuery(used_credit)
         return query
         
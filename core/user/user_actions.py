@@ -278,7 +278,10 @@ class UserActions:
             normally user_pool should be told to refresh the user
         """
         userChanged=user_main.getUserPool().userChanged
+        user_ids=list(user_ids)
         map(userChanged,user_ids)
+        #users may be reloaded with uncommitted changes of a transaction, or by other threads before commit
+        db_main.onTransactionEnd(lambda committed:map(userChanged,user_ids))
 #########################################################
     def getUserInfosFromLoadedUsers(self,loaded_users,date_type):
         """
@@ -489,8 +492,13 @@ class UserActions:
 
                 time.sleep(1)
                 c += 1
+        elif defs.ONLINE_SESSIONS_PERSIST and defs.ONLINE_SESSIONS_KEEP_ON_SHUTDOWN:
+            toLog("shutdownUsers: Keeping %s online users to be restored on next start"%user_main.getOnline().getOnlinesCount() , LOG_DEBUG)
         else:
             self.killAllUsers(False, kill_reason)
+
+        if defs.ONLINE_SESSIONS_PERSIST:
+            user_main.getOnline().snapshotSessions()
             
 ####################################################################
     def getUsernameReprForUserID(self, user_id):
@@ -76,6 +76,13 @@ def init():
     from core.user.user_handler import UserHandler
     handlers_manager.getManager().registerHandler(UserHandler())
 
+def restoreOnlines():
+    """
+        restore online sessions of previous run, should be called after rases and ippools are loaded and
+        before radius server starts
+    """
+    getOnline().restoreOnlines()
+
 def shutdown():
     if main.isSuccessfullyStarted():
         getActionManager().shutdownUsers()
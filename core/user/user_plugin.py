@@ -2,6 +2,7 @@ from core import defs
 from core.user import user_main,can_stay_online_result
 from core.errors import errorText
 from core.ibs_exceptions import *
+from core.stats import trace
 import itertools
 
 class BaseUserPlugin:
@@ -60,6 +61,20 @@ class UserPlugin(BaseUserPlugin):
 	"""
         pass
 
+    def saveSession(self,instance):
+        """
+            return picklable state that plugin keeps for "instance", to be passed to restoreSession after a
+            restart, or None if plugin has no state for instance
+        """
+        pass
+
+    def restoreSession(self,instance,state):
+        """
+            called after "instance" has been logged in again after a restart, with state returned by saveSession
+            before restart
+        """
+        pass
+
 class AttrCheckUserPlugin(BaseUserPlugin):
     """
         This is parent class for User Plugins that do the has attribute checkings automatically
@@ -67,18 +82,27 @@ class AttrCheckUserPlugin(BaseUserPlugin):
         these methods are only called if user has attribute "attr_name" given in initializer
         WARNING: _reload method has no s_reload, it'll always call the plugin _reload method. Plugin reload method
             should call this class reload method first to ensure has_attr update
+        Children that set class attribute has_attr_name instead of passing attr_name, are only instantiated for
+            users that have the attribute. Plugin instance is created on reload if user gets the attribute later,
+            so their _reload should do the same as initializer when user gets the attribute
     """
-    def __init__(self,user_obj,attr_name):
+    has_attr_name=None
+
+    def __init__(self,user_obj,attr_name=None):
         BaseUserPlugin.__init__(self,user_obj)
+        if attr_name==None:
+            attr_name=self.has_attr_name
         self.has_attr_name=attr_name
         self._setHasAttr(attr_name)
         
     def __getattr__(self,name):
-        if  name in ("update","login","logout","commit","canStayOnline"):
+        if  name in ("update","login","logout","commit","canStayOnline","saveSession","restoreSession"):
             if self.hasAttr():
                 return getattr(self,"s_%s"%name)
             else:
                 return getattr(self,"has_not_attr_%s"%name)
+        if name.startswith("__"): #special methods of old style classes, ex. comparison and truth testing
+            raise AttributeError(name)
             
     def _setHasAttr(self,attr_name):
         self.has_attr=self.user_obj.getLoadedUser().hasAttr(attr_name)
@@ -102,6 +126,12 @@ class AttrCheckUserPlugin(BaseUserPlugin):
     def s_update(self,ras_msg):
         pass
 
+    def s_saveSession(self,instance):
+        pass
+
+    def s_restoreSession(self,instance,state):
+        pass
+
 ############################## default methods
     def has_not_attr_login(self,ras_msg):
         pass
@@ -118,19 +148,50 @@ class AttrCheckUserPlugin(BaseUserPlugin):
     def has_not_attr_update(self,ras_msg):
         pass
 
+    def has_not_attr_saveSession(self,instance):
+        pass
+
+    def has_not_attr_restoreSession(self,instance,state):
+        pass
+
 ###############################
     def _reload(self):
         self._setHasAttr(self.has_attr_name)
     
 
+class InitFailedUserPlugin:
+    """
+        Placeholder of plugins that failed to initialize for a user, all hooks of user fail with an error
+    """
+    def __init__(self,plugin_name):
+        self.plugin_name=plugin_name
+
+    def __getattr__(self,name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.__raiseError
+
+    def __raiseError(self,*args):
+        raise GeneralException("Plugin %s failed to initialize for user"%self.plugin_name)
+
 class UserPluginManager:
+    HOOK_METHODS={"USER_LOGIN":"login",
+                  "USER_LOGOUT":"logout",
+                  "USER_COMMIT":"commit",
+                  "USER_CAN_STAY_ONLINE":"canStayOnline",
+                  "UPDATE":"update",
+                  "SAVE_SESSION":"saveSession",
+                  "RESTORE_SESSION":"restoreSession"}
+
     def __init__(self):
         self.__plugin_classes=([],[],[],[],[],[],[],[],[],[]) #priority:[(plugin_class,plugin_name),(plugin_class,plugin_name),...]
-        
+        self.__implemented_hooks={} #plugin_class=>list of hook method names that class implements
+
     def register(self,plugin_name,plugin_class,priority=5):
         """
             register new plugin to be called on user hooks
             plugin_name(string): name of plugin, plugin class instance would be accessible in user with this name(user_obj.plugin_name)
+                                 plugins with has_attr_name are None for users that doesn't have the attribute
             plugin_class(Class): class of plugin. An instance would be created for each user object
             priority(integer): an integer between 0-9. Shows in what order methods should be called
                                smaller number favored more. For regular operations better set 5
@@ -139,34 +200,79 @@ class UserPluginManager:
         if priority<0 or priority>9:
             priority=5
         self.__plugin_classes[priority].append((plugin_class,plugin_name))
+        self.__implemented_hooks[plugin_class]=self.__findImplementedHooks(plugin_class)
+
+    def __findImplementedHooks(self,plugin_class):
+        """
+            return list of hook method names that plugin_class overrides. Methods that are not overridden are
+            no-op methods of parent, and won't be called
+        """
+        if issubclass(plugin_class,AttrCheckUserPlugin):
+            base_class,prefix=AttrCheckUserPlugin,"s_"
+        elif issubclass(plugin_class,UserPlugin):
+            base_class,prefix=UserPlugin,""
+        else:
+            return self.HOOK_METHODS.values()
+
+        implemented=[]
+        for method_name in self.HOOK_METHODS.itervalues():
+            if getattr(plugin_class,prefix+method_name).im_func is not getattr(base_class,prefix+method_name).im_func:
+                implemented.append(method_name)
+        return implemented
 
     def callHooks(self,hook,user_obj,args=[]):
         """
             run plugins methods for hook
             args is a list of additional arguments
+            return list of return values of called methods, plugins that don't implement the hook are not called
         """
         if hook=="USER_INIT":
             return self.__initPluginsForUser(user_obj)
-        
-        elif hook=="USER_LOGIN":
-            return self.__callPluginsMethod(user_obj,args,"login")
 
-        elif hook=="USER_LOGOUT":
-            return self.__callPluginsMethod(user_obj,args,"logout")         
+        elif hook=="USER_RELOAD":
+            return self.__reloadPluginsForUser(user_obj)
 
-        elif hook=="USER_COMMIT":
-            return self.__callPluginsMethod(user_obj,args,"commit")         
+        try:
+            methods=user_obj.plugin_hooks[self.HOOK_METHODS[hook]]
+        except KeyError:
+            raise IBSError(errorText("PLUGINS","INVALID_HOOK")%hook)
 
-        elif hook=="USER_CAN_STAY_ONLINE":
-             return self.__callPluginsMethod(user_obj,args,"canStayOnline")
-        
-        elif hook=="USER_RELOAD":
-            return self.__callPluginsMethod(user_obj,args,"_reload")
+        if trace.getTrace()!=None:
+            return [self.__callTraced(method,args) for method in methods]
 
-        elif hook=="UPDATE":
-            return self.__callPluginsMethod(user_obj,args,"update")
+        return [method(*args) for method in methods]
 
-        raise IBSError(errorText("PLUGINS","INVALID_HOOK")%hook)
+    def saveSession(self,user_obj,instance):
+        """
+            return dic of plugin class name=>state of "instance" of user_obj, for plugins that keep state for it
+        """
+        state={}
+        for method in user_obj.plugin_hooks["saveSession"]:
+            plugin_state=method(instance)
+            if plugin_state!=None:
+                state[method.im_self.__class__.__name__]=plugin_state
+        return state
+
+    def restoreSession(self,user_obj,instance,state):
+        """
+            pass states returned by saveSession, to plugins of user_obj
+        """
+        for method in user_obj.plugin_hooks["restoreSession"]:
+            class_name=method.im_self.__class__.__name__
+            if state.has_key(class_name):
+                method(instance,state[class_name])
+
+    def __callTraced(self,method,args):
+        """
+            call plugin method, in a span of current trace
+        """
+        span=trace.beginSpan("plugin_%s"%method.im_self.__class__.__name__)
+        ret_val=method(*args)
+        trace.endSpan(span)
+        return ret_val
+
+    def __iterPlugins(self):
+        return itertools.chain(*self.__plugin_classes)
 
     def __initPluginsForUser(self,user_obj):
         """
@@ -174,37 +280,64 @@ class UserPluginManager:
             for user plugins we'll create an object of plugin and put it
             in user_obj with the name of plugin
         """
-        for (plugin_class,plugin_name) in apply(itertools.chain,self.__plugin_classes):
-            try:
-                setattr(user_obj,plugin_name,plugin_class(user_obj))
-            except:
-                logException(LOG_ERROR,"UserPluginManager.__initPluginsForUser")
+        for (plugin_class,plugin_name) in self.__iterPlugins():
+            setattr(user_obj,plugin_name,None)
+            self.__createPlugin(user_obj,plugin_class,plugin_name)
+
+        self.__createHookTables(user_obj)
 
-    def __callPluginsMethodx(self,user_obj,args,method_name):
+    def __createPlugin(self,user_obj,plugin_class,plugin_name):
         """
-            call plugin method "method_name" with "args" list as argument for object "user_obj"
+            create instance of plugin_class for user_obj, if user has the attribute it needs
         """
-        ret_vals = []   
-        for plugin_tuple in itertools.chain(*self.__plugin_classes):
-            plugin_obj = getattr(user_obj, plugin_tuple[1])
-            ret_vals.append( getattr(plugin_obj,method_name)(*args) )
-        
-        return ret_vals
+        has_attr_name=getattr(plugin_class,"has_attr_name",None)
+        if has_attr_name!=None and not user_obj.getLoadedUser().hasAttr(has_attr_name):
+            return
 
-    def __callPluginsMethod(self, user_obj, args, method_name, debug=False):
+        try:
+            setattr(user_obj,plugin_name,plugin_class(user_obj))
+        except:
+            logException(LOG_ERROR,"UserPluginManager.__initPluginsForUser")
+            setattr(user_obj,plugin_name,InitFailedUserPlugin(plugin_name))
+
+    def __reloadPluginsForUser(self,user_obj):
         """
-            call plugin method "method_name" with "args" list as argument for object "user_obj"
+            call _reload of plugins of user_obj, and create plugins that user has their attribute now
         """
-        ret_vals = []
-        
-        for (plugin_class, plugin_name) in itertools.chain(*self.__plugin_classes):
-            method = getattr(getattr(user_obj,plugin_name), method_name)
-            ret_val = method(*args)
-            if debug:
-                toLog("User: %s, Plugin Name: %s Plugin Method: %s, Args: %s: RetVal: %s"%
-                       (user_obj, plugin_name, method_name, args, ret_val), LOG_DEBUG)
-            
-            ret_vals.append(ret_val)
-                
+        ret_vals=[]
+        for (plugin_class,plugin_name) in self.__iterPlugins():
+            plugin_obj=getattr(user_obj,plugin_name)
+            if plugin_obj==None:
+                self.__createPlugin(user_obj,plugin_class,plugin_name)
+                ret_vals.append(None)
+            else:
+                ret_vals.append(plugin_obj._reload())
+
+        self.__createHookTables(user_obj)
         return ret_vals
-        
\ No newline at end of file
+
+    def __createHookTables(self,user_obj):
+        """
+            set user_obj.plugin_hooks to a dic of hook method name=>list of bound methods of plugins, in order of
+            priority. Plugins are only in lists of hooks they implement, and attribute checking plugins are only
+            in lists when user has the attribute
+        """
+        plugin_hooks={}
+        for method_name in self.HOOK_METHODS.itervalues():
+            plugin_hooks[method_name]=[]
+
+        for (plugin_class,plugin_name) in self.__iterPlugins():
+            plugin_obj=getattr(user_obj,plugin_name)
+            if plugin_obj==None:
+                continue
+
+            prefix=""
+            if isinstance(plugin_obj,AttrCheckUserPlugin):
+                if not plugin_obj.hasAttr():
+                    continue
+                prefix="s_"
+
+            for method_name in self.__implemented_hooks[plugin_class]:
+                plugin_hooks[method_name].append(getattr(plugin_obj,prefix+method_name))
+
+        user_obj.plugin_hooks=plugin_hooks
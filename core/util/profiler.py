@@ -0,0 +1,131 @@
+from core.ibs_exceptions import *
+from core.errors import errorText
+from core.threadpool import threadpool
+from core import defs
+import threading
+import time
+import sys
+import os
+
+class SamplingProfiler:
+    """
+        statistical profiler, samples stacks of all threads periodically from a background thread, for a
+        limited duration. Stacks are aggregated by name of thread wrapper that thread is running a job for,
+        or thread name for threads out of thread pool. Idle threads of thread pool are not sampled.
+        Result is in collapsed stack format, that flame graph tools accept
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.running=False
+        self.stop_flag=False
+        self.stacks={} #collapsed stack=>count
+        self.samples=0
+        self.start_time=0
+        self.end_time=0
+        self.sample_rate=0
+
+    def start(self,duration,sample_rate):
+        """
+            start profiling in background, previous profile is discarded
+            duration(int): seconds to profile
+            sample_rate(int): samples per second
+        """
+        if duration<=0 or duration>defs.PROFILER_MAX_DURATION:
+            raise GeneralException(errorText("UTIL","INVALID_PROFILE_DURATION")%defs.PROFILER_MAX_DURATION)
+
+        if sample_rate<=0 or sample_rate>defs.PROFILER_MAX_SAMPLE_RATE:
+            raise GeneralException(errorText("UTIL","INVALID_PROFILE_SAMPLE_RATE")%defs.PROFILER_MAX_SAMPLE_RATE)
+
+        self.lock.acquire()
+        try:
+            if self.running:
+                raise GeneralException(errorText("UTIL","PROFILER_IS_RUNNING"))
+
+            self.running=True
+            self.stop_flag=False
+            self.stacks={}
+            self.samples=0
+            self.start_time=time.time()
+            self.end_time=0
+            self.sample_rate=sample_rate
+        finally:
+            self.lock.release()
+
+        thread=threading.Thread(target=self.__run,args=(duration,1.0/sample_rate),name="sampling profiler")
+        thread.setDaemon(True)
+        thread.start()
+
+    def stop(self):
+        """
+            stop profiling before it's duration finishes
+        """
+        self.stop_flag=True
+
+    def isRunning(self):
+        return self.running
+
+    def __run(self,duration,interval):
+        try:
+            try:
+                deadline=time.time()+duration
+                while not self.stop_flag and time.time()<deadline:
+                    self.__sample()
+                    time.sleep(interval)
+            except:
+                logException(LOG_ERROR,"SamplingProfiler")
+        finally:
+            self.end_time=time.time()
+            self.running=False
+
+    def __sample(self):
+        thread_labels=self.__getThreadLabels()
+        my_ident=threading.currentThread().ident
+        for ident,frame in sys._current_frames().items():
+            if ident==my_ident or not thread_labels.has_key(ident):
+                continue
+
+            stack=self.__collapseStack(thread_labels[ident],frame)
+            self.stacks[stack]=self.stacks.get(stack,0)+1
+        self.samples+=1
+
+    def __getThreadLabels(self):
+        """
+            return dic of thread ident=>label of thread, for threads that should be sampled
+        """
+        in_use=threadpool.getThreadPool().getInUseThreads()
+        labels={}
+        for thread in threading.enumerate():
+            if in_use.has_key(thread):
+                labels[thread.ident]=in_use[thread]
+            elif not isinstance(thread,threadpool.IBSThread): #idle thread pool threads are not sampled
+                labels[thread.ident]=thread.getName()
+        return labels
+
+    def __collapseStack(self,label,frame):
+        frames=[]
+        while frame!=None:
+            code=frame.f_code
+            frames.append("%s:%s"%(self.__shortFileName(code.co_filename),code.co_name))
+            frame=frame.f_back
+        frames.append(label)
+        frames.reverse()
+        return ";".join(frames)
+
+    def __shortFileName(self,file_name):
+        if file_name.startswith(defs.IBS_ROOT):
+            return file_name[len(defs.IBS_ROOT):].lstrip("/")
+        return os.path.basename(file_name)
+
+    def getProfile(self):
+        """
+            return dic of profile state and result in collapsed stack format, one "stack count" per line,
+            with frames of stack separated by ";"
+        """
+        stacks=self.stacks.items()
+        stacks.sort()
+        return {"running":self.running,
+                "start_time":self.start_time,
+                "end_time":self.end_time,
+                "sample_rate":self.sample_rate,
+                "samples":self.samples,
+                "collapsed_stacks":"".join(map(lambda (stack,count):"%s %s\n"%(stack,count),stacks))}
@@ -1,6 +1,8 @@
 from core.ibs_exceptions import *
 from core.server import handler
 from core.lib.multi_strs import MultiStr
+from core.lib.general import *
+from core.util import util_main
 import sys
 import os
 import traceback
@@ -11,6 +13,10 @@ class UtilHandler(handler.Handler):
         handler.Handler.__init__(self,"util")
         self.registerHandlerMethod("multiStrGetAll")
         self.registerHandlerMethod("runDebugCode")
+        self.registerHandlerMethod("startProfiler")
+        self.registerHandlerMethod("stopProfiler")
+        self.registerHandlerMethod("getProfile")
+        self.registerHandlerMethod("reloadAll")
 
 
     def multiStrGetAll(self,request):
@@ -31,6 +37,56 @@ class UtilHandler(handler.Handler):
             return self.__grabOutput(request)
 
 
+    def startProfiler(self,request):
+        """
+            start sampling profiler in background
+            duration(int): seconds to profile
+            sample_rate(int): optional, samples per second, default is 100
+        """
+        request.needAuthType(request.ADMIN)
+        request.checkArgs("duration")
+        request.getAuthNameObj().canDo("GOD")
+
+        if request.has_key("sample_rate"):
+            sample_rate=to_int(request["sample_rate"],"sample_rate")
+        else:
+            sample_rate=100
+
+        util_main.getProfiler().start(to_int(request["duration"],"duration"),sample_rate)
+        return True
+
+    def stopProfiler(self,request):
+        request.needAuthType(request.ADMIN)
+        request.getAuthNameObj().canDo("GOD")
+        util_main.getProfiler().stop()
+        return True
+
+    def getProfile(self,request):
+        """
+            return dic of profiler state and last profile, collapsed_stacks key has stacks in collapsed format
+            for flame graph tools
+        """
+        request.needAuthType(request.ADMIN)
+        request.getAuthNameObj().canDo("GOD")
+        return util_main.getProfiler().getProfile()
+
+    def reloadAll(self,request):
+        """
+            reload admins, groups, charges and rases from db, only changed objects are reloaded
+            return dic of loader name=>dic of "added","changed","removed" ids
+        """
+        request.needAuthType(request.ADMIN)
+        request.getAuthNameObj().canDo("GOD")
+
+        from core.admin import admin_main
+        from core.group import group_main
+        from core.charge import charge_main
+        from core.ras import ras_main
+        return {"admins":admin_main.getLoader().reloadAllAdmins(),
+                "groups":group_main.getLoader().reloadAllGroups(),
+                "charges":charge_main.getLoader().reloadAllCharges(),
+                "rases":ras_main.getLoader().reloadAllRases()}
+
     def __grabOutput(self, request):
         import pty
         out=""
@@ -4,3 +4,9 @@ def init():
     from core.util.util_handler import UtilHandler
     handlers_manager.getManager().registerHandler(UtilHandler())
 
+    from core.util.profiler import SamplingProfiler
+    global profiler
+    profiler = SamplingProfiler()
+
+def getProfiler():
+    return profiler
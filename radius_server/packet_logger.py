@@ -0,0 +1,103 @@
+from core.ibs_exceptions import *
+from core import defs
+from radius_server.pyrad import packet
+import itertools
+
+PACKET_CODES={1:"AccessRequest",
+              2:"AccessAccept",
+              3:"AccessReject",
+              4:"AccountingRequest",
+              5:"AccountingResponse",
+              11:"AccessChallenge",
+              12:"StatusServer",
+              13:"StatusClient",
+              40:"DisconnectRequest",
+              41:"DisconnectAck",
+              42:"DisconnectNack"}
+
+USER_NAME_ATTR=1
+
+class PacketLogRecord:
+    """
+        log record of a radius packet. Packet is decoded to text when record is converted to string, that
+        is done by writer thread of radius log
+    """
+    def __init__(self,pkt,incoming):
+        """
+            pkt(Packet instance): packet to log, incoming packets should have raw_packet attribute, outgoing
+                                  packets should not be changed after logging
+            incoming(bool): did we receive this packet? False if this is an outgoing packet
+        """
+        self.code=pkt.code
+        self.id=pkt.id
+        self.source=pkt.source
+        self.incoming=incoming
+        self.dict=pkt.dict
+        if incoming and hasattr(pkt,"raw_packet"):
+            self.raw_packet=pkt.raw_packet
+            self.pkt=None
+        else:
+            self.raw_packet=None
+            self.pkt=pkt
+
+    def __str__(self):
+        if self.pkt==None:
+            pkt=packet.Packet(dict=self.dict,packet=self.raw_packet)
+        else:
+            pkt=self.pkt
+
+        direction=["O>","I<"][self.incoming]
+        log_str="##############\n"
+        log_str+="%s %s attributes for %s:%s with id %s\n"%(direction,
+                                                           PACKET_CODES.get(self.code,"Unknown"),
+                                                           self.source[0],
+                                                           self.source[1],
+                                                           self.id)
+
+        attrs=[]
+        for attr_name in pkt.keys():
+            attrs.append("%s: %s"%(attr_name,pkt[attr_name]))
+
+        log_str+=" \n".join(attrs)
+        return log_str+"\n"
+
+class PacketLogger:
+    """
+        decide which radius packets should be logged, and log them. Logging decision is made once for
+        each request, and its response is logged if request is logged.
+        Decision is made with raw values of packet, packets are decoded by writer thread of radius log
+    """
+    def __init__(self):
+        self.sample_counter=itertools.count()
+
+    def checkRequest(self,request_pkt):
+        """
+            set logging decision of request_pkt, and log it if it should be logged
+        """
+        request_pkt.log_packet=self.__shouldLog(request_pkt)
+        if request_pkt.log_packet and defs.LOG_RADIUS_REQUESTS:
+            toLog(PacketLogRecord(request_pkt,True),LOG_RADIUS)
+
+    def logResponse(self,request_pkt,reply_pkt):
+        """
+            log reply_pkt, if it's request was logged. reply_pkt should not be changed after this call
+        """
+        if getattr(request_pkt,"log_packet",False) and defs.LOG_RADIUS_RESPONSES:
+            toLog(PacketLogRecord(reply_pkt,False),LOG_RADIUS)
+
+    def __shouldLog(self,request_pkt):
+        if not defs.LOG_RADIUS_REQUESTS and not defs.LOG_RADIUS_RESPONSES:
+            return False
+
+        if defs.LOG_RADIUS_NAS_IPS and request_pkt.source[0] not in defs.LOG_RADIUS_NAS_IPS:
+            return False
+
+        if defs.LOG_RADIUS_USERNAMES:
+            username=request_pkt.data.get(USER_NAME_ATTR,[None])[0] #User-Name is a string, raw value is username
+            if username not in defs.LOG_RADIUS_USERNAMES:
+                return False
+
+        if defs.LOG_RADIUS_SAMPLE_RATE>1:
+            return self.sample_counter.next()%defs.LOG_RADIUS_SAMPLE_RATE==0
+
+        return True
@@ -166,6 +166,7 @@ class Server(host.Host):
                 """
                 (data,source)=fd.recvfrom(self.MaxPacketSize)
                 pkt=pktgen(data)
+                pkt.raw_packet=data
                 pkt.source=source
                 pkt.fd=fd
 
@@ -29,12 +29,18 @@ def init():
     stat_main.getStatKeeper().registerStat("auth_max_response_time", "seconds")
     stat_main.getStatKeeper().registerStat("acct_max_response_time", "seconds")    
 
+    stat_main.getStatKeeper().registerStat("first_reply_after_start", "seconds")
+
     global ibs_dic
     ibs_dic=dictionary.Dictionary("%s/radius_server/dictionary"%defs.IBS_ROOT,
 				  "%s/radius_server/dictionary.usr"%defs.IBS_ROOT,
 				  "%s/radius_server/dictionary.ser"%defs.IBS_ROOT,
 				  "%s/radius_server/dictionary.sip"%defs.IBS_ROOT)
 
+    from radius_server.packet_logger import PacketLogger
+    global packet_logger
+    packet_logger = PacketLogger()
+
     from radius_server.request_list import RequestList, CleanRequestListPeriodicEvent
     global request_list
     request_list = RequestList()
@@ -65,3 +71,6 @@ def getDictionary():
 
 def getRequestList():
     return request_list
+
+def getPacketLogger():
+    return packet_logger
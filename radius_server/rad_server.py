@@ -1,56 +1,15 @@
 from core.lib import *
 from core.ibs_exceptions import *
-from core import defs
+from core import defs,main
 from radius_server.pyrad import dictionary, packet, server
 from core.ras import ras_main
-from core.stats import stat_main
+from core.stats import stat_main,trace
 from radius_server import rad_main
 from core.threadpool import thread_main
 import time
 
 class IBSRadiusServer(server.Server):
-        def __getPacketCodeString(self, pkt_code):
-            """
-                return string representation of packet code
-            """
-            try:
-                return {1:"AccessRequest",
-                        2:"AccessAccept",
-                        3:"AccessReject",
-                        4:"AccountingRequest",
-                        5:"AccountingResponse",
-                        11:"AccessChallenge",
-                        12:"StatusServer",
-                        13:"StatusClient",
-                        40:"DisconnectRequest",
-                        41:"DisconnectAck",
-                        42:"DisconnectNack"}[pkt_code]
-                        
-            except KeyError:
-                return "Unknown"
-
-        def __logRequest(self, pkt, incoming=True):
-            """
-                recv(boolean): did we recieved this packet? False if this is an outgoing packet
-            """
-            pkt_type = self.__getPacketCodeString(pkt.code)
-        
-        
-            direction = ["O>","I<"][incoming]
-            log_str = "##############\n"
-            log_str += "%s %s attributes for %s:%s with id %s\n"%(direction,
-                                                                pkt_type, 
-                                                                pkt.source[0], 
-                                                                pkt.source[1], 
-                                                                pkt.id)
-
-	    attrs = []
-	    for attr_name in pkt.keys():
-	        attrs.append("%s: %s"%(attr_name,pkt[attr_name]))
-
-            log_str += " \n".join(attrs)
-            toLog(log_str + "\n",LOG_RADIUS)
-
+        first_reply_sent = False
 
         def processAuthPacket(self, fd, request_pkt, reply_pkt):
                 success=False
@@ -83,8 +42,7 @@ class IBSRadiusServer(server.Server):
                 func = self.processAcctPacket
                 stat_name_prefix = "acct"
 
-            if defs.LOG_RADIUS_REQUESTS:
-                self.__logRequest(request_pkt)
+            rad_main.getPacketLogger().checkRequest(request_pkt)
                 
             request_obj = rad_main.getRequestList().getRequest(request_pkt) #check for duplicate packet
             if request_obj != None:
@@ -98,32 +56,64 @@ class IBSRadiusServer(server.Server):
                     self.SendReplyPacket(fd, request_obj.getResponsePacket())
             else:
                 rad_main.getRequestList().addRequest(request_pkt)
+                request_pkt.receive_time = trace.monotonicTime()
                 thread_main.runThread(self.__runPacketHandler,(func, fd, request_pkt, stat_name_prefix),"radius")
                         
         def __runPacketHandler(self, func, fd, request_pkt, stat_name_prefix):
                 """
                     Run Packet Handler _HandleAXXXPacket, and collect time statistics
                 """
-                
-                reply_pkt = self.CreateReplyPacket(request_pkt)
-                reply_pkt.dict = rad_main.getDictionary()
+                if defs.TRACE_RADIUS_REQUESTS:
+                    self.__startTrace(request_pkt, stat_name_prefix)
 
-                start = time.time()
+                try:
+                    reply_pkt = self.CreateReplyPacket(request_pkt)
+                    reply_pkt.dict = rad_main.getDictionary()
 
-                #run the handler
-                ret_val = func(fd, request_pkt, reply_pkt)
+                    start = time.time()
 
-                duration = time.time() - start
+                    #run the handler
+                    ret_val = func(fd, request_pkt, reply_pkt)
+
+                    duration = time.time() - start
                 
-                stat_main.getStatKeeper().avg("%s_avg_response_time"%stat_name_prefix, "%s_packets"%stat_name_prefix, duration)
-                stat_main.getStatKeeper().max("%s_max_response_time"%stat_name_prefix, duration)
+                    stat_main.getStatKeeper().avg("%s_avg_response_time"%stat_name_prefix, "%s_packets"%stat_name_prefix, duration)
+                    stat_main.getStatKeeper().max("%s_max_response_time"%stat_name_prefix, duration)
+                    stat_main.getStatKeeper().observe("%s_response_time"%stat_name_prefix, duration)
                 
-                request_obj = rad_main.getRequestList().getRequest(request_pkt)
-                request_obj.setResponsePacket(reply_pkt)
+                    request_obj = rad_main.getRequestList().getRequest(request_pkt)
+                    request_obj.setResponsePacket(reply_pkt)
+
+                    span = trace.beginSpan("send_reply")
+                    self.SendReplyPacket(fd, reply_pkt)
+                    trace.endSpan(span)
 
-                if defs.LOG_RADIUS_RESPONSES:
-                    self.__logRequest(reply_pkt, False)
+                    if not self.first_reply_sent:
+                        self.__firstReplySent()
+                finally:
+                    trace.endTrace()
 
-                self.SendReplyPacket(fd, reply_pkt)
+                rad_main.getPacketLogger().logResponse(request_pkt, reply_pkt)
                 
                 return ret_val
+
+        def __firstReplySent(self):
+                """
+                    log time between start of IBS initialization and first radius reply, it's the time
+                    rases wait for IBS after a restart
+                """
+                self.first_reply_sent = True
+                duration = time.time() - main.getInitStartTime()
+                stat_main.getStatKeeper().setValue("first_reply_after_start", duration)
+                toLog("First radius reply sent %.3f seconds after start"%duration, LOG_DEBUG)
+
+        def __startTrace(self, request_pkt, stat_name_prefix):
+                """
+                    start trace of request in this thread, time that request waited in queue is it's first stage
+                """
+                request_trace = trace.startTrace(stat_name_prefix, request_pkt.receive_time)
+                request_trace.addSpan("queue", request_pkt.receive_time, trace.monotonicTime())
+                request_trace.setDescription("from %s:%s id %s User-Name %s"%(request_pkt.source[0],
+                                                                             request_pkt.source[1],
+                                                                             request_pkt.id,
+                                                                             request_pkt.data.get(1, [None])[0]))